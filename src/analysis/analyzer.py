@@ -4,14 +4,19 @@ import glob
 import numpy as np
 import logging
 import argparse
-import requests
 import json
 from datetime import datetime
-import config
+from src import config
+from src.analysis.nearest_matches import NearestMatchIndex
+from src.api.client import get_client
+from src.data_processing.odds_store import bet_identifier_column, load_odds
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Minimum number of bets shared with the historical matrix for a reliable comparison
+MIN_COMMON_BETS = 5
+
 def load_all_csvs(directory_path: str) -> pd.DataFrame:
     """Loads and concatenates all CSV files from a given directory."""
     all_files = glob.glob(os.path.join(directory_path, "*.csv"))
@@ -42,9 +47,9 @@ def create_feature_matrix(df: pd.DataFrame) -> pd.DataFrame:
         logging.warning("No data left after filtering for key bet types.")
         return pd.DataFrame()
 
-    df['bet_identifier'] = df['bet_type_name'] + '_' + df['bet_value'].astype(str)
+    df['bet_identifier'] = bet_identifier_column(df)
 
-    bookmaker_counts = df.groupby(['fixture_id', 'bet_identifier'])['bookmaker_id'].nunique().reset_index()
+    bookmaker_counts = df.groupby(['fixture_id', 'bet_identifier'], observed=True)['bookmaker_id'].nunique().reset_index()
     reliable_bets = bookmaker_counts[bookmaker_counts['bookmaker_id'] >= config.MIN_BOOKMAKERS_THRESHOLD]
 
     if reliable_bets.empty:
@@ -56,9 +61,11 @@ def create_feature_matrix(df: pd.DataFrame) -> pd.DataFrame:
     if reliable_df.empty:
         return pd.DataFrame()
 
-    mean_odds = reliable_df.groupby(['fixture_id', 'bet_identifier'])['odd'].mean().reset_index()
+    mean_odds = reliable_df.groupby(['fixture_id', 'bet_identifier'], observed=True)['odd'].mean().reset_index()
 
     feature_matrix = mean_odds.pivot(index='fixture_id', columns='bet_identifier', values='odd')
+    feature_matrix.columns = feature_matrix.columns.astype(str)
+    feature_matrix = feature_matrix.sort_index(axis=1)
 
     logging.info(f"Created feature matrix with shape: {feature_matrix.shape}")
     return feature_matrix
@@ -83,7 +90,8 @@ def get_match_results(df: pd.DataFrame) -> pd.DataFrame:
 def preprocess_and_save_data():
     """Orchestrates the data loading and preprocessing."""
     logging.info("Starting data preprocessing...")
-    all_odds_df = load_all_csvs(config.ODDS_DATA_DIR)
+    all_odds_df = load_odds(config.ALL_LEAGUES,
+                            columns=['fixture_id', 'bookmaker_id', 'bet_type_name', 'bet_value', 'odd'])
     all_matches_df = load_all_csvs(config.MATCH_DATA_DIR)
 
     if all_odds_df.empty or all_matches_df.empty:
@@ -109,35 +117,39 @@ def get_api_odds_for_fixture(fixture_id: int) -> pd.DataFrame:
     if not api_key:
         raise ValueError("RapidAPI key not found.")
 
-    response = requests.get(
-        "https://api-football-v1.p.rapidapi.com/v3/odds",
-        params={'fixture': str(fixture_id)},
-        headers={'x-rapidapi-host': "api-football-v1.p.rapidapi.com", 'x-rapidapi-key': api_key}
-    )
-    response.raise_for_status()
-    data = response.json()['response']
+    data = get_client(api_key).get('odds', {'fixture': str(fixture_id)})
+    if data is None:
+        raise ValueError(f"API request for fixture {fixture_id} failed.")
+    data = data['response']
 
     processed_odds = [{'fixture_id': fixture_id, 'bet_type_name': bet['name'], 'bet_value': value['value'], 'odd': value['odd'], 'bookmaker_id': bookmaker['id']} for odds_entry in data for bookmaker in odds_entry.get('bookmakers', []) for bet in bookmaker.get('bets', []) for value in bet.get('values', [])]
 
     return create_feature_matrix(pd.DataFrame(processed_odds)) if processed_odds else pd.DataFrame()
 
-def find_similar_matches(target_vector: pd.Series, historical_matrix: pd.DataFrame):
-    """Finds similar matches and returns a dictionary with distances and common bets."""
-    common_bets = target_vector.index.intersection(historical_matrix.columns)
+def find_similar_matches(target_vector: pd.Series, historical_matrix: pd.DataFrame, k: int = None,
+                         radius: float = None, index: NearestMatchIndex = None):
+    """
+    Finds the historical matches nearest to the target (mean absolute odds difference over the
+    common bets) and returns a dictionary with their distances, ascending, and the common bets.
+    At most `k` matches are returned, all within `radius` when given; pass `index` to reuse one.
+    """
+    index = index or NearestMatchIndex(historical_matrix)
+    common_bets = index.common_bets(target_vector)
     logging.info(f"Found {len(common_bets)} common bet types for comparison.")
 
-    if len(common_bets) < 5:
+    if len(common_bets) < MIN_COMMON_BETS:
         logging.warning("Too few common bet types for a reliable comparison.")
         return {"distances": pd.Series(dtype=float), "common_bets": common_bets.tolist()}
 
-    historical_aligned = historical_matrix[common_bets]
-    target_aligned = target_vector[common_bets]
+    distances = index.query(target_vector, k=k, radius=radius)
+    return {"distances": distances, "common_bets": common_bets.tolist()}
 
-    distance = np.abs(historical_aligned - target_aligned).mean(axis=1)
-    return {"distances": distance.sort_values(), "common_bets": common_bets.tolist()}
-
-def analyze_fixture(fixture_id: int):
-    """Main analysis workflow for a single fixture with enhanced diagnostics."""
+def analyze_fixture(fixture_id: int, historical_df: pd.DataFrame = None, index: NearestMatchIndex = None,
+                    k: int = config.NEAREST_MATCHES_K, radius: float = config.NEAREST_MATCHES_RADIUS):
+    """
+    Main analysis workflow for a single fixture with enhanced diagnostics.
+    `historical_df` and `index` can be shared by several analyses; `k` and `radius` bound the neighbour search.
+    """
     logging.info(f"--- Starting Analysis for Fixture ID: {fixture_id} ---")
     output_dir = 'predictions'
     os.makedirs(output_dir, exist_ok=True)
@@ -146,25 +158,30 @@ def analyze_fixture(fixture_id: int):
     report = {'fixture_id': fixture_id, 'prediction_timestamp': datetime.now().isoformat(), 'status': 'failed', 'diagnostics': {}}
 
     try:
-        historical_df = pd.read_parquet(config.PROCESSED_DATA_PATH)
+        if historical_df is None:
+            historical_df = pd.read_parquet(config.PROCESSED_DATA_PATH)
         target_odds_vector = get_api_odds_for_fixture(fixture_id)
 
         if target_odds_vector.empty:
             raise ValueError("Could not retrieve or process odds for the target fixture.")
 
         target_vector = target_odds_vector.iloc[0]
-        historical_matrix = historical_df.drop(columns=['result', 'home_team_name', 'away_team_name'], errors='ignore')
+        if index is None:
+            historical_matrix = historical_df.drop(columns=['result', 'home_team_name', 'away_team_name'], errors='ignore')
+            index = NearestMatchIndex(historical_matrix)
 
-        similarity_results = find_similar_matches(target_vector, historical_matrix)
+        similarity_results = find_similar_matches(target_vector, index.historical_matrix, k=k, radius=radius, index=index)
         all_distances = similarity_results["distances"]
         common_bets = similarity_results["common_bets"]
 
+        # Distances of the neighbours kept by the search (at most `k`, within `radius`), not of every match
         report['diagnostics'] = {
             'common_bets_count': len(common_bets),
-            'distance_stats': all_distances.describe().to_dict() if not all_distances.empty else None
+            'neighbour_search': {'k': k, 'radius': radius},
+            'neighbour_distance_stats': all_distances.describe().to_dict() if not all_distances.empty else None
         }
 
-        if all_distances.empty:
+        if len(common_bets) < MIN_COMMON_BETS:
             raise ValueError("Could not calculate distances, likely due to no common bets.")
 
         similar_matches = all_distances[all_distances < config.SIMILARITY_THRESHOLD]
@@ -196,13 +213,23 @@ def main():
     """Main entry point for preprocessing or analysis."""
     parser = argparse.ArgumentParser(description="Football Match Odds Analyzer.")
     parser.add_argument('--preprocess', action='store_true', help="Run data preprocessing.")
-    parser.add_argument('--analyze', type=int, metavar='FIXTURE_ID', help="Analyze a specific fixture ID.")
+    parser.add_argument('--analyze', type=int, nargs='+', metavar='FIXTURE_ID',
+                        help="Analyze one or more fixture IDs (the historical data and index are loaded once).")
+    parser.add_argument('--k', type=int, default=config.NEAREST_MATCHES_K,
+                        help="Maximum number of nearest historical matches to keep.")
+    parser.add_argument('--radius', type=float, default=config.NEAREST_MATCHES_RADIUS,
+                        help="Maximum mean odds distance of a neighbour.")
     args = parser.parse_args()
 
     if args.preprocess:
         preprocess_and_save_data()
     elif args.analyze:
-        analyze_fixture(args.analyze)
+        historical_df = index = None
+        if len(args.analyze) > 1:
+            historical_df = pd.read_parquet(config.PROCESSED_DATA_PATH)
+            index = NearestMatchIndex(historical_df.drop(columns=['result', 'home_team_name', 'away_team_name'], errors='ignore'))
+        for fixture_id in args.analyze:
+            analyze_fixture(fixture_id, historical_df, index, k=args.k, radius=args.radius)
     else:
         parser.print_help()
 
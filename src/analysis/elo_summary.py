@@ -16,13 +16,15 @@ Ce script est un outil puissant pour évaluer la pertinence du modèle Elo et
 identifier des tendances statistiques.
 
 Pour l'exécuter :
-python3 src/analysis/elo_summary.py
+python3 -m src.analysis.elo_summary
 """
 import pandas as pd
 import numpy as np
 import os
 import logging
 
+from src.data_processing.warehouse import load_dataset, load_matches
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -37,26 +39,22 @@ def analyze_elo_predictions():
     predictions_path = 'data/predictions/historical_elo_predictions.csv'
     matches_dir = 'data/matches'
 
-    if not os.path.exists(predictions_path):
-        logger.error(f"Le fichier de prédictions n'a pas été trouvé: {predictions_path}")
-        return
-
-    # Charger les prédictions
+    # Charger les prédictions (entrepôt SQLite s'il est activé, CSV sinon)
     try:
-        predictions_df = pd.read_csv(predictions_path)
-        logger.info(f"Données de prédictions chargées: {len(predictions_df)} lignes.")
+        predictions_df = load_dataset('elo_predictions', predictions_path)
     except Exception as e:
         logger.error(f"Erreur lors du chargement des prédictions: {e}")
         return
+    if predictions_df.empty:
+        logger.error(f"Le fichier de prédictions n'a pas été trouvé: {predictions_path}")
+        return
+    logger.info(f"Données de prédictions chargées: {len(predictions_df)} lignes.")
 
-    # Charger tous les résultats de matchs
-    all_matches_files = [os.path.join(matches_dir, f) for f in os.listdir(matches_dir) if f.endswith('.csv')]
-    if not all_matches_files:
+    # Charger les scores de tous les matchs
+    matches_df = load_matches(columns=['fixture_id', 'home_goals', 'away_goals'], matches_dir=matches_dir)
+    if matches_df.empty:
         logger.error("Aucun fichier de match trouvé dans le dossier 'data/matches'.")
         return
-
-    matches_list = [pd.read_csv(file) for file in all_matches_files]
-    matches_df = pd.concat(matches_list, ignore_index=True)
     logger.info(f"Données de matchs chargées: {len(matches_df)} matchs au total.")
 
     # Garder les colonnes nécessaires et renommer pour la cohérence
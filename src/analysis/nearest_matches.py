@@ -0,0 +1,127 @@
+"""
+Nearest-neighbour search over the historical feature matrix (fixture x bet identifier).
+
+The distance between two fixtures is the NaN-aware L1 distance used by the analyzer:
+the mean absolute odds difference over the bets both fixtures are quoted on.
+Instead of scoring every historical row and sorting the whole result, a query:
+- keeps only the fixtures quoted on at least one of the target's markets (bet types);
+- with a radius, keeps only the fixtures with at least one common bet within the radius
+  (the mean of the differences cannot be below the smallest one), found by binary
+  search in the sorted odds of each common bet;
+- scores the remaining candidates on the common bets and selects the k nearest with
+  `np.argpartition`, sorting only those k.
+Per-market row masks are built on first use; a bet's odds are sorted once it is queried
+again (a one-off query applies the radius to the computed distances instead). Both are reused by later
+queries on the same index, e.g. `--analyze` with several fixtures.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Relative widening of the radius window (covers the rounding of the mean distance)
+_RADIUS_MARGIN = 1e-9
+
+
+def market_of(bet_identifier: str) -> str:
+    """Market (bet type) of a "<bet type>_<value>" identifier."""
+    return bet_identifier.split('_', 1)[0]
+
+
+class NearestMatchIndex:
+    """Index answering top-k / radius queries on a historical feature matrix."""
+
+    def __init__(self, historical_matrix: pd.DataFrame):
+        self.historical_matrix = historical_matrix
+        self.values = historical_matrix.to_numpy(dtype=np.float64)
+        self.column_positions = {str(column): j for j, column in enumerate(historical_matrix.columns)}
+        self.market_columns: Dict[str, list] = {}
+        for column, j in self.column_positions.items():
+            self.market_columns.setdefault(market_of(column), []).append(j)
+        self._market_rows: Dict[str, np.ndarray] = {}
+        self._sorted_columns: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._column_uses: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def market_rows(self, market: str) -> np.ndarray:
+        """Boolean mask of the fixtures quoted on at least one bet of `market`."""
+        rows = self._market_rows.get(market)
+        if rows is None:
+            rows = ~np.isnan(self.values[:, self.market_columns.get(market, [])]).all(axis=1)
+            self._market_rows[market] = rows
+        return rows
+
+    def sorted_column(self, j: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Quoted odds of column `j` in ascending order, with their row positions."""
+        column = self._sorted_columns.get(j)
+        if column is None:
+            rows = np.flatnonzero(~np.isnan(self.values[:, j]))
+            order = np.argsort(self.values[rows, j], kind='stable')
+            column = (self.values[rows[order], j], rows[order])
+            self._sorted_columns[j] = column
+        return column
+
+    def common_bets(self, target_vector: pd.Series) -> pd.Index:
+        """Bets quoted for the target that also exist in the historical matrix."""
+        target_vector = target_vector.dropna()
+        return target_vector.index[[str(bet) in self.column_positions for bet in target_vector.index]]
+
+    def candidates(self, columns: np.ndarray, targets: np.ndarray, radius: Optional[float] = None) -> np.ndarray:
+        """Row positions sharing a market with the target and, for repeated bets, possibly within `radius`."""
+        mask = np.zeros(len(self), dtype=bool)
+        for market in {market_of(str(self.historical_matrix.columns[j])) for j in columns}:
+            mask |= self.market_rows(market)
+        # First query on these bets: the radius is applied to the distances (cheaper than sorting the columns)
+        seen = all(self._column_uses.get(j) for j in columns)
+        for j in columns:
+            self._column_uses[j] = self._column_uses.get(j, 0) + 1
+        if radius is not None and seen:
+            window = radius * (1 + _RADIUS_MARGIN) + _RADIUS_MARGIN
+            near = np.zeros(len(self), dtype=bool)
+            for j, target in zip(columns, targets):
+                sorted_values, rows = self.sorted_column(j)
+                lo = sorted_values.searchsorted(target - window, side='left')
+                hi = sorted_values.searchsorted(target + window, side='right')
+                near[rows[lo:hi]] = True
+            mask &= near
+        return np.flatnonzero(mask)
+
+    def distances(self, rows: np.ndarray, columns: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Mean absolute difference over the bets quoted for each row (NaN when none)."""
+        block = self.values[np.ix_(rows, columns)]
+        differences = np.abs(block - targets)
+        quoted = ~np.isnan(differences)
+        counts = quoted.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(quoted, differences, 0.0).sum(axis=1) / counts
+
+    def query(self, target_vector: pd.Series, k: Optional[int] = None,
+              radius: Optional[float] = None) -> pd.Series:
+        """
+        Distances of the nearest historical fixtures to `target_vector`, ascending
+        (ties in matrix order). At most `k` fixtures, all within `radius` when given.
+        """
+        common_bets = self.common_bets(target_vector)
+        if len(common_bets) == 0 or len(self) == 0:
+            return pd.Series(dtype=float, index=self.historical_matrix.index[:0])
+        columns = np.array([self.column_positions[str(bet)] for bet in common_bets])
+        targets = target_vector[common_bets].to_numpy(dtype=np.float64)
+
+        rows = self.candidates(columns, targets, radius)
+        distances = self.distances(rows, columns, targets)
+        keep = ~np.isnan(distances)
+        if radius is not None:
+            keep &= distances <= radius
+        rows, distances = rows[keep], distances[keep]
+
+        if k is not None and k < len(rows):
+            # k-th smallest distance without sorting; ties at that distance are kept in matrix order
+            kth = distances[np.argpartition(distances, k - 1)[k - 1]] if k > 0 else -np.inf
+            below = np.flatnonzero(distances < kth)
+            ties = np.flatnonzero(distances == kth)[:k - len(below)]
+            selected = np.concatenate([below, ties])
+            rows, distances = rows[selected], distances[selected]
+        order = np.lexsort((rows, distances))
+        return pd.Series(distances[order], index=self.historical_matrix.index[rows[order]])
@@ -7,12 +7,14 @@ Permet d'analyser les données historiques de prédictions
 import pandas as pd
 import numpy as np
 import os
-import glob
 from datetime import datetime, date, timedelta
 from typing import Dict
 import logging
 import argparse
 
+from src.data_processing.warehouse import load_matches
+from src.prediction.prediction_history import predictions_history
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -33,7 +35,7 @@ class PredictionsAnalyzer:
             return pd.DataFrame()
         
         try:
-            df = pd.read_csv(self.historical_file)
+            df = predictions_history(self.historical_file).read()
             logger.info(f"📚 Données historiques chargées: {len(df)} prédictions")
             return df
         except Exception as e:
@@ -265,16 +267,13 @@ class PredictionsAnalyzer:
         """
         logger.info("Enrichissement des prédictions avec les résultats des matchs...")
 
-        # 1. Charger tous les fichiers de résultats de matchs
-        matches_path = 'data/matches'
-        all_matches_files = glob.glob(os.path.join(matches_path, "*.csv"))
+        # 1. Charger les scores des matchs (entrepôt SQLite s'il est activé, CSV sinon)
+        matches_df = load_matches(columns=['fixture_id', 'home_goals_fulltime', 'away_goals_fulltime'])
 
-        if not all_matches_files:
+        if matches_df.empty:
             logger.error("Aucun fichier de résultat de match trouvé.")
             return predictions_df
 
-        matches_df = pd.concat((pd.read_csv(f) for f in all_matches_files), ignore_index=True)
-
         # 2. Sélectionner les colonnes pertinentes et supprimer les doublons
         results_df = matches_df[['fixture_id', 'home_goals_fulltime', 'away_goals_fulltime']].copy()
         results_df.dropna(subset=['home_goals_fulltime', 'away_goals_fulltime'], inplace=True)
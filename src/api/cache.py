@@ -0,0 +1,128 @@
+"""
+Cache persistant (SQLite) des réponses de l'API-Football.
+
+Rôle :
+- Évite de redemander à l'API des données qui ne changent plus : statistiques
+  et joueurs d'un match terminé, cotes d'un match joué, matchs terminés.
+- Clé de cache : endpoint + paramètres normalisés (triés, convertis en texte).
+- Durée de vie (TTL) dépendant de l'endpoint et du statut du match :
+    - permanente pour les données d'un match terminé ;
+    - quelques minutes pour les cotes d'avant-match et les matchs à venir ;
+    - jamais de mise en cache d'une réponse vide ou en erreur.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from src.config import API_CACHE_TTLS
+
+logger = logging.getLogger(__name__)
+
+# Statuts API-Football pour lesquels le match ne bougera plus
+FINISHED_STATUSES = {'FT', 'AET', 'PEN', 'AWD', 'WO', 'CANC', 'ABD'}
+
+# Délai après le coup d'envoi au-delà duquel les cotes d'un match sont figées
+ODDS_FROZEN_AFTER_KICKOFF = 4 * 3600
+
+
+def normalize_params(params: Optional[Dict]) -> str:
+    """Sérialise les paramètres de façon stable (ordre et types indifférents)."""
+    return json.dumps({str(k): str(v) for k, v in (params or {}).items()}, sort_keys=True)
+
+
+def resolve_ttl(endpoint: str, data: Optional[Dict], fixture_status: Optional[str] = None,
+                now: Optional[float] = None) -> Optional[float]:
+    """
+    Détermine la durée de vie d'une réponse.
+    Renvoie None pour un cache permanent, 0 pour ne pas mettre en cache.
+    """
+    if not data or data.get('errors'):
+        return 0
+    response = data.get('response')
+    if not isinstance(response, list) or not response:
+        return 0
+
+    now = now if now is not None else time.time()
+    default_ttl = API_CACHE_TTLS.get(endpoint, API_CACHE_TTLS['default'])
+
+    if endpoint in ('fixtures/statistics', 'fixtures/players'):
+        return None if fixture_status in FINISHED_STATUSES else default_ttl
+
+    if endpoint == 'odds':
+        kickoffs = [entry.get('fixture', {}).get('timestamp') for entry in response]
+        if all(kickoffs) and max(kickoffs) + ODDS_FROZEN_AFTER_KICKOFF < now:
+            return None
+        return default_ttl
+
+    if endpoint == 'fixtures':
+        statuses = [entry.get('fixture', {}).get('status', {}).get('short') for entry in response]
+        if all(status in FINISHED_STATUSES for status in statuses):
+            return None
+        return default_ttl
+
+    return default_ttl
+
+
+class ResponseCache:
+    """
+    Stockage clé/valeur des réponses JSON dans une base SQLite.
+    La connexion est ouverte au premier accès et partagée entre threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " endpoint TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " expires_at REAL,"
+                " PRIMARY KEY (endpoint, params))"
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, endpoint: str, params: Optional[Dict]) -> Optional[Dict]:
+        """Renvoie la réponse en cache si elle existe et n'a pas expiré."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT payload, expires_at FROM responses WHERE endpoint = ? AND params = ?",
+                (endpoint, normalize_params(params))
+            ).fetchone()
+        if row is None:
+            return None
+        payload, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return json.loads(payload)
+
+    def set(self, endpoint: str, params: Optional[Dict], data: Dict, ttl: Optional[float]) -> None:
+        """Enregistre une réponse ; `ttl=None` la conserve indéfiniment."""
+        expires_at = None if ttl is None else time.time() + ttl
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (endpoint, params, payload, expires_at) VALUES (?, ?, ?, ?)",
+                (endpoint, normalize_params(params), json.dumps(data), expires_at)
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
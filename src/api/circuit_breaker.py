@@ -0,0 +1,160 @@
+"""
+Disjoncteur (circuit breaker) et file de reprise pour les pannes de l'API-Football.
+
+Rôle :
+- `CircuitBreaker` : après `failure_threshold` échecs consécutifs sur un endpoint,
+  le circuit s'ouvre et les appels suivants sont refusés immédiatement.
+  Après `reset_timeout` secondes, un seul appel d'essai est autorisé :
+  s'il réussit le circuit se referme, sinon il reste ouvert. Un 429 sur l'appel
+  d'essai ne compte pas comme un échec mais rouvre le circuit pour un nouveau délai.
+- `RetryQueue` : liste persistante (JSON) des requêtes abandonnées pendant une
+  exécution (panne, circuit ouvert, budget de retries épuisé). Les collecteurs
+  la relisent à l'exécution suivante pour rattraper les matchs manqués.
+  Plusieurs collecteurs peuvent la partager : chaque sauvegarde relit le fichier
+  sous verrou et n'y applique que ses propres ajouts et résolutions.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.api.cache import normalize_params
+from src.data_processing.file_io import atomic_write, file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Disjoncteur thread-safe à trois états : fermé, ouvert, semi-ouvert."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Indique si un appel peut partir maintenant."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Un seul appel d'essai ; les autres restent bloqués jusqu'à son résultat
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_rate_limited(self) -> None:
+        """Un 429 ne compte pas comme un échec, mais clôt l'appel d'essai en rouvrant le circuit."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_failure(self) -> bool:
+        """Enregistre un échec. Renvoie True si le circuit vient de s'ouvrir."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class RetryQueue:
+    """
+    Requêtes à reprendre au prochain passage, indexées par endpoint et paramètres.
+    Les entrées plus anciennes que `max_age_days` sont abandonnées au chargement.
+    """
+
+    def __init__(self, path: str, max_age_days: int):
+        self.path = path
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Dict]]] = None
+        # Modifications de ce processus depuis la dernière sauvegarde (None = résolue)
+        self._changes: Dict[Tuple[str, str], Optional[Dict]] = {}
+        self._dirty = False
+
+    def _read_file(self) -> Dict[str, Dict[str, Dict]]:
+        entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"File de reprise illisible ({self.path}): {e}")
+        oldest = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+        return {
+            endpoint: {key: entry for key, entry in requests.items() if entry['first_failed_at'] >= oldest}
+            for endpoint, requests in entries.items()
+        }
+
+    def _load(self) -> Dict[str, Dict[str, Dict]]:
+        if self._entries is None:
+            self._entries = self._read_file()
+        return self._entries
+
+    def add(self, endpoint: str, params: Optional[Dict], reason: str) -> None:
+        key = normalize_params(params)
+        with self._lock:
+            requests = self._load().setdefault(endpoint, {})
+            entry = requests.get(key)
+            if entry is None:
+                entry = requests[key] = {'params': dict(params or {}),
+                                         'first_failed_at': datetime.now().isoformat(), 'attempts': 0}
+            entry['attempts'] += 1
+            entry['reason'] = reason
+            self._changes[(endpoint, key)] = entry
+            self._dirty = True
+
+    def resolve(self, endpoint: str, params: Optional[Dict]) -> None:
+        key = normalize_params(params)
+        with self._lock:
+            requests = self._load().get(endpoint, {})
+            if key in requests:
+                del requests[key]
+                self._changes[(endpoint, key)] = None
+                self._dirty = True
+
+    def pending(self, endpoint: str) -> List[Dict]:
+        """Paramètres des requêtes encore à reprendre pour cet endpoint."""
+        with self._lock:
+            return [dict(entry['params']) for entry in self._load().get(endpoint, {}).values()]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(requests) for requests in self._load().values())
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            with file_lock(self.path):
+                entries = self._read_file()
+                for (endpoint, key), entry in self._changes.items():
+                    if entry is None:
+                        entries.get(endpoint, {}).pop(key, None)
+                    else:
+                        entries.setdefault(endpoint, {})[key] = entry
+                entries = {endpoint: requests for endpoint, requests in entries.items() if requests}
+                with atomic_write(self.path) as f:
+                    json.dump(entries, f, indent=1)
+            self._entries = entries
+            self._changes = {}
+            self._dirty = False
@@ -0,0 +1,372 @@
+"""
+Client partagé pour l'API-Football (RapidAPI).
+
+Rôle :
+- Centralise les appels HTTP que chaque collecteur et workflow faisait
+  auparavant avec son propre `requests.get`.
+- Réutilise une seule `requests.Session` par clé API : les connexions TLS
+  restent ouvertes (keep-alive) et sont poolées entre les appels.
+- Demande des réponses compressées (gzip) pour réduire le volume transféré.
+- Applique une politique unique de timeout et de retries.
+- Limite le débit global avec un seau de jetons (`API_REQUESTS_PER_SECOND`),
+  ce qui rend le client utilisable depuis plusieurs threads.
+- Ajuste ce débit à partir des en-têtes `x-ratelimit-*` renvoyés par RapidAPI :
+  accélère jusqu'au quota par minute du plan, ralentit quand il s'épuise.
+- Réessaie les erreurs 429/5xx avec un backoff exponentiel à gigue
+  (ou le délai `Retry-After` quand l'API l'indique), dans la limite d'un budget
+  de retries par exécution (`API_RETRY_BUDGET`).
+- Coupe un endpoint en panne avec un disjoncteur : les appels suivants échouent
+  immédiatement et sont notés dans la file de reprise (`API_RETRY_QUEUE_PATH`)
+  pour l'exécution suivante.
+- Sert les réponses déjà connues depuis le cache disque (`API_CACHE_PATH`)
+  sans consommer de quota.
+- Fusionne les requêtes identiques (single-flight) : une requête déjà en cours
+  ou terminée depuis moins de `API_COALESCE_WINDOW` secondes n'est pas relancée,
+  et chaque étape peut rapporter les appels ainsi économisés (`track_stage`).
+
+Utilisation :
+    from src.api.client import get_client
+    client = get_client(rapidapi_key)
+    data = client.get('fixtures', {'date': '2025-08-30'})
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import (
+    API_FOOTBALL_BASE_URL,
+    API_FOOTBALL_HOST,
+    API_TIMEOUT,
+    API_MAX_RETRIES,
+    API_RETRY_DELAY,
+    API_POOL_SIZE,
+    API_REQUESTS_PER_SECOND,
+    API_MIN_REQUESTS_PER_SECOND,
+    API_RATE_LIMIT_RESERVE,
+    API_DAILY_QUOTA_WARNING,
+    API_BACKOFF_MAX,
+    API_CACHE_PATH,
+    API_COALESCE_WINDOW,
+    API_BREAKER_FAILURE_THRESHOLD,
+    API_BREAKER_RESET_TIMEOUT,
+    API_RETRY_BUDGET,
+    API_RETRY_QUEUE_PATH,
+    API_RETRY_QUEUE_MAX_AGE_DAYS
+)
+from src.api.cache import ResponseCache, normalize_params, resolve_ttl
+from src.api.circuit_breaker import CircuitBreaker, RetryQueue
+from src.api.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def _int_header(headers, name: str) -> Optional[int]:
+    """Lit un en-tête entier, None s'il est absent ou invalide."""
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class _InFlightRequest:
+    """Requête en cours dont le résultat est partagé avec les appelants identiques."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict] = None
+
+
+class ApiFootballClient:
+    """
+    Client HTTP pour l'API-Football basé sur une session poolée.
+    Renvoie le JSON décodé ou None lorsque toutes les tentatives ont échoué.
+    """
+
+    def __init__(self, api_key: str, base_url: str = API_FOOTBALL_BASE_URL,
+                 timeout: float = API_TIMEOUT, max_retries: int = API_MAX_RETRIES,
+                 retry_delay: float = API_RETRY_DELAY, pool_size: int = API_POOL_SIZE,
+                 requests_per_second: float = API_REQUESTS_PER_SECOND,
+                 cache: Optional[ResponseCache] = None,
+                 coalesce_window: float = API_COALESCE_WINDOW,
+                 retry_budget: int = API_RETRY_BUDGET,
+                 retry_queue: Optional[RetryQueue] = None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'x-rapidapi-host': API_FOOTBALL_HOST,
+            'x-rapidapi-key': api_key,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.cache = cache
+
+        self.coalesce_window = coalesce_window
+
+        self.retry_budget = retry_budget
+        self.retry_queue = retry_queue
+        self.breakers: Dict[str, CircuitBreaker] = defaultdict(
+            lambda: CircuitBreaker(API_BREAKER_FAILURE_THRESHOLD, API_BREAKER_RESET_TIMEOUT)
+        )
+        self._breakers_lock = threading.Lock()
+        self._flight_lock = threading.Lock()
+        self._in_flight: Dict[tuple, _InFlightRequest] = {}
+        self._recent: Dict[tuple, tuple] = {}
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'api_calls': 0,
+            'failed_requests': 0,
+            'cache_hits': 0,
+            'coalesced': 0,
+            'rate_limited': 0,
+            'short_circuited': 0,
+            'retries_skipped': 0
+        }
+        self.daily_requests_remaining: Optional[int] = None
+        self._daily_quota_warned = False
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get(self, endpoint: str, params: Optional[Dict] = None,
+            fixture_status: Optional[str] = None) -> Optional[Dict]:
+        """
+        Effectue une requête GET avec retries et renvoie le JSON ou None.
+        `fixture_status` (statut court du match, ex: 'FT') permet de mettre en cache
+        définitivement les données d'un match terminé.
+        Les requêtes identiques en cours ou récentes partagent un seul appel.
+        """
+        key = (endpoint, normalize_params(params))
+        with self._flight_lock:
+            recent = self._recent.get(key)
+            if recent is not None and recent[1] <= time.monotonic():
+                recent = None
+            request = self._in_flight.get(key)
+            is_leader = recent is None and request is None
+            if is_leader:
+                request = self._in_flight[key] = _InFlightRequest()
+
+        if recent is not None:
+            self._count('coalesced')
+            return recent[0]
+        if not is_leader:
+            request.done.wait()
+            self._count('coalesced')
+            logger.debug(f"Requête fusionnée: {endpoint} avec params: {params}")
+            return request.result
+
+        try:
+            request.result = self._get_uncoalesced(endpoint, params, fixture_status)
+        finally:
+            with self._flight_lock:
+                del self._in_flight[key]
+                if request.result is not None and not request.result.get('errors') and self.coalesce_window > 0:
+                    now = time.monotonic()
+                    self._recent = {k: v for k, v in self._recent.items() if v[1] > now}
+                    self._recent[key] = (request.result, now + self.coalesce_window)
+            request.done.set()
+        return request.result
+
+    def _get_uncoalesced(self, endpoint: str, params: Optional[Dict],
+                         fixture_status: Optional[str]) -> Optional[Dict]:
+        """Cache disque puis appel réseau."""
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                self._count('cache_hits')
+                logger.debug(f"Cache: {endpoint} avec params: {params}")
+                return cached
+
+        data = self._fetch(endpoint, params)
+
+        if data is not None and self.cache is not None:
+            ttl = resolve_ttl(endpoint, data, fixture_status)
+            if ttl != 0:
+                self.cache.set(endpoint, params, data, ttl)
+        return data
+
+    def _fetch(self, endpoint: str, params: Optional[Dict]) -> Optional[Dict]:
+        """Appel réseau avec retries, protégé par le disjoncteur de l'endpoint."""
+        url = f"{self.base_url}/{endpoint}"
+        with self._breakers_lock:
+            breaker = self.breakers[endpoint]
+        reason = 'échecs répétés'
+
+        for attempt in range(1, self.max_retries + 1):
+            if not breaker.allow_request():
+                self._count('short_circuited')
+                logger.debug(f"Circuit ouvert, appel ignoré: {endpoint} avec params: {params}")
+                reason = 'circuit ouvert'
+                break
+
+            self.rate_limiter.acquire()
+            self._count('api_calls')
+            retry_after = None
+            endpoint_failed = True
+            try:
+                logger.debug(f"Requête API: {endpoint} avec params: {params} (tentative {attempt})")
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                self._adapt_to_rate_limit_headers(response.headers)
+
+                if response.status_code == 200:
+                    data = response.json()
+                    if data.get('errors'):
+                        logger.warning(f"Erreurs API: {data['errors']}")
+                    breaker.record_success()
+                    if self.retry_queue is not None:
+                        self.retry_queue.resolve(endpoint, params)
+                    return data
+
+                if response.status_code == 429:
+                    # Un dépassement de quota n'est pas une panne de l'endpoint
+                    endpoint_failed = False
+                    breaker.record_rate_limited()
+                    self._count('rate_limited')
+                    retry_after = _int_header(response.headers, 'Retry-After')
+                    # Quota dépassé : on divise le débit par deux jusqu'aux prochains en-têtes
+                    self.rate_limiter.set_rate(max(API_MIN_REQUESTS_PER_SECOND, self.rate_limiter.rate / 2))
+                    logger.warning(f"Limite de débit atteinte (429) sur {endpoint}")
+                else:
+                    logger.warning(f"Erreur HTTP {response.status_code}: {response.text[:200]}")
+                    # Les erreurs client (clé invalide, paramètres...) ne se corrigent pas en réessayant
+                    if 400 <= response.status_code < 500:
+                        breaker.record_success()
+                        self._count('failed_requests')
+                        return None
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erreur de requête: {e}")
+            except ValueError as e:
+                logger.error(f"Erreur de parsing JSON: {e}")
+
+            if endpoint_failed and breaker.record_failure():
+                logger.warning(f"🔌 Circuit ouvert pour {endpoint}: appels suspendus "
+                               f"{API_BREAKER_RESET_TIMEOUT}s après {breaker.failures} échecs")
+
+            if attempt < self.max_retries:
+                if not self._consume_retry():
+                    reason = 'budget de retries épuisé'
+                    break
+                time.sleep(self._backoff_delay(attempt, retry_after))
+
+        self._count('failed_requests')
+        if self.retry_queue is not None:
+            self.retry_queue.add(endpoint, params, reason)
+        return None
+
+    def _consume_retry(self) -> bool:
+        """Prend un retry dans le budget de l'exécution ; False s'il est épuisé."""
+        with self._stats_lock:
+            if self.retry_budget <= 0:
+                self.stats['retries_skipped'] += 1
+                return False
+            self.retry_budget -= 1
+            if self.retry_budget == 0:
+                logger.warning("⚠️ Budget de retries épuisé : les prochains échecs ne seront plus réessayés")
+            return True
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[int] = None) -> float:
+        """Délai avant la tentative suivante : Retry-After, sinon exponentiel avec gigue."""
+        if retry_after is not None:
+            return min(retry_after, API_BACKOFF_MAX)
+        ceiling = min(API_BACKOFF_MAX, self.retry_delay * 2 ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def _adapt_to_rate_limit_headers(self, headers) -> None:
+        """
+        Règle le débit du seau de jetons d'après les en-têtes RapidAPI :
+        - `x-ratelimit-limit` / `x-ratelimit-remaining` : quota par minute ;
+        - `x-ratelimit-requests-remaining` : quota journalier restant.
+        """
+        minute_limit = _int_header(headers, 'x-ratelimit-limit')
+        minute_remaining = _int_header(headers, 'x-ratelimit-remaining')
+        daily_remaining = _int_header(headers, 'x-ratelimit-requests-remaining')
+
+        if minute_limit:
+            rate = minute_limit / 60
+            if minute_remaining is not None:
+                reserve = max(1.0, minute_limit * API_RATE_LIMIT_RESERVE)
+                if minute_remaining < reserve:
+                    # Peu de requêtes restantes dans la minute : ralentir proportionnellement
+                    rate *= max(minute_remaining, 0) / reserve
+            rate = max(API_MIN_REQUESTS_PER_SECOND, rate)
+            if abs(rate - self.rate_limiter.rate) > 1e-9:
+                logger.debug(f"Débit API ajusté: {self.rate_limiter.rate:.2f} → {rate:.2f} req/s")
+                self.rate_limiter.set_rate(rate, capacity=max(1.0, rate))
+
+        if daily_remaining is not None:
+            self.daily_requests_remaining = daily_remaining
+            if daily_remaining <= API_DAILY_QUOTA_WARNING and not self._daily_quota_warned:
+                self._daily_quota_warned = True
+                logger.warning(f"⚠️ Quota journalier API presque épuisé: {daily_remaining} requêtes restantes")
+
+    def pending_retries(self, endpoint: str) -> List[Dict]:
+        """Paramètres des requêtes abandonnées lors d'une exécution précédente."""
+        return self.retry_queue.pending(endpoint) if self.retry_queue is not None else []
+
+    @contextmanager
+    def track_stage(self, stage: str):
+        """Journalise, à la fin d'une étape, les appels réseau faits et ceux économisés."""
+        with self._stats_lock:
+            before = dict(self.stats)
+        try:
+            yield
+        finally:
+            with self._stats_lock:
+                delta = {key: value - before[key] for key, value in self.stats.items()}
+            saved = delta['coalesced'] + delta['cache_hits']
+            logger.info(f"♻️ [{stage}] Appels API: {delta['api_calls']} | économisés: {saved} "
+                        f"(fusionnés: {delta['coalesced']}, cache: {delta['cache_hits']})")
+            if delta['failed_requests']:
+                logger.warning(f"⚠️ [{stage}] {delta['failed_requests']} requêtes abandonnées "
+                               f"(circuit ouvert: {delta['short_circuited']}, "
+                               f"retries non tentés: {delta['retries_skipped']})")
+            if self.retry_queue is not None:
+                self.retry_queue.save()
+                if len(self.retry_queue):
+                    logger.info(f"📝 [{stage}] {len(self.retry_queue)} requêtes à reprendre au prochain passage "
+                                f"({self.retry_queue.path})")
+
+    def close(self) -> None:
+        """Ferme les connexions du pool et le cache, et enregistre la file de reprise."""
+        self.session.close()
+        if self.retry_queue is not None:
+            self.retry_queue.save()
+        if self.cache is not None:
+            self.cache.close()
+
+
+# Un client par (clé, URL) pour partager le pool entre tous les étages d'un même processus
+_clients: Dict[tuple, ApiFootballClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str, base_url: str = API_FOOTBALL_BASE_URL) -> ApiFootballClient:
+    """Renvoie le client partagé associé à cette clé API (créé au premier appel)."""
+    key = (api_key, base_url)
+    with _clients_lock:
+        if key not in _clients:
+            # Le cache disque ne garde que des réponses de la vraie API (pas du serveur local de test)
+            use_cache = API_CACHE_PATH and API_FOOTBALL_HOST in base_url
+            cache = ResponseCache(API_CACHE_PATH) if use_cache else None
+            use_queue = API_RETRY_QUEUE_PATH and API_FOOTBALL_HOST in base_url
+            retry_queue = RetryQueue(API_RETRY_QUEUE_PATH, API_RETRY_QUEUE_MAX_AGE_DAYS) if use_queue else None
+            _clients[key] = ApiFootballClient(api_key, base_url=base_url, cache=cache, retry_queue=retry_queue)
+        return _clients[key]
@@ -0,0 +1,128 @@
+"""
+Décodage colonnaire des réponses `odds` de l'API-Football.
+
+Rôle :
+- Parcourt bookmakers → paris → valeurs une seule fois et ajoute chaque cote
+  directement dans des tableaux typés (`array`), sans créer un dictionnaire par ligne.
+- Les chaînes répétées (bookmaker, type de pari, valeur, identifiant de pari)
+  sont codées en entiers et restituées en colonnes `category`.
+- Un seul horodatage `collected_at` par réponse.
+- Renvoie un DataFrame prêt pour la construction des caractéristiques
+  (colonne `odd` déjà numérique, `bet_identifier` = "<pari>_<valeur>").
+"""
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ODDS_COLUMNS = ['fixture_id', 'fixture_date', 'bookmaker_id', 'bookmaker_name', 'bet_type_id',
+                'bet_type_name', 'bet_value', 'odd', 'collected_at']
+
+# Valeur sentinelle des identifiants absents dans les tableaux d'entiers
+_MISSING_ID = -1
+
+
+class _CategoryColumn:
+    """Colonne de chaînes codées : un entier par ligne, chaque valeur distincte stockée une fois."""
+
+    def __init__(self):
+        self.codes = array('i')
+        self.categories: Dict[object, int] = {}
+
+    def code(self, value) -> int:
+        code = self.categories.get(value)
+        if code is None:
+            code = self.categories[value] = len(self.categories)
+        return code
+
+    def to_categorical(self) -> pd.Categorical:
+        categories = list(self.categories)
+        codes = np.frombuffer(self.codes, dtype=np.int32).copy() if self.codes else np.empty(0, dtype=np.int32)
+        # Les valeurs None deviennent le code -1 (valeur manquante)
+        if None in self.categories:
+            none_code = self.categories[None]
+            categories.pop(none_code)
+            codes = np.where(codes == none_code, -1, codes - (codes > none_code))
+        return pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object))
+
+
+def _id_array(values: array) -> pd.arrays.IntegerArray:
+    data = np.frombuffer(values, dtype=np.int64).copy() if values else np.empty(0, dtype=np.int64)
+    return pd.arrays.IntegerArray(data, data == _MISSING_ID)
+
+
+def _parse_odd(odd) -> float:
+    try:
+        return float(odd)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def decode_odds_response(odds_data: Optional[List[Dict]], fixture_id: Optional[int] = None,
+                         collected_at: Optional[str] = None) -> pd.DataFrame:
+    """
+    Convertit la liste `response` de l'endpoint `odds` en DataFrame colonnaire.
+    `fixture_id` force l'identifiant du match (sinon lu dans chaque entrée).
+    """
+    fixture_ids = array('q')
+    bookmaker_ids = array('q')
+    bet_type_ids = array('q')
+    odds = array('d')
+    fixture_dates = _CategoryColumn()
+    bookmaker_names = _CategoryColumn()
+    bet_type_names = _CategoryColumn()
+    bet_values = _CategoryColumn()
+    bet_identifiers = _CategoryColumn()
+    identifier_codes: Dict[tuple, int] = {}
+
+    for odds_entry in odds_data or []:
+        fixture = odds_entry.get('fixture', {})
+        entry_fixture_id = fixture_id if fixture_id is not None else fixture.get('id')
+        entry_fixture_id = _MISSING_ID if entry_fixture_id is None else int(entry_fixture_id)
+        date_code = fixture_dates.code(fixture.get('date'))
+
+        for bookmaker in odds_entry.get('bookmakers', []):
+            bookmaker_id = bookmaker.get('id')
+            bookmaker_id = _MISSING_ID if bookmaker_id is None else int(bookmaker_id)
+            bookmaker_code = bookmaker_names.code(bookmaker.get('name'))
+
+            for bet in bookmaker.get('bets', []):
+                bet_type_id = bet.get('id')
+                bet_type_id = _MISSING_ID if bet_type_id is None else int(bet_type_id)
+                bet_name = bet.get('name')
+                bet_name_code = bet_type_names.code(bet_name)
+
+                for value in bet.get('values', []):
+                    bet_value = value.get('value')
+                    value_code = bet_values.code(bet_value)
+                    identifier_code = identifier_codes.get((bet_name_code, value_code))
+                    if identifier_code is None:
+                        identifier_code = bet_identifiers.code(f"{bet_name}_{bet_value}")
+                        identifier_codes[(bet_name_code, value_code)] = identifier_code
+
+                    fixture_ids.append(entry_fixture_id)
+                    bookmaker_ids.append(bookmaker_id)
+                    bet_type_ids.append(bet_type_id)
+                    odds.append(_parse_odd(value.get('odd')))
+                    fixture_dates.codes.append(date_code)
+                    bookmaker_names.codes.append(bookmaker_code)
+                    bet_type_names.codes.append(bet_name_code)
+                    bet_values.codes.append(value_code)
+                    bet_identifiers.codes.append(identifier_code)
+
+    n_rows = len(odds)
+    collected_at = collected_at or datetime.now().isoformat()
+    return pd.DataFrame({
+        'fixture_id': _id_array(fixture_ids),
+        'fixture_date': fixture_dates.to_categorical(),
+        'bookmaker_id': _id_array(bookmaker_ids),
+        'bookmaker_name': bookmaker_names.to_categorical(),
+        'bet_type_id': _id_array(bet_type_ids),
+        'bet_type_name': bet_type_names.to_categorical(),
+        'bet_value': bet_values.to_categorical(),
+        'odd': np.frombuffer(odds, dtype=np.float64).copy() if n_rows else np.empty(0, dtype=np.float64),
+        'collected_at': pd.Categorical.from_codes(np.zeros(n_rows, dtype=np.int8), categories=[collected_at]),
+        'bet_identifier': bet_identifiers.to_categorical()
+    })
@@ -0,0 +1,55 @@
+"""
+Limiteur de débit à seau de jetons (token bucket) pour l'API-Football.
+
+Le seau se remplit à `rate` jetons par seconde jusqu'à `capacity` jetons.
+Chaque requête consomme un jeton ; si le seau est vide, l'appelant attend
+le temps nécessaire. Le limiteur est partagé entre threads, ce qui permet de
+lancer plusieurs requêtes en parallèle sans dépasser le quota du plan RapidAPI.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Seau de jetons thread-safe.
+    Un `rate` nul ou négatif désactive la limitation.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Consomme `tokens` jetons, en attendant si besoin. Renvoie le temps d'attente (s)."""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        """Modifie le débit (et éventuellement la capacité) à chaud."""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+            self._tokens = min(self._tokens, self.capacity)
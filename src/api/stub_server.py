@@ -0,0 +1,474 @@
+"""
+Serveur HTTP local qui imite l'API-Football pour tester et mesurer les collecteurs sans réseau.
+
+Rôle :
+- Sert `fixtures`, `fixtures/statistics`, `fixtures/players` et `odds` au format
+  de l'API-Football (enveloppe `get/parameters/errors/results/paging/response`).
+- Répond à partir de réponses enregistrées (le cache SQLite du client,
+  `API_CACHE_PATH`) quand elles existent, sinon génère des données synthétiques
+  déterministes (même graine → mêmes matchs, statistiques et cotes).
+- Simule les conditions réelles : latence configurable, en-têtes `x-ratelimit-*`,
+  réponses 429 avec `Retry-After` quand le quota par minute est épuisé,
+  injection d'erreurs 500.
+- Expose `/_stats` (nombre de requêtes servies par endpoint) pour comparer le
+  nombre d'appels de deux versions d'un collecteur.
+
+Utilisation :
+    python -m src.api.stub_server --port 8080 --latency-ms 150 --rate-limit 300
+    API_FOOTBALL_BASE_URL=http://127.0.0.1:8080/v3 RAPIDAPI_KEY=stub \\
+        python -m src.data_processing.football_data_updater
+
+La mise à jour incrémentale couvre toutes les ligues de `ALL_LEAGUES` ; les
+compteurs de `/_stats` donnent le nombre d'appels par endpoint.
+
+Le client partagé n'utilise pas le cache disque quand il vise un autre hôte que
+RapidAPI : les réponses synthétiques ne se mélangent jamais aux vraies.
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from src.config import ALL_LEAGUES
+from src.api.cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ('fixtures', 'fixtures/statistics', 'fixtures/players', 'odds')
+
+# Taille de page de l'endpoint `odds` de l'API réelle
+ODDS_PAGE_SIZE = 10
+
+STAT_TYPES = [
+    'Shots on Goal', 'Shots off Goal', 'Total Shots', 'Blocked Shots', 'Shots insidebox',
+    'Shots outsidebox', 'Fouls', 'Corner Kicks', 'Offsides', 'Ball Possession', 'Yellow Cards',
+    'Red Cards', 'Goalkeeper Saves', 'Total passes', 'Passes accurate', 'Passes %'
+]
+
+BOOKMAKERS = [(8, 'Bet365'), (6, 'Bwin'), (11, '1xBet'), (16, 'Unibet'), (32, 'Betway')]
+
+BETS = [
+    (1, 'Match Winner', ['Home', 'Draw', 'Away']),
+    (5, 'Goals Over/Under', ['Over 2.5', 'Under 2.5', 'Over 1.5', 'Under 1.5']),
+    (8, 'Both Teams Score', ['Yes', 'No']),
+    (12, 'Double Chance', ['Home/Draw', 'Home/Away', 'Draw/Away'])
+]
+
+FIXTURE_HOURS = (13, 15, 17, 19, 20)
+
+
+class SyntheticData:
+    """
+    Générateur déterministe de réponses API-Football.
+    L'identifiant d'un match encode sa ligue, sa date et son créneau, ce qui permet
+    de retrouver le match à partir de `fixture=<id>` sans rien stocker.
+    """
+
+    def __init__(self, seed: int = 0, fixtures_per_day: int = 2, today: Optional[date] = None):
+        self.seed = seed
+        self.fixtures_per_day = fixtures_per_day
+        self.today = today or date.today()
+        self.leagues_by_id = {info['id']: info for info in ALL_LEAGUES.values()}
+
+    # --- Identifiants ---
+
+    @staticmethod
+    def fixture_id(league_id: int, day: date, slot: int) -> int:
+        return (league_id * 1_000_000 + day.toordinal()) * 10 + slot
+
+    @staticmethod
+    def decode_fixture_id(fixture_id: int) -> Tuple[int, date, int]:
+        slot = fixture_id % 10
+        ordinal = (fixture_id // 10) % 1_000_000
+        league_id = fixture_id // 10_000_000
+        return league_id, date.fromordinal(ordinal), slot
+
+    @staticmethod
+    def season_of(day: date) -> int:
+        return day.year if day.month >= 7 else day.year - 1
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(f"{self.seed}:{':'.join(str(k) for k in key)}")
+
+    # --- Matchs ---
+
+    def fixture(self, fixture_id: int) -> Optional[Dict]:
+        league_id, day, slot = self.decode_fixture_id(fixture_id)
+        league = self.leagues_by_id.get(league_id)
+        if league is None or slot >= self.fixtures_per_day:
+            return None
+
+        rng = self._rng('fixture', fixture_id)
+        home_id = league_id * 100 + 2 * slot + 1
+        away_id = home_id + 1
+        kickoff = datetime(day.year, day.month, day.day, FIXTURE_HOURS[slot % len(FIXTURE_HOURS)],
+                           tzinfo=timezone.utc)
+        finished = day < self.today
+        home_goals, away_goals = (rng.randint(0, 4), rng.randint(0, 3)) if finished else (None, None)
+        halftime = ((min(home_goals, rng.randint(0, 2)), min(away_goals, rng.randint(0, 2)))
+                    if finished else (None, None))
+
+        return {
+            'fixture': {
+                'id': fixture_id,
+                'referee': f"Referee {rng.randint(1, 40)}",
+                'timezone': 'UTC',
+                'date': kickoff.isoformat(),
+                'timestamp': int(kickoff.timestamp()),
+                'venue': {'id': home_id, 'name': f"Stadium {home_id}", 'city': league['country']},
+                'status': ({'long': 'Match Finished', 'short': 'FT', 'elapsed': 90} if finished
+                           else {'long': 'Not Started', 'short': 'NS', 'elapsed': None})
+            },
+            'league': {
+                'id': league_id, 'name': league['name'], 'country': league['country'],
+                'season': self.season_of(day), 'round': f"Regular Season - {day.isocalendar()[1]}"
+            },
+            'teams': {
+                'home': {'id': home_id, 'name': f"{league['name']} Team {home_id}"},
+                'away': {'id': away_id, 'name': f"{league['name']} Team {away_id}"}
+            },
+            'goals': {'home': home_goals, 'away': away_goals},
+            'score': {
+                'halftime': {'home': halftime[0], 'away': halftime[1]},
+                'fulltime': {'home': home_goals, 'away': away_goals}
+            }
+        }
+
+    def league_day_fixtures(self, league_id: int, day: date) -> List[Dict]:
+        return [self.fixture(self.fixture_id(league_id, day, slot)) for slot in range(self.fixtures_per_day)]
+
+    def fixtures(self, params: Dict[str, str]) -> List[Dict]:
+        if 'id' in params:
+            fixture = self.fixture(int(params['id']))
+            return [fixture] if fixture else []
+
+        league_ids = [int(params['league'])] if 'league' in params else list(self.leagues_by_id)
+        league_ids = [league_id for league_id in league_ids if league_id in self.leagues_by_id]
+        season = int(params['season']) if 'season' in params else None
+
+        if 'date' in params:
+            days = [date.fromisoformat(params['date'])]
+        elif 'from' in params and 'to' in params:
+            start, end = date.fromisoformat(params['from']), date.fromisoformat(params['to'])
+            days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        elif 'last' in params:
+            # Derniers matchs joués, du plus récent au plus ancien
+            days = [self.today - timedelta(days=i) for i in range(1, int(params['last']) + 1)]
+        else:
+            days = []
+
+        if season is not None:
+            days = [day for day in days if self.season_of(day) == season]
+
+        fixtures = [fixture for day in days for league_id in league_ids
+                    for fixture in self.league_day_fixtures(league_id, day)]
+        if params.get('status'):
+            statuses = set(params['status'].split('-'))
+            fixtures = [f for f in fixtures if f['fixture']['status']['short'] in statuses]
+        if 'last' in params:
+            fixtures = fixtures[:int(params['last'])]
+        return fixtures
+
+    # --- Statistiques et joueurs ---
+
+    def statistics(self, fixture_id: int) -> List[Dict]:
+        fixture = self.fixture(fixture_id)
+        if fixture is None or fixture['fixture']['status']['short'] != 'FT':
+            return []
+        rng = self._rng('statistics', fixture_id)
+        home_possession = rng.randint(35, 65)
+        response = []
+        for side, possession in (('home', home_possession), ('away', 100 - home_possession)):
+            statistics = []
+            for stat_type in STAT_TYPES:
+                if stat_type == 'Ball Possession':
+                    value = f"{possession}%"
+                elif stat_type == 'Passes %':
+                    value = f"{rng.randint(65, 92)}%"
+                elif stat_type in ('Total passes', 'Passes accurate'):
+                    value = rng.randint(250, 650)
+                else:
+                    value = rng.randint(0, 15)
+                statistics.append({'type': stat_type, 'value': value})
+            response.append({'team': fixture['teams'][side], 'statistics': statistics})
+        return response
+
+    def players(self, fixture_id: int) -> List[Dict]:
+        fixture = self.fixture(fixture_id)
+        if fixture is None or fixture['fixture']['status']['short'] != 'FT':
+            return []
+        rng = self._rng('players', fixture_id)
+        response = []
+        for side in ('home', 'away'):
+            team = fixture['teams'][side]
+            players = []
+            for number in range(1, 15):
+                substitute = number > 11
+                players.append({
+                    'player': {'id': team['id'] * 100 + number, 'name': f"Player {team['id']}-{number}"},
+                    'statistics': [{
+                        'games': {'minutes': rng.randint(1, 30) if substitute else 90, 'number': number,
+                                  'position': 'G' if number == 1 else rng.choice(['D', 'M', 'F']),
+                                  'rating': f"{rng.uniform(5.5, 8.5):.1f}", 'captain': number == 10,
+                                  'substitute': substitute},
+                        'offsides': None,
+                        'shots': {'total': rng.randint(0, 4), 'on': rng.randint(0, 2)},
+                        'goals': {'total': rng.choice([None, None, None, 1]), 'conceded': 0,
+                                  'assists': None, 'saves': None},
+                        'passes': {'total': rng.randint(10, 80), 'key': rng.randint(0, 3),
+                                   'accuracy': str(rng.randint(60, 95))},
+                        'tackles': {'total': rng.randint(0, 5), 'blocks': None, 'interceptions': rng.randint(0, 3)},
+                        'duels': {'total': rng.randint(0, 15), 'won': rng.randint(0, 8)},
+                        'dribbles': {'attempts': rng.randint(0, 5), 'success': rng.randint(0, 3), 'past': None},
+                        'fouls': {'drawn': rng.randint(0, 3), 'committed': rng.randint(0, 3)},
+                        'cards': {'yellow': 0, 'red': 0},
+                        'penalty': {'won': None, 'commited': None, 'scored': 0, 'missed': 0, 'saved': None}
+                    }]
+                })
+            response.append({'team': team, 'players': players})
+        return response
+
+    # --- Cotes ---
+
+    def fixture_odds(self, fixture_id: int) -> Optional[Dict]:
+        fixture = self.fixture(fixture_id)
+        if fixture is None:
+            return None
+        rng = self._rng('odds', fixture_id)
+        bookmakers = []
+        for bookmaker_id, bookmaker_name in BOOKMAKERS:
+            bets = [{'id': bet_id, 'name': bet_name,
+                     'values': [{'value': value, 'odd': f"{rng.uniform(1.05, 6.0):.2f}"} for value in values]}
+                    for bet_id, bet_name, values in BETS]
+            bookmakers.append({'id': bookmaker_id, 'name': bookmaker_name, 'bets': bets})
+        return {
+            'league': fixture['league'],
+            'fixture': {'id': fixture_id, 'timezone': 'UTC', 'date': fixture['fixture']['date'],
+                        'timestamp': fixture['fixture']['timestamp']},
+            'update': fixture['fixture']['date'],
+            'bookmakers': bookmakers
+        }
+
+    def odds(self, params: Dict[str, str]) -> List[Dict]:
+        if 'fixture' in params:
+            entry = self.fixture_odds(int(params['fixture']))
+            return [entry] if entry else []
+        fixture_params = {k: v for k, v in params.items() if k in ('league', 'season', 'date')}
+        if 'date' not in fixture_params:
+            return []
+        return [self.fixture_odds(f['fixture']['id']) for f in self.fixtures(fixture_params)]
+
+
+class StubApiServer:
+    """
+    Serveur imitant l'API-Football, lancé dans un thread en arrière-plan.
+    `url` donne l'adresse de base à passer aux collecteurs (ex: http://127.0.0.1:8080/v3).
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0,
+                 latency_jitter_ms: float = 0, rate_limit: Optional[int] = None,
+                 daily_quota: Optional[int] = None, error_rate: float = 0.0,
+                 recordings: Optional[str] = None, seed: int = 0, fixtures_per_day: int = 2):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.rate_limit = rate_limit
+        self.daily_quota = daily_quota
+        self.error_rate = error_rate
+        self.recordings = ResponseCache(recordings) if recordings else None
+        self.data = SyntheticData(seed=seed, fixtures_per_day=fixtures_per_day)
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()
+        self.requests_served = 0
+        self.stats = Counter()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    # --- Politique de débit et d'erreurs ---
+
+    def _admit(self) -> Tuple[int, Dict[str, str]]:
+        """Décide du statut HTTP de la requête et calcule les en-têtes de quota."""
+        headers = {}
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+
+            if self.rate_limit is not None and len(self._window) >= self.rate_limit:
+                retry_after = max(1, int(60 - (now - self._window[0])) + 1)
+                headers.update({'x-ratelimit-limit': str(self.rate_limit), 'x-ratelimit-remaining': '0',
+                                'Retry-After': str(retry_after)})
+                self.stats['rate_limited'] += 1
+                return 429, headers
+
+            if self.daily_quota is not None and self.requests_served >= self.daily_quota:
+                headers.update({'x-ratelimit-requests-limit': str(self.daily_quota),
+                                'x-ratelimit-requests-remaining': '0'})
+                self.stats['quota_exceeded'] += 1
+                return 429, headers
+
+            self._window.append(now)
+            self.requests_served += 1
+            if self.rate_limit is not None:
+                headers.update({'x-ratelimit-limit': str(self.rate_limit),
+                                'x-ratelimit-remaining': str(self.rate_limit - len(self._window))})
+            if self.daily_quota is not None:
+                headers.update({'x-ratelimit-requests-limit': str(self.daily_quota),
+                                'x-ratelimit-requests-remaining': str(self.daily_quota - self.requests_served)})
+
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.stats['errors_injected'] += 1
+                return 500, headers
+        return 200, headers
+
+    def _latency(self) -> float:
+        jitter = random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms) if self.latency_jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    # --- Réponses ---
+
+    def build_response(self, endpoint: str, params: Dict[str, str]) -> Dict:
+        """Réponse enregistrée si disponible, sinon synthétique, dans l'enveloppe de l'API."""
+        if self.recordings is not None:
+            recorded = self.recordings.get(endpoint, params)
+            if recorded is not None:
+                self.stats['recorded'] += 1
+                return recorded
+
+        if endpoint == 'fixtures':
+            response = self.data.fixtures(params)
+        elif endpoint == 'fixtures/statistics':
+            response = self.data.statistics(int(params['fixture']))
+        elif endpoint == 'fixtures/players':
+            response = self.data.players(int(params['fixture']))
+        else:
+            response = self.data.odds(params)
+
+        current, total = 1, 1
+        if endpoint == 'odds' and 'fixture' not in params:
+            total = max(1, -(-len(response) // ODDS_PAGE_SIZE))
+            current = min(max(1, int(params.get('page', 1))), total)
+            response = response[(current - 1) * ODDS_PAGE_SIZE:current * ODDS_PAGE_SIZE]
+
+        return {
+            'get': endpoint,
+            'parameters': params,
+            'errors': [],
+            'results': len(response),
+            'paging': {'current': current, 'total': total},
+            'response': response
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                path = url.path.strip('/')
+                if path == '_stats':
+                    return self._send(200, dict(server.stats, requests_served=server.requests_served))
+
+                endpoint = path[len('v3/'):] if path.startswith('v3/') else path
+                if endpoint not in ENDPOINTS:
+                    return self._send(404, {'errors': {'endpoint': f"Endpoint inconnu: {endpoint}"}})
+
+                time.sleep(server._latency())
+                status, headers = server._admit()
+                if status == 429:
+                    return self._send(429, {'message': 'Too many requests'}, headers)
+                if status == 500:
+                    return self._send(500, {'message': 'Erreur injectée'}, headers)
+
+                params = dict(parse_qsl(url.query))
+                try:
+                    payload = server.build_response(endpoint, params)
+                except (KeyError, ValueError) as e:
+                    payload = {'get': endpoint, 'parameters': params, 'errors': {'params': str(e)},
+                               'results': 0, 'paging': {'current': 1, 'total': 1}, 'response': []}
+                with server._lock:
+                    server.stats[endpoint] += 1
+                self._send(200, payload, headers)
+
+            def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    # --- Cycle de vie ---
+
+    def start(self) -> 'StubApiServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.recordings is not None:
+            self.recordings.close()
+
+    def __enter__(self) -> 'StubApiServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    """Point d'entrée : lance le serveur au premier plan."""
+    parser = argparse.ArgumentParser(description="Serveur local imitant l'API-Football.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latence ajoutée à chaque réponse.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0, help="Variation aléatoire de la latence.")
+    parser.add_argument("--rate-limit", type=int, help="Requêtes autorisées par minute (en-têtes x-ratelimit-*).")
+    parser.add_argument("--daily-quota", type=int, help="Requêtes autorisées au total.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 500 injectées.")
+    parser.add_argument("--recordings", help="Cache SQLite du client dont les réponses sont rejouées.")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des données synthétiques.")
+    parser.add_argument("--fixtures-per-day", type=int, default=2, help="Matchs générés par ligue et par jour.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = StubApiServer(host=args.host, port=args.port, latency_ms=args.latency_ms,
+                           latency_jitter_ms=args.latency_jitter_ms, rate_limit=args.rate_limit,
+                           daily_quota=args.daily_quota, error_rate=args.error_rate,
+                           recordings=args.recordings, seed=args.seed, fixtures_per_day=args.fixtures_per_day)
+    logger.info(f"🧪 API-Football simulée sur {server.url} (statistiques: {server.url[:-3]}/_stats)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"📊 Requêtes servies: {dict(server.stats)}")
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
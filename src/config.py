@@ -1,14 +1,107 @@
 # Configuration for the Match Analyzer Tool
+import os
 
 # --- File Paths ---
 ODDS_DATA_DIR = 'data/odds/raw_data'
+# Partitioned Parquet store of the historical odds (league / fixture month).
+ODDS_STORE_DIR = 'data/odds/store'
+# Keep writing data/odds/raw_data/{league}_complete_odds.csv alongside the store
+# (done by the compaction step, python -m src.data_processing.odds_compaction).
+ODDS_EXPORT_CSV = True
+# Rolling data window of the collectors (matches, players, odds), in days.
+# Expired months are dropped whole; raise it (e.g. 3 * 365) to keep several seasons.
+DATA_RETENTION_DAYS = 365
+# Odds of fixtures older than this are dropped when the store is compacted.
+ODDS_RETENTION_DAYS = DATA_RETENTION_DAYS
+# Memory-mapped bookmaker-level odds cube (fixture x market x bookmaker), built by
+# python -m src.data_processing.odds_cube. Only these bet types are kept (None = all,
+# which makes the cube very sparse because of the exact-score and player markets).
+ODDS_CUBE_DIR = 'data/odds/cube'
+ODDS_CUBE_BET_TYPES = ['Match Winner', 'Both Teams Score', 'Goals Over/Under', 'Double Chance']
 MATCH_DATA_DIR = 'data/matches'
+# Player stats, lineups and rosters, stored per league as typed zstd Parquet
+# (src/data_processing/player_store.py). Set PLAYERS_EXPORT_CSV to keep writing the
+# former {league}_players.csv / _lineups.csv / _rosters.csv files as well.
+PLAYERS_DATA_DIR = 'data/players'
+PLAYERS_EXPORT_CSV = False
 PROCESSED_DATA_PATH = 'data/analysis_data.parquet'
+# Historical feature matrices of the prediction workflows, saved with the state of the
+# odds files they were built from (only fixtures whose odds changed are recomputed).
+FEATURE_MATRIX_CACHE_DIR = 'data/cache/feature_matrix'
+# Catalog of the data files (rows, date range, size, schema fingerprint, last writer),
+# updated by every writer and read by the status commands
+# (python -m src.data_processing.catalog). Only files under its folder are listed.
+DATA_CATALOG_PATH = 'data/catalog.json'
+# Optional SQLite warehouse (src/data_processing/warehouse.py) holding matches, odds,
+# players and predictions in indexed tables. Disabled unless FOOTBALL_WAREHOUSE_PATH
+# is set (e.g. data/warehouse.sqlite); the CSV files are written either way.
+WAREHOUSE_PATH = os.environ.get('FOOTBALL_WAREHOUSE_PATH') or None
 
 # --- API Configuration ---
 # The RapidAPI key should be stored as an environment variable or a secret.
 RAPIDAPI_KEY = None
 
+# API-Football endpoint shared by every collector and workflow.
+# Set the API_FOOTBALL_BASE_URL environment variable to point every collector at
+# another server, e.g. the local stand-in (python -m src.api.stub_server).
+API_FOOTBALL_HOST = 'api-football-v1.p.rapidapi.com'
+API_FOOTBALL_BASE_URL = os.environ.get('API_FOOTBALL_BASE_URL') or f'https://{API_FOOTBALL_HOST}/v3'
+
+# Request policy of the shared API client (src/api/client.py).
+API_TIMEOUT = 30          # seconds per HTTP request
+API_MAX_RETRIES = 3       # attempts per request before giving up
+API_RETRY_DELAY = 2       # base delay of the exponential backoff between attempts
+API_POOL_SIZE = 10        # keep-alive connections kept open per host
+
+# Requests per second allowed by our RapidAPI plan (token bucket shared by all calls).
+# This is only the starting rate: the client then follows the per-minute quota
+# announced in the x-ratelimit-* response headers.
+API_REQUESTS_PER_SECOND = 5
+API_MIN_REQUESTS_PER_SECOND = 0.2
+# Fraction of the per-minute quota below which the client starts slowing down.
+API_RATE_LIMIT_RESERVE = 0.1
+# Daily quota left under which a warning is logged.
+API_DAILY_QUOTA_WARNING = 500
+
+# Exponential backoff (with jitter) for 429 / 5xx / network errors, in seconds.
+API_BACKOFF_MAX = 60
+
+# Outage handling: after API_BREAKER_FAILURE_THRESHOLD consecutive failures an
+# endpoint is skipped for API_BREAKER_RESET_TIMEOUT seconds, and a run may spend at
+# most API_RETRY_BUDGET retries in total. Abandoned requests are written to
+# API_RETRY_QUEUE_PATH and picked up by the collectors on their next run.
+API_BREAKER_FAILURE_THRESHOLD = 5
+API_BREAKER_RESET_TIMEOUT = 120
+API_RETRY_BUDGET = 50
+API_RETRY_QUEUE_PATH = 'data/cache/retry_queue.json'
+API_RETRY_QUEUE_MAX_AGE_DAYS = 30
+
+# Identical requests issued within this many seconds in the same process share
+# one network call (single-flight layer of the API client). 0 keeps only the
+# coalescing of requests that are in flight at the same time.
+API_COALESCE_WINDOW = 300
+
+# Number of fixtures whose odds are fetched in parallel by the daily workflow.
+ODDS_FETCH_WORKERS = 8
+
+# Odds maintenance fetches odds by league/season/date (paginated) instead of one
+# call per fixture. ODDS_BULK_MAX_PAGES guards against runaway pagination.
+ODDS_BULK_INGESTION = True
+ODDS_BULK_MAX_PAGES = 50
+
+# Persistent API response cache (src/api/cache.py). Set to None to disable it.
+API_CACHE_PATH = 'data/cache/api_responses.sqlite'
+
+# Cache lifetime in seconds for data that can still change.
+# Finished fixtures (stats, players, odds, results) are cached forever.
+API_CACHE_TTLS = {
+    'odds': 10 * 60,                  # pre-match odds move quickly
+    'fixtures': 15 * 60,              # upcoming or live fixtures
+    'fixtures/statistics': 5 * 60,    # stats of a fixture still being played
+    'fixtures/players': 5 * 60,
+    'default': 60 * 60
+}
+
 # --- Analysis Parameters ---
 
 # The list of key structural bet types to use for the similarity analysis.
@@ -26,6 +119,12 @@ KEY_BET_TYPES = [
 # For example, 0.10 means a historic odd of 1.50 is a match for a target odd of 1.40 to 1.60.
 SIMILARITY_THRESHOLD = 0.10
 
+# Nearest-neighbour search of the analyzer (`--analyze`): number of closest historical
+# matches kept (None keeps every match within the radius) and radius on the mean
+# absolute odds difference over the common bets (None disables the radius).
+NEAREST_MATCHES_K = None
+NEAREST_MATCHES_RADIUS = SIMILARITY_THRESHOLD
+
 # The minimum number of bookmakers that must have odds on a market for it to be included.
 MIN_BOOKMAKERS_THRESHOLD = 3
 
@@ -1,5 +1,6 @@
 import pandas as pd
-import os
+
+from src.data_processing.warehouse import load_matches
 
 
 def create_daily_elo_csv(
@@ -37,6 +38,9 @@ def create_historical_matches_csv(
 ):
     """Combine all historical match data into a single CSV file.
 
+    Reads the warehouse ``matches`` table when the warehouse is enabled,
+    otherwise the CSV files of ``matches_dir``.
+
     Parameters
     ----------
     matches_dir:
@@ -45,21 +49,12 @@ def create_historical_matches_csv(
         Destination path for the combined CSV.
     """
     try:
-        if not os.path.isdir(matches_dir):
-            print(f"Error: Directory '{matches_dir}' not found.")
-            return
+        combined_df = load_matches(matches_dir=matches_dir)
 
-        all_matches_files = [
-            os.path.join(matches_dir, f) for f in os.listdir(matches_dir) if f.endswith(".csv")
-        ]
-
-        if not all_matches_files:
-            print(f"No CSV files found in '{matches_dir}'.")
+        if combined_df.empty:
+            print(f"No match data found in the warehouse or in '{matches_dir}'.")
             return
 
-        df_list = [pd.read_csv(file) for file in all_matches_files]
-        combined_df = pd.concat(df_list, ignore_index=True)
-
         combined_df.to_csv(output_path, index=False)
         print(f"Successfully created {output_path}")
 
@@ -0,0 +1,306 @@
+"""
+Catalogue des jeux de données.
+
+Rôle :
+- Un petit fichier JSON (`DATA_CATALOG_PATH`) décrit chaque fichier de `data/` :
+  nombre de lignes, première et dernière date, taille en octets, empreinte du
+  schéma (noms et types des colonnes), dernier programme écrivain et date d'écriture.
+- Les écrivains (collecteurs, store de cotes, stockage joueurs, historiques de
+  prédictions) le mettent à jour juste après chaque écriture, à partir du DataFrame
+  qu'ils viennent d'écrire : aucune relecture du fichier.
+- Les commandes de statut et les contrôles de fraîcheur lisent le catalogue au lieu
+  de parcourir les fichiers. Une entrée dont la taille ne correspond plus au fichier
+  (modifié hors des écrivains, par exemple après un `git pull`) est recalculée à la
+  demande ; `--rebuild` recalcule tout.
+
+Usage : python -m src.data_processing.catalog [--rebuild] [--stale-days N]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.config import DATA_CATALOG_PATH
+from src.data_processing.file_io import atomic_write, file_lock
+
+logger = logging.getLogger(__name__)
+
+# Colonne de date utilisée pour la période couverte (la première présente)
+DATE_COLUMNS = ['date', 'match_date', 'fixture_date']
+
+# Verrous et fichiers temporaires des écrivains, jamais catalogués
+IGNORED_SUFFIXES = ('.lock', '.tmp')
+
+# Fichiers décrits par `--rebuild` (relatifs au dossier du catalogue)
+DATASET_PATTERNS = [
+    'matches/*.csv',
+    'odds/raw_data/*.csv',
+    'odds/store/league=*',
+    'players/*/*.parquet',
+    'players/*/*.csv',
+    'predictions/*.csv',
+]
+
+
+def _date_column(df: pd.DataFrame, date_column: Optional[str]) -> Optional[str]:
+    if date_column is not None:
+        return date_column if date_column in df.columns else None
+    return next((column for column in DATE_COLUMNS if column in df.columns), None)
+
+
+def _date_text(value) -> Optional[str]:
+    if value is None or pd.isna(value):
+        return None
+    return value.isoformat() if isinstance(value, (pd.Timestamp, datetime)) else str(value)
+
+
+def _date_range(values: pd.Series):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = pd.Series(values.cat.remove_unused_categories().cat.categories)
+    values = values.dropna()
+    if values.empty:
+        return None, None
+    try:
+        return _date_text(values.min()), _date_text(values.max())
+    except TypeError:
+        # Types mélangés : comparaison sur le texte (dates ISO)
+        values = values.astype(str)
+        return values.min(), values.max()
+
+
+def _column_kind(dtype) -> str:
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'category'
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    return 'string'
+
+
+def schema_hash(df: pd.DataFrame) -> str:
+    """Empreinte courte des noms et familles de types des colonnes."""
+    schema = ','.join(f"{column}:{_column_kind(dtype)}" for column, dtype in df.dtypes.items())
+    return hashlib.sha1(schema.encode('utf-8')).hexdigest()[:12]
+
+
+def frame_stats(df: pd.DataFrame, date_column: Optional[str] = None) -> Dict:
+    """Lignes, période et empreinte du schéma d'un DataFrame."""
+    date_column = _date_column(df, date_column)
+    min_date, max_date = _date_range(df[date_column]) if date_column else (None, None)
+    return {'rows': len(df), 'min_date': min_date, 'max_date': max_date, 'schema_hash': schema_hash(df)}
+
+
+def parquet_stats(files: List[str], date_column: Optional[str] = None) -> Dict:
+    """Mêmes informations lues dans les métadonnées Parquet (statistiques des groupes de lignes)."""
+    # Import local : les collecteurs de matchs, qui n'écrivent que des CSV, n'ont pas besoin de pyarrow
+    import pyarrow.parquet as pq
+
+    stats = {'rows': 0, 'min_date': None, 'max_date': None, 'schema_hash': None}
+    for path in files:
+        parquet = pq.ParquetFile(path)
+        if stats['schema_hash'] is None:
+            stats['schema_hash'] = schema_hash(parquet.schema_arrow.empty_table().to_pandas())
+        stats['rows'] += parquet.metadata.num_rows
+        names = parquet.schema_arrow.names
+        column = date_column if date_column in names else next((c for c in DATE_COLUMNS if c in names), None)
+        if column is None:
+            continue
+        for i in range(parquet.metadata.num_row_groups):
+            row_group = parquet.metadata.row_group(i)
+            chunk = next(row_group.column(j) for j in range(row_group.num_columns)
+                         if row_group.column(j).path_in_schema == column)
+            if chunk.statistics is None or not chunk.statistics.has_min_max:
+                continue
+            low, high = _date_text(chunk.statistics.min), _date_text(chunk.statistics.max)
+            stats['min_date'] = low if stats['min_date'] is None else min(stats['min_date'], low)
+            stats['max_date'] = high if stats['max_date'] is None else max(stats['max_date'], high)
+    return stats
+
+
+def _parquet_files(path: str) -> List[str]:
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '**', '*.parquet'), recursive=True))
+    return [path]
+
+
+def _size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(f) for f in glob.glob(os.path.join(path, '**', '*'), recursive=True)
+                   if os.path.isfile(f) and not f.endswith(IGNORED_SUFFIXES))
+    return os.path.getsize(path)
+
+
+def describe_file(path: str) -> Dict:
+    """Relit un fichier (ou un dossier de Parquet) pour le décrire ; utilisé quand le catalogue est périmé."""
+    if os.path.isdir(path) or path.endswith('.parquet'):
+        return parquet_stats(_parquet_files(path))
+    return frame_stats(pd.read_csv(path, low_memory=False))
+
+
+def _writer() -> str:
+    """Programme en cours (`python -m <module>` ou script)."""
+    spec = getattr(sys.modules.get('__main__'), '__spec__', None)
+    if spec is not None and spec.name:
+        return spec.name
+    return os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+
+
+class DataCatalog:
+    """Catalogue JSON des fichiers situés sous le dossier du catalogue."""
+
+    def __init__(self, path: str = DATA_CATALOG_PATH):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+
+    def key(self, path: str) -> Optional[str]:
+        """Chemin relatif au dossier du catalogue, ou None pour un fichier hors de `data/`."""
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        if relative.startswith(os.pardir):
+            return None
+        return relative.replace(os.sep, '/')
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save(self, entries: Dict[str, Dict]) -> None:
+        with atomic_write(self.path) as f:
+            json.dump(entries, f, indent=1, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+
+    def entries(self) -> Dict[str, Dict]:
+        """Toutes les entrées, sans vérification."""
+        with file_lock(self.path):
+            return self._load()
+
+    def record(self, path: str, stats: Dict, append: bool = False) -> None:
+        """
+        Enregistre la description d'un fichier qui vient d'être écrit.
+        Avec `append=True`, `stats` décrit seulement les lignes ajoutées et s'ajoute à l'entrée existante.
+        """
+        key = self.key(path)
+        if key is None:
+            return
+        entry = dict(stats)
+        with file_lock(self.path):
+            entries = self._load()
+            previous = entries.get(key)
+            if append and previous is not None:
+                entry['rows'] = previous['rows'] + stats['rows']
+                for name, pick in (('min_date', min), ('max_date', max)):
+                    values = [value for value in (previous.get(name), stats.get(name)) if value is not None]
+                    entry[name] = pick(values) if values else None
+                entry['schema_hash'] = previous.get('schema_hash') or stats.get('schema_hash')
+            entry['bytes'] = _size(path)
+            entry['writer'] = _writer()
+            entry['updated_at'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            entries[key] = entry
+            self._save(entries)
+
+    def refresh(self, paths: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        Entrées des fichiers demandés (tous ceux du catalogue par défaut), recalculées
+        quand le fichier a changé de taille depuis son enregistrement ; les fichiers
+        disparus sont retirés.
+        """
+        with file_lock(self.path):
+            entries = self._load()
+            keys = list(entries) if paths is None else [k for k in map(self.key, paths) if k is not None]
+            changed, result = False, {}
+            for key in keys:
+                path = os.path.join(self.root, key)
+                entry = entries.get(key)
+                if not os.path.exists(path):
+                    changed |= entries.pop(key, None) is not None
+                    continue
+                if entry is None or entry.get('bytes') != _size(path):
+                    entry = {**describe_file(path), 'bytes': _size(path), 'writer': 'catalog',
+                             'updated_at': datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+                                                   .strftime('%Y-%m-%dT%H:%M:%SZ')}
+                    entries[key] = entry
+                    changed = True
+                result[key] = entry
+            if changed:
+                self._save(entries)
+            return result
+
+    def datasets(self, pattern: str) -> Dict[str, Dict]:
+        """Entrées vérifiées des fichiers correspondant à un motif relatif au dossier du catalogue."""
+        return self.refresh(path for path in sorted(glob.glob(os.path.join(self.root, pattern)))
+                            if not path.endswith(IGNORED_SUFFIXES))
+
+    def rebuild(self) -> Dict[str, Dict]:
+        """Recalcule toutes les entrées des fichiers de `DATASET_PATTERNS`."""
+        with file_lock(self.path):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            entries = {}
+            for pattern in DATASET_PATTERNS:
+                entries.update(self.datasets(pattern))
+            return entries
+
+    def stale(self, max_age_days: float, paths: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Entrées dont la dernière écriture remonte à plus de `max_age_days` jours."""
+        now = datetime.now(timezone.utc)
+        return {key: entry for key, entry in self.refresh(paths).items()
+                if (now - datetime.strptime(entry['updated_at'], '%Y-%m-%dT%H:%M:%SZ')
+                    .replace(tzinfo=timezone.utc)).total_seconds() > max_age_days * 86400}
+
+
+def get_catalog() -> DataCatalog:
+    return DataCatalog(DATA_CATALOG_PATH)
+
+
+def record_frame(path: str, df: pd.DataFrame, date_column: Optional[str] = None, append: bool = False) -> None:
+    """Met à jour le catalogue après l'écriture de `df` dans `path` (lignes ajoutées si `append`)."""
+    try:
+        get_catalog().record(path, frame_stats(df, date_column), append=append)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Catalogue non mis à jour pour {path}: {e}")
+
+
+def record_parquet(path: str, date_column: Optional[str] = None) -> None:
+    """Met à jour le catalogue d'un fichier ou dossier Parquet à partir de ses métadonnées."""
+    try:
+        get_catalog().record(path, parquet_stats(_parquet_files(path), date_column))
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Catalogue non mis à jour pour {path}: {e}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Affiche (ou recalcule) le catalogue des jeux de données.")
+    parser.add_argument("--rebuild", action="store_true", help="Relit tous les fichiers de données.")
+    parser.add_argument("--stale-days", type=float, help="Ne liste que les fichiers non écrits depuis N jours.")
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    if args.rebuild:
+        entries = catalog.rebuild()
+    elif args.stale_days is not None:
+        entries = catalog.stale(args.stale_days)
+    else:
+        entries = catalog.refresh()
+    for key, entry in sorted(entries.items()):
+        logger.info(f"📁 {key}: {entry['rows']} lignes, {entry['min_date']} → {entry['max_date']}, "
+                    f"{entry['bytes'] / 1e6:.2f} Mo, schéma {entry['schema_hash']}, "
+                    f"{entry['writer']} ({entry['updated_at']})")
+    logger.info(f"📚 {len(entries)} fichiers dans {catalog.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Écritures sûres des fichiers de données.
+
+Rôle :
+- `atomic_write` : écrit dans un fichier temporaire du même dossier puis le met en
+  place avec `os.replace` ; un lecteur voit l'ancien fichier ou le nouveau, jamais
+  un fichier à moitié écrit, et une erreur laisse l'ancien fichier intact.
+- `file_lock` : verrou exclusif par fichier de sortie (`<fichier>.lock`, `flock`),
+  partagé entre processus. Il couvre toute une séquence lecture → fusion → écriture,
+  pour que deux collecteurs lancés en parallèle ne perdent pas les lignes de l'autre.
+  Le verrou est réentrant dans un même processus, et plusieurs fichiers sont
+  verrouillés dans un ordre fixe pour éviter les interblocages.
+- `write_csv` : les deux à la fois, pour les sauvegardes `DataFrame.to_csv`.
+
+Sans `fcntl` (Windows), les écritures restent atomiques mais ne sont pas verrouillées.
+"""
+import os
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, Tuple
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+LOCK_SUFFIX = '.lock'
+
+_held: Dict[str, Tuple[int, int]] = {}  # chemin -> (descripteur, profondeur)
+_held_lock = threading.RLock()
+
+
+def lock_path(path: str) -> str:
+    return os.path.abspath(path) + LOCK_SUFFIX
+
+
+@contextmanager
+def _single_lock(path: str) -> Iterator[None]:
+    key = lock_path(path)
+    with _held_lock:
+        if key in _held:
+            fd, depth = _held[key]
+            _held[key] = (fd, depth + 1)
+            reentrant = True
+        else:
+            reentrant = False
+    if not reentrant:
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        fd = os.open(key, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        with _held_lock:
+            _held[key] = (fd, 1)
+    try:
+        yield
+    finally:
+        with _held_lock:
+            fd, depth = _held[key]
+            if depth > 1:
+                _held[key] = (fd, depth - 1)
+            else:
+                del _held[key]
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+@contextmanager
+def file_lock(*paths: str) -> Iterator[None]:
+    """Verrouille les fichiers donnés (dans l'ordre de leurs chemins absolus)."""
+    with ExitStack() as stack:
+        for path in sorted({os.path.abspath(path) for path in paths}):
+            stack.enter_context(_single_lock(path))
+        yield
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: str = 'utf-8') -> Iterator:
+    """Ouvre un fichier temporaire qui remplace `path` à la sortie du bloc (sans erreur)."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with open(fd, mode, encoding=None if 'b' in mode else encoding, newline=None if 'b' in mode else '') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_csv(df: pd.DataFrame, path: str, **kwargs) -> None:
+    """`df.to_csv(path)` verrouillé et atomique."""
+    kwargs.setdefault('index', False)
+    encoding = kwargs.pop('encoding', 'utf-8')
+    with file_lock(path), atomic_write(path, encoding=encoding) as f:
+        df.to_csv(f, **kwargs)
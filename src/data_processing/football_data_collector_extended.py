@@ -13,14 +13,16 @@ Rôle :
 Note importante : La limite de collecte aux 365 derniers jours a été retirée
 pour permettre une analyse historique complète.
 """
-import requests
 import pandas as pd
 import os
-import time
 from datetime import datetime, date, timedelta
 import logging
 from typing import Dict, List, Optional
 from src.config import ALL_LEAGUES, SEASONS_TO_COLLECT
+from src.api.client import get_client
+from src.data_processing.catalog import record_frame
+from src.data_processing.file_io import write_csv
+from src.data_processing.warehouse import sync_league
 
 # Configuration du logging pour debug
 os.makedirs('logs', exist_ok=True)
@@ -45,11 +47,7 @@ class FootballDataCollectorExtended:
         Initialise le collecteur avec la clé RapidAPI.
         """
         self.api_key = rapidapi_key
-        self.base_url = "https://api-football-v1.p.rapidapi.com/v3"
-        self.headers = {
-            'x-rapidapi-host': 'api-football-v1.p.rapidapi.com',
-            'x-rapidapi-key': self.api_key
-        }
+        self.api_client = get_client(self.api_key)
         
         # Utilisation de la configuration centralisée
         self.all_leagues = ALL_LEAGUES
@@ -64,9 +62,10 @@ class FootballDataCollectorExtended:
         os.makedirs(self.matches_folder, exist_ok=True)
         logger.info(f"Dossier pour les matchs assuré d'exister: '{self.matches_folder}'")
     
-    def make_api_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
+    def make_api_request(self, endpoint: str, params: Dict,
+                         fixture_status: Optional[str] = None) -> Optional[Dict]:
         """
-        Effectue une requête à l'API avec gestion d'erreurs
+        Effectue une requête à l'API via le client partagé
         
         Args:
             endpoint (str): Endpoint de l'API
@@ -75,34 +74,12 @@ class FootballDataCollectorExtended:
         Returns:
             Optional[Dict]: Réponse JSON ou None en cas d'erreur
         """
-        url = f"{self.base_url}/{endpoint}"
-        
-        try:
-            logger.info(f"Requête API: {endpoint} avec params: {params}")
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            # Vérification du statut HTTP
-            if response.status_code == 200:
-                data = response.json()
-                results_count = data.get('results', 0)
-                logger.info(f"Succès - {results_count} résultats récupérés")
-                
-                # Debug de la réponse si erreurs
-                if 'errors' in data and data['errors']:
-                    logger.warning(f"Erreurs API: {data['errors']}")
-                
-                return data
-            else:
-                logger.error(f"Erreur HTTP {response.status_code}: {response.text}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur de requête: {e}")
-            return None
-        except ValueError as e:
-            logger.error(f"Erreur de parsing JSON: {e}")
-            return None
-    
+        logger.info(f"Requête API: {endpoint} avec params: {params}")
+        data = self.api_client.get(endpoint, params, fixture_status=fixture_status)
+        if data is not None:
+            logger.info(f"Succès - {data.get('results', 0)} résultats récupérés")
+        return data
+
     def get_league_fixtures_multiple_seasons(self, league_id: int) -> List[Dict]:
         """
         Récupère tous les matchs d'une ligue pour les saisons 2024 et 2025
@@ -135,26 +112,24 @@ class FootballDataCollectorExtended:
                 all_fixtures.extend(season_fixtures)
             else:
                 logger.warning(f"❌ Saison {season}: Aucun match récupéré")
-            
-            # Pause entre les saisons pour respecter les limites d'API
-            time.sleep(1)
         
         logger.info(f"📊 Total des matchs collectés pour la ligue {league_id}: {len(all_fixtures)} matchs")
         
         return all_fixtures
     
-    def get_fixture_statistics(self, fixture_id: int) -> Optional[Dict]:
+    def get_fixture_statistics(self, fixture_id: int, fixture_status: Optional[str] = None) -> Optional[Dict]:
         """
         Récupère les statistiques détaillées d'un match
         
         Args:
             fixture_id (int): ID du match
+            fixture_status (Optional[str]): Statut court du match (ex: 'FT'), pour le cache
             
         Returns:
             Optional[Dict]: Statistiques du match ou None
         """
         params = {'fixture': fixture_id}
-        data = self.make_api_request('fixtures/statistics', params)
+        data = self.make_api_request('fixtures/statistics', params, fixture_status)
         
         if data and 'response' in data:
             return data['response']
@@ -314,7 +289,7 @@ class FootballDataCollectorExtended:
                 finished_matches += 1
                 logger.info(f"📊 Récupération des stats pour le match terminé {fixture_id}")
                 
-                stats = self.get_fixture_statistics(fixture_id)
+                stats = self.get_fixture_statistics(fixture_id, status)
                 
                 if stats:
                     # Ajout des statistiques au match_data
@@ -322,9 +297,6 @@ class FootballDataCollectorExtended:
                     logger.debug(f"✅ Stats ajoutées pour le match {fixture_id}")
                 else:
                     logger.warning(f"⚠️ Pas de stats disponibles pour le match {fixture_id}")
-                
-                # Pause pour éviter de surcharger l'API
-                time.sleep(0.5)
             else:
                 logger.debug(f"⏳ Match {fixture_id} non terminé (status: {status})")
             
@@ -361,8 +333,10 @@ class FootballDataCollectorExtended:
                 df = df.sort_values('date')
             
             # Sauvegarde
-            df.to_csv(filepath, index=False, encoding='utf-8')
+            write_csv(df, filepath)
             logger.info(f"💾 Données sauvegardées: {filepath} ({len(df)} lignes)")
+            record_frame(filepath, df, 'date')
+            sync_league('matches', league_code, df)
             
             # Affichage d'un aperçu
             logger.info(f"📋 Aperçu des colonnes: {len(df.columns)} colonnes")
@@ -398,10 +372,6 @@ class FootballDataCollectorExtended:
                     self.save_to_csv(df, league_code)
                     successful_collections += 1
                 
-                # Pause entre les ligues pour respecter les limites d'API
-                logger.info("⏱️ Pause de 5 secondes avant la prochaine ligue...")
-                time.sleep(5)
-                
             except Exception as e:
                 logger.error(f"❌ Erreur lors de la collecte de {league_code}: {e}")
                 continue
@@ -438,7 +408,8 @@ def main():
     collector = FootballDataCollectorExtended(RAPIDAPI_KEY)
     
     # Lancement de la collecte
-    collector.run_full_collection()
+    with collector.api_client.track_stage('Collecte des matchs'):
+        collector.run_full_collection()
 
 if __name__ == "__main__":
     main() 
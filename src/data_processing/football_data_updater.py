@@ -1,11 +1,16 @@
-import requests
 import pandas as pd
 import os
-import time
 from datetime import datetime, date, timedelta
 import logging
 from typing import Dict, List, Optional
 
+from src.api.client import get_client
+from src.config import DATA_RETENTION_DAYS
+from src.data_processing.catalog import record_frame
+from src.data_processing.file_io import file_lock, write_csv
+from src.data_processing.retention import drop_expired_months, retention_cutoff
+from src.data_processing.warehouse import sync_league
+
 # Configuration du logging pour la mise à jour
 os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
@@ -21,7 +26,7 @@ logger = logging.getLogger(__name__)
 class FootballDataUpdater:
     """
     Mise à jour incrémentale des données football
-    Maintient une fenêtre glissante de 365 jours en ajoutant les nouveaux matchs
+    Maintient une fenêtre glissante de DATA_RETENTION_DAYS jours en ajoutant les nouveaux matchs
     et supprimant les anciens
     """
     
@@ -30,11 +35,7 @@ class FootballDataUpdater:
         Initialise le updater avec la clé RapidAPI
         """
         self.api_key = rapidapi_key
-        self.base_url = "https://api-football-v1.p.rapidapi.com/v3"
-        self.headers = {
-            'x-rapidapi-host': 'api-football-v1.p.rapidapi.com',
-            'x-rapidapi-key': self.api_key
-        }
+        self.api_client = get_client(self.api_key)
         
         # Configuration de toutes les ligues (Big 5 + nouvelles ligues)
         self.all_leagues = {
@@ -59,7 +60,7 @@ class FootballDataUpdater:
         
         # Configuration des dates
         self.today = datetime.now().date()
-        self.cutoff_date = self.today - timedelta(days=365)  # Date limite (365 jours)
+        self.cutoff_date = retention_cutoff(today=self.today)  # Date limite (DATA_RETENTION_DAYS)
         self.update_start_date = self.today - timedelta(days=14)  # Derniers 14 jours pour les mises à jour
         
         # Dossier de données
@@ -68,34 +69,11 @@ class FootballDataUpdater:
             os.makedirs(self.data_folder)
             logger.info(f"Dossier '{self.data_folder}' créé")
     
-    def make_api_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
-        """Effectue une requête à l'API avec gestion d'erreurs"""
-        url = f"{self.base_url}/{endpoint}"
-        
-        try:
-            logger.debug(f"Requête API: {endpoint} avec params: {params}")
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                results_count = data.get('results', 0)
-                logger.debug(f"Succès - {results_count} résultats récupérés")
-                
-                if 'errors' in data and data['errors']:
-                    logger.warning(f"Erreurs API: {data['errors']}")
-                
-                return data
-            else:
-                logger.error(f"Erreur HTTP {response.status_code}: {response.text}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur de requête: {e}")
-            return None
-        except ValueError as e:
-            logger.error(f"Erreur de parsing JSON: {e}")
-            return None
-    
+    def make_api_request(self, endpoint: str, params: Dict,
+                         fixture_status: Optional[str] = None) -> Optional[Dict]:
+        """Effectue une requête à l'API via le client partagé"""
+        return self.api_client.get(endpoint, params, fixture_status=fixture_status)
+
     def load_existing_data(self, league_code: str) -> pd.DataFrame:
         """
         Charge les données existantes d'une ligue depuis le fichier CSV
@@ -107,10 +85,9 @@ class FootballDataUpdater:
                 df = pd.read_csv(filepath)
                 logger.info(f"📂 Données existantes chargées pour {league_code}: {len(df)} matchs")
                 
-                # Conversion et normalisation de la colonne date
+                # Normalisation de la colonne date au format AAAA-MM-JJ (texte, sans conversion)
                 if 'date' in df.columns:
-                    # Convertir en datetime puis extraire seulement la date (sans timezone)
-                    df['date'] = pd.to_datetime(df['date'], utc=True).dt.date
+                    df['date'] = df['date'].str[:10]
                 
                 return df
             except Exception as e:
@@ -122,25 +99,19 @@ class FootballDataUpdater:
     
     def filter_by_date_range(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Filtre le DataFrame pour garder seulement les matchs des 365 derniers jours
+        Filtre le DataFrame pour garder seulement les matchs des DATA_RETENTION_DAYS derniers jours.
+        Les mois expirés sont supprimés en bloc, seul le mois frontière est filtré jour par jour.
         """
         if df.empty or 'date' not in df.columns:
             return df
         
-        # Conversion et normalisation des dates
         try:
-            # Convertir toutes les dates en format uniforme (date seulement)
-            df_copy = df.copy()
-            df_copy['date'] = pd.to_datetime(df_copy['date'], utc=True).dt.date
-            
-            # Filtrage
-            before_count = len(df_copy)
-            df_filtered = df_copy[df_copy['date'] >= self.cutoff_date].copy()
-            after_count = len(df_filtered)
+            before_count = len(df)
+            df_filtered = drop_expired_months(df, 'date', self.cutoff_date).copy()
             
-            removed_count = before_count - after_count
+            removed_count = before_count - len(df_filtered)
             if removed_count > 0:
-                logger.info(f"🗑️ Suppression de {removed_count} matchs trop anciens (> 365 jours)")
+                logger.info(f"🗑️ Suppression de {removed_count} matchs trop anciens (> {DATA_RETENTION_DAYS} jours)")
             
             return df_filtered
             
@@ -176,8 +147,6 @@ class FootballDataUpdater:
                 season_fixtures = data['response']
                 logger.info(f"✅ Saison {season}: {len(season_fixtures)} matchs récents récupérés")
                 all_fixtures.extend(season_fixtures)
-            
-            time.sleep(0.5)
         
         # Si pas de matchs récents, essayer une période plus large
         if not all_fixtures:
@@ -198,8 +167,6 @@ class FootballDataUpdater:
                     season_fixtures = data['response']
                     logger.info(f"✅ Période étendue saison {season}: {len(season_fixtures)} matchs")
                     all_fixtures.extend(season_fixtures)
-                
-                time.sleep(0.5)
         
         # Si toujours rien, récupérer les derniers matchs terminés pour mise à jour des stats
         if not all_fixtures:
@@ -232,16 +199,14 @@ class FootballDataUpdater:
                     
                     logger.info(f"✅ Matchs récents terminés saison {season}: {len(filtered_fixtures)}")
                     all_fixtures.extend(filtered_fixtures)
-                
-                time.sleep(0.5)
         
         logger.info(f"📊 Total matchs récents récupérés: {len(all_fixtures)}")
         return all_fixtures
     
-    def get_fixture_statistics(self, fixture_id: int) -> Optional[Dict]:
+    def get_fixture_statistics(self, fixture_id: int, fixture_status: Optional[str] = None) -> Optional[Dict]:
         """Récupère les statistiques détaillées d'un match"""
         params = {'fixture': fixture_id}
-        data = self.make_api_request('fixtures/statistics', params)
+        data = self.make_api_request('fixtures/statistics', params, fixture_status)
         
         if data and 'response' in data:
             return data['response']
@@ -359,8 +324,13 @@ class FootballDataUpdater:
     
     def update_league_data(self, league_code: str) -> bool:
         """
-        Met à jour les données d'une ligue de manière incrémentale
+        Met à jour les données d'une ligue de manière incrémentale.
+        Le fichier de la ligue reste verrouillé de la lecture à la sauvegarde.
         """
+        with file_lock(os.path.join(self.data_folder, f"{league_code}.csv")):
+            return self._update_league_data(league_code)
+
+    def _update_league_data(self, league_code: str) -> bool:
         league_info = self.all_leagues[league_code]
         league_id = league_info['id']
         
@@ -369,7 +339,7 @@ class FootballDataUpdater:
         # 1. Charger les données existantes
         existing_df = self.load_existing_data(league_code)
         
-        # 2. Supprimer les matchs trop anciens (> 365 jours)
+        # 2. Supprimer les matchs trop anciens (> DATA_RETENTION_DAYS jours)
         initial_count = len(existing_df) if not existing_df.empty else 0
         if not existing_df.empty:
             existing_df = self.filter_by_date_range(existing_df)
@@ -411,13 +381,12 @@ class FootballDataUpdater:
                         
                         # Ajouter la nouvelle version avec stats
                         match_data = self.process_fixture_data(fixture)
-                        stats = self.get_fixture_statistics(fixture_id)
+                        stats = self.get_fixture_statistics(fixture_id, status)
                         if stats:
                             match_data.update(self.process_statistics(stats))
                             stats_added += 1
                         
                         new_matches.append(match_data)
-                        time.sleep(0.5)
                     continue
             
             # Nouveau match
@@ -426,28 +395,27 @@ class FootballDataUpdater:
             # Ajouter les statistiques si le match est terminé
             if status == 'FT':
                 logger.debug(f"📊 Récupération des stats pour le nouveau match terminé {fixture_id}")
-                stats = self.get_fixture_statistics(fixture_id)
+                stats = self.get_fixture_statistics(fixture_id, status)
                 if stats:
                     match_data.update(self.process_statistics(stats))
                     stats_added += 1
-                time.sleep(0.5)
             
             new_matches.append(match_data)
         
+        # 4b. Reprendre les statistiques abandonnées lors d'une exécution précédente (panne API)
+        handled_ids = {match['fixture_id'] for match in new_matches}
+        existing_df, retried_matches = self.retry_pending_statistics(existing_df, handled_ids)
+        new_matches.extend(retried_matches)
+        stats_added += len(retried_matches)
+
         # 5. Combiner les données existantes et nouvelles
         if new_matches:
             new_df = pd.DataFrame(new_matches)
+            # Même format de date que les données existantes (AAAA-MM-JJ)
+            if 'date' in new_df.columns:
+                new_df['date'] = new_df['date'].str[:10]
             
             if not existing_df.empty:
-                # Normaliser les dates avant la combinaison
-                try:
-                    if 'date' in existing_df.columns:
-                        existing_df['date'] = pd.to_datetime(existing_df['date'], utc=True).dt.strftime('%Y-%m-%d %H:%M:%S')
-                    if 'date' in new_df.columns:
-                        new_df['date'] = pd.to_datetime(new_df['date'], utc=True).dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    pass  # Continuer même si normalisation échoue
-                
                 # Combiner et supprimer les doublons
                 combined_df = pd.concat([existing_df, new_df], ignore_index=True)
                 combined_df = combined_df.drop_duplicates(subset=['fixture_id'], keep='last')
@@ -475,6 +443,37 @@ class FootballDataUpdater:
         
         return True
     
+    def retry_pending_statistics(self, existing_df: pd.DataFrame, handled_ids: set) -> tuple:
+        """
+        Récupère les statistiques des matchs de la ligue restés dans la file de reprise.
+        Renvoie les données existantes sans ces matchs et les matchs complétés.
+        """
+        pending_ids = {params.get('fixture') for params in self.api_client.pending_retries('fixtures/statistics')}
+        required_cols = {'fixture_id', 'status_short', 'home_shots_on_goal'}
+        if existing_df.empty or not pending_ids or not required_cols.issubset(existing_df.columns):
+            return existing_df, []
+
+        to_retry = existing_df[
+            existing_df['fixture_id'].isin(pending_ids - handled_ids) &
+            (existing_df['status_short'] == 'FT') &
+            existing_df['home_shots_on_goal'].isna()
+        ]
+
+        retried_matches = []
+        for _, match in to_retry.iterrows():
+            fixture_id = match['fixture_id']
+            stats = self.get_fixture_statistics(fixture_id, 'FT')
+            if stats:
+                match_data = match.to_dict()
+                match_data.update(self.process_statistics(stats))
+                retried_matches.append(match_data)
+
+        if retried_matches:
+            logger.info(f"🔁 Statistiques reprises pour {len(retried_matches)} matchs de la file de reprise")
+            retried_ids = {match['fixture_id'] for match in retried_matches}
+            existing_df = existing_df[~existing_df['fixture_id'].isin(retried_ids)]
+        return existing_df, retried_matches
+
     def save_to_csv(self, df: pd.DataFrame, league_code: str) -> None:
         """Sauvegarde le DataFrame en CSV"""
         if df.empty:
@@ -485,8 +484,10 @@ class FootballDataUpdater:
         filepath = os.path.join(self.data_folder, filename)
         
         try:
-            df.to_csv(filepath, index=False, encoding='utf-8')
+            write_csv(df, filepath)
             logger.info(f"💾 Données sauvegardées: {filepath} ({len(df)} lignes)")
+            record_frame(filepath, df, 'date')
+            sync_league('matches', league_code, df)
             
             if 'date' in df.columns and len(df) > 0:
                 logger.info(f"📅 Période: {df['date'].min()} à {df['date'].max()}")
@@ -499,7 +500,7 @@ class FootballDataUpdater:
         Lance la mise à jour incrémentale pour toutes les ligues
         """
         logger.info("🚀 === DÉBUT DE LA MISE À JOUR INCRÉMENTALE ===")
-        logger.info(f"📅 Date limite (365 jours): {self.cutoff_date}")
+        logger.info(f"📅 Date limite ({DATA_RETENTION_DAYS} jours): {self.cutoff_date}")
         logger.info(f"🔄 Période de mise à jour: {self.update_start_date} à {self.today}")
         
         start_time = datetime.now()
@@ -513,10 +514,6 @@ class FootballDataUpdater:
                 if success:
                     successful_updates += 1
                 
-                # Pause entre les ligues
-                logger.info("⏱️ Pause de 3 secondes...")
-                time.sleep(3)
-                
             except Exception as e:
                 logger.error(f"❌ Erreur lors de la mise à jour de {league_code}: {e}")
                 continue
@@ -527,7 +524,7 @@ class FootballDataUpdater:
         logger.info(f"\n🎉 === MISE À JOUR TERMINÉE ===")
         logger.info(f"⏱️ Durée totale: {duration}")
         logger.info(f"✅ Ligues mises à jour avec succès: {successful_updates}/{len(self.all_leagues)}")
-        logger.info(f"📁 Fenêtre de données maintenue: 365 derniers jours")
+        logger.info(f"📁 Fenêtre de données maintenue: {DATA_RETENTION_DAYS} derniers jours")
 
 def main():
     """Fonction principale"""
@@ -542,7 +539,8 @@ def main():
     
     # Création du updater et lancement
     updater = FootballDataUpdater(RAPIDAPI_KEY)
-    updater.run_incremental_update()
+    with updater.api_client.track_stage('Mise à jour des matchs'):
+        updater.run_incremental_update()
 
 if __name__ == "__main__":
     main() 
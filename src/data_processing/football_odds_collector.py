@@ -1,12 +1,16 @@
-import requests
 import pandas as pd
 import os
-import time
 from datetime import datetime, timedelta
 import logging
 import argparse
 from typing import Dict, List, Optional
 
+from src.api.client import get_client
+from src.api.odds_decoder import ODDS_COLUMNS, decode_odds_response
+from src.config import ODDS_BULK_INGESTION, ODDS_BULK_MAX_PAGES
+from src.data_processing.odds_store import OddsStore
+from src.data_processing.warehouse import sync_rows
+
 logger = logging.getLogger(__name__)
 
 def setup_logging(league_code: Optional[str] = None):
@@ -27,21 +31,22 @@ def setup_logging(league_code: Optional[str] = None):
 
 class FootballOddsMaintainer:
     """
-    Maintient une base de données de cotes de football sur une fenêtre glissante de 365 jours.
-    - Supprime les cotes de plus de 365 jours.
-    - Récupère les cotes pour les matchs de la semaine écoulée.
+    Alimente la base de cotes de football (store Parquet partitionné par ligue / mois).
+    - Ajoute les nouvelles cotes en segments, sans relire ni réécrire l'historique.
+    - La déduplication, la suppression des cotes expirées (ODDS_RETENTION_DAYS) et l'export CSV
+      sont faits par l'étape de compaction (`src.data_processing.odds_compaction`).
+    - Récupère les cotes pour les matchs de la semaine écoulée, en bloc par
+      ligue/saison/date (mode par défaut) ou match par match.
     """
 
-    def __init__(self, rapidapi_key: str):
+    def __init__(self, rapidapi_key: str, bulk_ingestion: bool = ODDS_BULK_INGESTION,
+                 store: Optional[OddsStore] = None):
         """
         Initialise le mainteneur avec la clé RapidAPI.
         """
         self.api_key = rapidapi_key
-        self.base_url = "https://api-football-v1.p.rapidapi.com/v3"
-        self.headers = {
-            'x-rapidapi-host': 'api-football-v1.p.rapidapi.com',
-            'x-rapidapi-key': self.api_key
-        }
+        self.api_client = get_client(self.api_key)
+        self.bulk_ingestion = bulk_ingestion
 
         self.all_leagues = {
             'ENG1': {'id': 39, 'name': 'Premier League', 'country': 'England'},
@@ -65,36 +70,24 @@ class FootballOddsMaintainer:
         self.collection_end_date = datetime.now().date()
         self.collection_start_date = (self.collection_end_date - timedelta(days=7))
 
-        # Date limite pour la suppression : tout ce qui est plus vieux que 365 jours
-        self.prune_cutoff_date = datetime.now(datetime.now().astimezone().tzinfo) - timedelta(days=365)
+        # Horodatage unique des cotes collectées pendant cette exécution
+        self.collected_at = datetime.now().isoformat()
 
 
         self.matches_folder = os.path.join("data", "matches")
         self.odds_folder = os.path.join("data", "odds", "raw_data")
         os.makedirs(self.odds_folder, exist_ok=True)
+        self.store = store or OddsStore()
 
         self.stats = {
             'leagues_processed': set(),
-            'records_before_prune': 0,
-            'records_after_prune': 0,
             'new_fixtures_found': 0,
             'new_odds_collections': 0
         }
 
     def make_api_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
-        """Effectue une requête à l'API avec gestion des erreurs et des retries."""
-        url = f"{self.base_url}/{endpoint}"
-        for _ in range(3):
-            try:
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
-                if response.status_code == 200:
-                    return response.json()
-                logger.error(f"Erreur API {response.status_code}: {response.text[:200]}")
-                time.sleep(5)
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Erreur de requête: {e}")
-                time.sleep(5)
-        return None
+        """Effectue une requête à l'API via le client partagé (session poolée, retries)."""
+        return self.api_client.get(endpoint, params)
 
     def get_fixture_odds(self, fixture_id: int) -> Optional[List[Dict]]:
         """Récupère les cotes pour un match spécifique."""
@@ -103,29 +96,51 @@ class FootballOddsMaintainer:
         data = self.make_api_request('odds', params)
         return data['response'] if data and 'response' in data else None
 
-    def process_odds_data(self, fixture_id: int, odds_data: List[Dict]) -> List[Dict]:
-        """Traite les données de cotes brutes pour les transformer en une liste de dictionnaires."""
-        processed_odds = []
-        if not odds_data:
-            return processed_odds
-        for odds_entry in odds_data:
-            for bookmaker in odds_entry.get('bookmakers', []):
-                for bet in bookmaker.get('bets', []):
-                    for value in bet.get('values', []):
-                        processed_odds.append({
-                            'fixture_id': fixture_id,
-                            'fixture_date': odds_entry.get('fixture', {}).get('date'),
-                            'bookmaker_id': bookmaker.get('id'),
-                            'bookmaker_name': bookmaker.get('name'),
-                            'bet_type_id': bet.get('id'),
-                            'bet_type_name': bet.get('name'),
-                            'bet_value': value.get('value'),
-                            'odd': value.get('odd'),
-                            'collected_at': datetime.now().isoformat()
-                        })
-        if processed_odds:
+    def get_league_odds(self, league_id: int, season: int, date_str: str) -> List[Dict]:
+        """Récupère toutes les cotes d'une ligue pour une date donnée, page par page."""
+        params = {'league': league_id, 'season': season, 'date': date_str}
+        logger.info(f"🔍 Appel API pour les cotes de la ligue {league_id} (saison {season}) du {date_str}")
+        entries = []
+        page, total_pages = 1, 1
+        while page <= total_pages and page <= ODDS_BULK_MAX_PAGES:
+            page_params = params if page == 1 else {**params, 'page': page}
+            data = self.make_api_request('odds', page_params)
+            if not data or 'response' not in data:
+                break
+            entries.extend(data['response'])
+            total_pages = data.get('paging', {}).get('total', 1) or 1
+            page += 1
+        return entries
+
+    def collect_league_odds_bulk(self, league_code: str, fixtures: pd.DataFrame) -> List[pd.DataFrame]:
+        """
+        Collecte les cotes des matchs donnés avec une requête paginée par (saison, date)
+        puis les répartit par match.
+        """
+        league_id = self.all_leagues[league_code]['id']
+        wanted_ids = set(fixtures['fixture_id'].astype(int))
+        new_odds_data = []
+        found_ids = set()
+
+        for (season, day), _ in fixtures.groupby([fixtures['season'], fixtures['date'].dt.strftime('%Y-%m-%d')]):
+            for odds_entry in self.get_league_odds(league_id, int(season), day):
+                fixture_id = odds_entry.get('fixture', {}).get('id')
+                if fixture_id not in wanted_ids or fixture_id in found_ids:
+                    continue
+                found_ids.add(fixture_id)
+                new_odds_data.append(self.process_odds_data(fixture_id, [odds_entry]))
+
+        missing = len(wanted_ids - found_ids)
+        if missing:
+            logger.info(f"[{league_code}] {missing} matchs sans cotes disponibles dans l'API.")
+        return new_odds_data
+
+    def process_odds_data(self, fixture_id: int, odds_data: List[Dict]) -> pd.DataFrame:
+        """Décode les cotes brutes d'un match en DataFrame colonnaire (une ligne par cote)."""
+        odds_df = decode_odds_response(odds_data, fixture_id=fixture_id, collected_at=self.collected_at)
+        if not odds_df.empty:
             self.stats['new_odds_collections'] += 1
-        return processed_odds
+        return odds_df[ODDS_COLUMNS]
 
     def get_fixtures_to_collect(self, league_code: str) -> pd.DataFrame:
         """Charge les matchs d'une ligue et les filtre pour la fenêtre de collecte."""
@@ -137,58 +152,53 @@ class FootballOddsMaintainer:
         df = pd.read_csv(match_file)
         df['date'] = pd.to_datetime(df['date'])
 
-        mask = (df['date'] >= self.collection_start_date) & (df['date'] <= self.collection_end_date)
+        match_days = df['date'].dt.date
+        mask = (match_days >= self.collection_start_date) & (match_days <= self.collection_end_date)
+
+        # Reprendre les matchs et journées dont les cotes n'ont pas pu être récupérées (panne API)
+        league_id = self.all_leagues[league_code]['id']
+        pending = self.api_client.pending_retries('odds')
+        pending_ids = {params['fixture'] for params in pending if 'fixture' in params}
+        pending_days = {params['date'] for params in pending
+                        if 'date' in params and str(params.get('league')) == str(league_id)}
+        mask |= df['fixture_id'].isin(pending_ids) | df['date'].dt.strftime('%Y-%m-%d').isin(pending_days)
         return df[mask].copy()
 
     def process_league(self, league_code: str):
         """
-        Traite une seule ligue : supprime les anciennes données, collecte les nouvelles.
+        Traite une seule ligue : collecte les nouvelles cotes et les ajoute au store.
         """
         logger.info(f"--- Traitement de la ligue : {league_code} ---")
         odds_file_path = os.path.join(self.odds_folder, f"{league_code}_complete_odds.csv")
-        cols = ['fixture_id', 'fixture_date', 'bookmaker_id', 'bookmaker_name', 'bet_type_id', 'bet_type_name', 'bet_value', 'odd', 'collected_at']
-
-        # 1. Charger les données existantes
-        odds_df = pd.read_csv(odds_file_path) if os.path.exists(odds_file_path) else pd.DataFrame(columns=cols)
-        if not odds_df.empty:
-            odds_df['fixture_date'] = pd.to_datetime(odds_df['fixture_date'])
 
-        self.stats['records_before_prune'] = len(odds_df)
+        # 1. Reprendre l'historique CSV dans le store au premier passage
+        self.store.import_csv(league_code, odds_file_path)
 
-        # 2. Supprimer les données de plus de 365 jours
-        if not odds_df.empty:
-            odds_df = odds_df[odds_df['fixture_date'] >= self.prune_cutoff_date]
-            self.stats['records_after_prune'] = len(odds_df)
-            logger.info(f"[{league_code}] Suppression : {self.stats['records_before_prune'] - self.stats['records_after_prune']} enregistrements anciens supprimés.")
-
-        # 3. Collecter les nouvelles données pour la semaine passée
+        # 2. Collecter les nouvelles données pour la semaine passée
         fixtures_to_check = self.get_fixtures_to_collect(league_code)
         new_odds_data = []
         if not fixtures_to_check.empty:
-            existing_fixture_ids = set(odds_df['fixture_id'].unique())
+            existing_fixture_ids = self.store.fixture_ids(league_code)
             fixtures_to_process = fixtures_to_check[~fixtures_to_check['fixture_id'].isin(existing_fixture_ids)]
             self.stats['new_fixtures_found'] = len(fixtures_to_process)
             logger.info(f"[{league_code}] Collecte : {self.stats['new_fixtures_found']} nouveaux matchs à traiter.")
 
-            for _, fixture in fixtures_to_process.iterrows():
-                odds_data = self.get_fixture_odds(fixture['fixture_id'])
-                if odds_data:
-                    new_odds_data.extend(self.process_odds_data(fixture['fixture_id'], odds_data))
-                time.sleep(1.5)
+            if self.bulk_ingestion:
+                new_odds_data = self.collect_league_odds_bulk(league_code, fixtures_to_process)
+            else:
+                for _, fixture in fixtures_to_process.iterrows():
+                    odds_data = self.get_fixture_odds(fixture['fixture_id'])
+                    if odds_data:
+                        new_odds_data.append(self.process_odds_data(fixture['fixture_id'], odds_data))
 
-        # 4. Combiner et sauvegarder
+        # 3. Ajouter les nouvelles cotes en segment (dédupliquées plus tard par la compaction)
         if new_odds_data:
-            new_odds_df = pd.DataFrame(new_odds_data)
-            combined_df = pd.concat([odds_df, new_odds_df]).reset_index(drop=True)
-            # Dédoublonner
-            key_cols = ['fixture_id', 'bookmaker_id', 'bet_type_id', 'bet_value']
-            combined_df.drop_duplicates(subset=key_cols, keep='last', inplace=True)
+            new_odds_df = pd.concat(new_odds_data, ignore_index=True)
+            added = self.store.append(league_code, new_odds_df)
+            logger.info(f"💾 [{league_code}] {added} nouvelles cotes ajoutées au store.")
+            sync_rows('odds', new_odds_df[ODDS_COLUMNS].assign(league_code=league_code))
         else:
-            combined_df = odds_df
             logger.info(f"[{league_code}] Aucune nouvelle cote à ajouter.")
-
-        combined_df.to_csv(odds_file_path, index=False, encoding='utf-8')
-        logger.info(f"💾 Fichier de cotes pour {league_code} sauvegardé avec {len(combined_df)} lignes.")
         self.stats['leagues_processed'].add(league_code)
 
     def run_maintenance(self, league_to_process: Optional[str] = None):
@@ -199,8 +209,6 @@ class FootballOddsMaintainer:
         for league_code in leagues_to_run:
             try:
                 self.process_league(league_code)
-                if len(leagues_to_run) > 1:
-                    time.sleep(5)
             except Exception as e:
                 logger.error(f"❌ Erreur majeure lors du traitement de {league_code}: {e}", exc_info=True)
 
@@ -210,6 +218,8 @@ def main():
     """Point d'entrée du script."""
     parser = argparse.ArgumentParser(description="Mainteneur de cotes de football.")
     parser.add_argument("--league", type=str, help="Code de la ligue à traiter (ex: ENG1).")
+    parser.add_argument("--per-fixture", action="store_true",
+                        help="Récupère les cotes match par match au lieu de la collecte en bloc par date.")
     args = parser.parse_args()
 
     # Configurer le logging après avoir parsé les arguments
@@ -220,8 +230,9 @@ def main():
         logger.error("⚠️ Clé RAPIDAPI_KEY non trouvée.")
         return
 
-    maintainer = FootballOddsMaintainer(RAPIDAPI_KEY)
-    maintainer.run_maintenance(league_to_process=args.league)
+    maintainer = FootballOddsMaintainer(RAPIDAPI_KEY, bulk_ingestion=not args.per_fixture)
+    with maintainer.api_client.track_stage('Maintenance des cotes'):
+        maintainer.run_maintenance(league_to_process=args.league)
 
 if __name__ == "__main__":
     main()
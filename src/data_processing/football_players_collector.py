@@ -1,10 +1,12 @@
-import requests
 import pandas as pd
 import os
-import time
 from datetime import datetime, date, timedelta
 import logging
 from typing import Dict, List, Optional
+
+from src.api.client import get_client
+from src.data_processing.player_store import data_files, write_players
+from src.data_processing.warehouse import sync_league
 import json
 
 # Configuration du logging
@@ -28,11 +30,7 @@ class FootballPlayersCollector:
     def __init__(self, rapidapi_key: str):
         """Initialise le collecteur avec la clé RapidAPI"""
         self.api_key = rapidapi_key
-        self.base_url = "https://api-football-v1.p.rapidapi.com/v3"
-        self.headers = {
-            'x-rapidapi-host': 'api-football-v1.p.rapidapi.com',
-            'x-rapidapi-key': self.api_key
-        }
+        self.api_client = get_client(self.api_key)
         
         # Configuration des ligues (toutes celles que vous avez)
         self.leagues = {
@@ -77,38 +75,17 @@ class FootballPlayersCollector:
             'leagues_processed': 0
         }
     
-    def make_api_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
-        """Effectue une requête à l'API avec gestion d'erreurs et statistiques"""
-        url = f"{self.base_url}/{endpoint}"
+    def make_api_request(self, endpoint: str, params: Dict,
+                         fixture_status: Optional[str] = None) -> Optional[Dict]:
+        """Effectue une requête à l'API via le client partagé, avec statistiques"""
         self.stats['total_api_calls'] += 1
-        
-        try:
-            logger.debug(f"API Request #{self.stats['total_api_calls']}: {endpoint}")
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                results_count = data.get('results', 0)
-                logger.debug(f"✅ {results_count} résultats récupérés")
-                
-                if 'errors' in data and data['errors']:
-                    logger.warning(f"⚠️ Erreurs API: {data['errors']}")
-                
-                return data
-            else:
-                logger.error(f"❌ Erreur HTTP {response.status_code}: {response.text}")
-                self.stats['failed_requests'] += 1
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Erreur de requête: {e}")
-            self.stats['failed_requests'] += 1
-            return None
-        except ValueError as e:
-            logger.error(f"❌ Erreur de parsing JSON: {e}")
+        logger.debug(f"API Request #{self.stats['total_api_calls']}: {endpoint}")
+
+        data = self.api_client.get(endpoint, params, fixture_status=fixture_status)
+        if data is None:
             self.stats['failed_requests'] += 1
-            return None
-    
+        return data
+
     def load_match_data(self, league_code: str) -> pd.DataFrame:
         """Charge les données de matchs existantes pour une ligue"""
         filepath = os.path.join(self.matches_folder, f"{league_code}.csv")
@@ -125,10 +102,10 @@ class FootballPlayersCollector:
             logger.warning(f"📂 Aucun fichier de matchs trouvé pour {league_code}")
             return pd.DataFrame()
     
-    def get_fixture_players(self, fixture_id: int) -> Optional[Dict]:
+    def get_fixture_players(self, fixture_id: int, fixture_status: Optional[str] = None) -> Optional[Dict]:
         """Récupère les stats des joueurs pour un match donné"""
         params = {'fixture': fixture_id}
-        data = self.make_api_request('fixtures/players', params)
+        data = self.make_api_request('fixtures/players', params, fixture_status)
         
         if data and 'response' in data:
             return data['response']
@@ -253,7 +230,7 @@ class FootballPlayersCollector:
             logger.info(f"⚽ Traitement match {index+1}/{len(finished_matches)} - ID: {fixture_id}")
             
             # Récupération des stats joueurs
-            players_data = self.get_fixture_players(fixture_id)
+            players_data = self.get_fixture_players(fixture_id, match.get('status_short'))
             
             if not players_data:
                 logger.warning(f"⚠️ Pas de données joueurs pour le match {fixture_id}")
@@ -307,9 +284,6 @@ class FootballPlayersCollector:
             
             all_lineups.append(match_lineup)
             self.stats['total_matches_processed'] += 1
-            
-            # Pause pour respecter les limites d'API
-            time.sleep(0.5)
         
         # Sauvegarde des données
         self.save_player_stats(all_player_stats, league_code)
@@ -328,11 +302,10 @@ class FootballPlayersCollector:
             return
         
         df = pd.DataFrame(player_stats)
-        filepath = os.path.join(self.player_stats_folder, f"{league_code}_players.csv")
-        
         try:
-            df.to_csv(filepath, index=False, encoding='utf-8')
+            filepath = write_players('player_stats', league_code, df, self.players_folder)
             logger.info(f"💾 Stats joueurs sauvegardées: {filepath} ({len(df)} lignes)")
+            sync_league('player_stats', league_code, df)
         except Exception as e:
             logger.error(f"❌ Erreur sauvegarde stats joueurs {league_code}: {e}")
     
@@ -342,7 +315,7 @@ class FootballPlayersCollector:
             logger.warning(f"❌ Aucune composition à sauvegarder pour {league_code}")
             return
         
-        # Aplatir les données pour CSV
+        # Aplatir les données (une ligne par match)
         flattened_lineups = []
         for lineup in lineups:
             base_info = {
@@ -371,11 +344,10 @@ class FootballPlayersCollector:
                         })
         
         df = pd.DataFrame(flattened_lineups)
-        filepath = os.path.join(self.match_lineups_folder, f"{league_code}_lineups.csv")
-        
         try:
-            df.to_csv(filepath, index=False, encoding='utf-8')
+            filepath = write_players('match_lineups', league_code, df, self.players_folder)
             logger.info(f"💾 Compositions sauvegardées: {filepath} ({len(df)} matchs)")
+            sync_league('match_lineups', league_code, df)
         except Exception as e:
             logger.error(f"❌ Erreur sauvegarde compositions {league_code}: {e}")
     
@@ -397,11 +369,10 @@ class FootballPlayersCollector:
                 })
         
         df = pd.DataFrame(rosters)
-        filepath = os.path.join(self.team_rosters_folder, f"{league_code}_rosters.csv")
-        
         try:
-            df.to_csv(filepath, index=False, encoding='utf-8')
+            filepath = write_players('team_rosters', league_code, df, self.players_folder)
             logger.info(f"💾 Effectifs sauvegardés: {filepath} ({len(df)} joueurs)")
+            sync_league('team_rosters', league_code, df)
         except Exception as e:
             logger.error(f"❌ Erreur sauvegarde effectifs {league_code}: {e}")
     
@@ -417,10 +388,6 @@ class FootballPlayersCollector:
                 logger.info(f"\n🏟️ --- Collecte joueurs {league_code} ---")
                 self.collect_league_players(league_code)
                 
-                # Pause entre les ligues
-                logger.info("⏱️ Pause de 10 secondes avant la prochaine ligue...")
-                time.sleep(10)
-                
             except Exception as e:
                 logger.error(f"❌ Erreur lors de la collecte joueurs {league_code}: {e}")
                 continue
@@ -444,8 +411,7 @@ class FootballPlayersCollector:
             ("Compositions", self.match_lineups_folder), 
             ("Effectifs", self.team_rosters_folder)
         ]:
-            csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
-            logger.info(f"📊 {folder_name}: {len(csv_files)} fichiers")
+            logger.info(f"📊 {folder_name}: {len(data_files(folder_path))} fichiers")
 
 def main():
     """Fonction principale"""
@@ -460,7 +426,8 @@ def main():
     
     # Création du collecteur et lancement
     collector = FootballPlayersCollector(RAPIDAPI_KEY)
-    collector.run_full_collection()
+    with collector.api_client.track_stage('Collecte des joueurs'):
+        collector.run_full_collection()
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,16 @@
-import requests
 import pandas as pd
 import os
-import time
 from datetime import datetime, date, timedelta
 import logging
 from typing import Dict, List, Optional, Set, Tuple
+
+from src.api.client import get_client
+from src.config import DATA_RETENTION_DAYS
+from src.data_processing.catalog import get_catalog
+from src.data_processing.file_io import file_lock
+from src.data_processing.player_store import PLAYER_DATASETS, data_files, players_path, read_players, write_players
+from src.data_processing.retention import drop_expired_months, retention_cutoff
+from src.data_processing.warehouse import sync_league
 import json
 
 # Configuration du logging
@@ -23,18 +29,14 @@ class FootballPlayersUpdater:
     """
     Mise à jour incrémentale des statistiques des joueurs
     - Met à jour uniquement les nouveaux matchs de la dernière semaine
-    - Maintient une fenêtre glissante de 365 jours
+    - Maintient une fenêtre glissante de DATA_RETENTION_DAYS jours
     - Optimise les appels API
     """
     
     def __init__(self, rapidapi_key: str):
         """Initialise l'updater avec la clé RapidAPI"""
         self.api_key = rapidapi_key
-        self.base_url = "https://api-football-v1.p.rapidapi.com/v3"
-        self.headers = {
-            'x-rapidapi-host': 'api-football-v1.p.rapidapi.com',
-            'x-rapidapi-key': self.api_key
-        }
+        self.api_client = get_client(self.api_key)
         
         # Configuration des ligues
         self.leagues = {
@@ -65,10 +67,10 @@ class FootballPlayersUpdater:
         
         # Dates pour la mise à jour
         self.today = date.today()
-        self.cutoff_date = self.today - timedelta(days=365)  # Fenêtre 365 jours
+        self.cutoff_date = retention_cutoff(today=self.today)  # Fenêtre DATA_RETENTION_DAYS
         self.update_from = self.today - timedelta(days=7)   # Dernière semaine
         
-        logger.info(f"📅 Date limite (365 jours): {self.cutoff_date}")
+        logger.info(f"📅 Date limite ({DATA_RETENTION_DAYS} jours): {self.cutoff_date}")
         logger.info(f"🔄 Mise à jour depuis: {self.update_from}")
         
         # Statistiques
@@ -81,28 +83,17 @@ class FootballPlayersUpdater:
             'files_updated': 0
         }
     
-    def make_api_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
-        """Effectue une requête à l'API avec gestion d'erreurs"""
-        url = f"{self.base_url}/{endpoint}"
+    def make_api_request(self, endpoint: str, params: Dict,
+                         fixture_status: Optional[str] = None) -> Optional[Dict]:
+        """Effectue une requête à l'API via le client partagé"""
         self.stats['api_calls'] += 1
-        
-        try:
-            logger.debug(f"API Request #{self.stats['api_calls']}: {endpoint}")
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data
-            else:
-                logger.error(f"❌ Erreur HTTP {response.status_code}: {response.text}")
-                self.stats['failed_requests'] += 1
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Erreur de requête: {e}")
+        logger.debug(f"API Request #{self.stats['api_calls']}: {endpoint}")
+
+        data = self.api_client.get(endpoint, params, fixture_status=fixture_status)
+        if data is None:
             self.stats['failed_requests'] += 1
-            return None
-    
+        return data
+
     def load_existing_data(self, league_code: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """Charge toutes les données existantes pour une ligue"""
         
@@ -117,34 +108,16 @@ class FootballPlayersUpdater:
             except Exception as e:
                 logger.error(f"❌ Erreur chargement matchs {league_code}: {e}")
         
-        # Stats joueurs
-        stats_file = os.path.join(self.player_stats_folder, f"{league_code}_players.csv")
-        stats_df = pd.DataFrame()
-        if os.path.exists(stats_file):
-            try:
-                stats_df = pd.read_csv(stats_file)
-                stats_df['match_date'] = pd.to_datetime(stats_df['match_date']).dt.date
-            except Exception as e:
-                logger.error(f"❌ Erreur chargement stats joueurs {league_code}: {e}")
-        
-        # Compositions
-        lineups_file = os.path.join(self.match_lineups_folder, f"{league_code}_lineups.csv")
-        lineups_df = pd.DataFrame()
-        if os.path.exists(lineups_file):
-            try:
-                lineups_df = pd.read_csv(lineups_file)
-                lineups_df['match_date'] = pd.to_datetime(lineups_df['match_date']).dt.date
-            except Exception as e:
-                logger.error(f"❌ Erreur chargement compositions {league_code}: {e}")
-        
-        # Effectifs
-        rosters_file = os.path.join(self.team_rosters_folder, f"{league_code}_rosters.csv")
-        rosters_df = pd.DataFrame()
-        if os.path.exists(rosters_file):
+        # Stats joueurs, compositions et effectifs (Parquet typé, ou anciens CSV)
+        frames = {}
+        for dataset, label in [('player_stats', 'stats joueurs'), ('match_lineups', 'compositions'),
+                               ('team_rosters', 'effectifs')]:
             try:
-                rosters_df = pd.read_csv(rosters_file)
+                frames[dataset] = read_players(dataset, league_code, self.players_folder)
             except Exception as e:
-                logger.error(f"❌ Erreur chargement effectifs {league_code}: {e}")
+                logger.error(f"❌ Erreur chargement {label} {league_code}: {e}")
+                frames[dataset] = pd.DataFrame()
+        stats_df, lineups_df, rosters_df = frames['player_stats'], frames['match_lineups'], frames['team_rosters']
         
         return matches_df, stats_df, lineups_df, rosters_df
     
@@ -153,18 +126,21 @@ class FootballPlayersUpdater:
         if matches_df.empty:
             return matches_df
         
+        # Matchs dont la récupération a échoué lors d'une exécution précédente (panne API)
+        pending_ids = {params.get('fixture') for params in self.api_client.pending_retries('fixtures/players')}
+
         # Filtrer par date (dernière semaine) et statut terminé
         recent_finished = matches_df[
-            (matches_df['date'] >= self.update_from) & 
+            ((matches_df['date'] >= self.update_from) | matches_df['fixture_id'].isin(pending_ids)) &
             (matches_df['status_short'] == 'FT')
         ].copy()
         
         return recent_finished
     
-    def get_fixture_players(self, fixture_id: int) -> Optional[Dict]:
+    def get_fixture_players(self, fixture_id: int, fixture_status: Optional[str] = None) -> Optional[Dict]:
         """Récupère les stats des joueurs pour un match"""
         params = {'fixture': fixture_id}
-        data = self.make_api_request('fixtures/players', params)
+        data = self.make_api_request('fixtures/players', params, fixture_status)
         
         if data and 'response' in data:
             return data['response']
@@ -256,8 +232,16 @@ class FootballPlayersUpdater:
         
         return processed_stats
     
+    def output_files(self, league_code: str) -> List[str]:
+        """Fichiers joueurs d'une ligue (stats, compositions, effectifs)"""
+        return [players_path(dataset, league_code, self.players_folder) for dataset in PLAYER_DATASETS]
+
     def update_league_players(self, league_code: str) -> None:
-        """Met à jour les données joueurs pour une ligue"""
+        """Met à jour les données joueurs pour une ligue (fichiers verrouillés de la lecture à la sauvegarde)"""
+        with file_lock(*self.output_files(league_code)):
+            self._update_league_players(league_code)
+
+    def _update_league_players(self, league_code: str) -> None:
         logger.info(f"🏆 Mise à jour joueurs pour {league_code} ({self.leagues[league_code]})")
         
         # Charger les données existantes
@@ -305,7 +289,7 @@ class FootballPlayersUpdater:
             logger.info(f"⚽ Traitement match {fixture_id}")
             
             # Récupération des stats joueurs
-            players_data = self.get_fixture_players(fixture_id)
+            players_data = self.get_fixture_players(fixture_id, match.get('status_short'))
             
             if not players_data:
                 logger.warning(f"⚠️ Pas de données joueurs pour match {fixture_id}")
@@ -358,9 +342,6 @@ class FootballPlayersUpdater:
             
             new_lineups.append(match_lineup)
             self.stats['new_matches_found'] += 1
-            
-            # Pause API
-            time.sleep(0.5)
         
         # Mise à jour des données
         if new_stats:
@@ -381,9 +362,8 @@ class FootballPlayersUpdater:
         new_df = pd.DataFrame(new_stats)
         
         if not existing_df.empty:
-            # Supprimer les anciennes données (> 365 jours)
-            existing_df['match_date'] = pd.to_datetime(existing_df['match_date']).dt.date
-            recent_existing = existing_df[existing_df['match_date'] >= self.cutoff_date]
+            # Supprimer les anciennes données (mois expirés en bloc, mois frontière filtré)
+            recent_existing = drop_expired_months(existing_df, 'match_date', self.cutoff_date)
             
             if len(recent_existing) != len(existing_df):
                 removed = len(existing_df) - len(recent_existing)
@@ -395,10 +375,10 @@ class FootballPlayersUpdater:
             combined_df = new_df
         
         # Sauvegarder
-        filepath = os.path.join(self.player_stats_folder, f"{league_code}_players.csv")
         try:
-            combined_df.to_csv(filepath, index=False, encoding='utf-8')
+            filepath = write_players('player_stats', league_code, combined_df, self.players_folder)
             logger.info(f"💾 Stats joueurs mises à jour: {filepath} ({len(combined_df)} lignes)")
+            sync_league('player_stats', league_code, combined_df)
             self.stats['files_updated'] += 1
         except Exception as e:
             logger.error(f"❌ Erreur sauvegarde stats joueurs {league_code}: {e}")
@@ -436,19 +416,18 @@ class FootballPlayersUpdater:
         new_df = pd.DataFrame(flattened_lineups)
         
         if not existing_df.empty:
-            # Supprimer les anciennes données
-            existing_df['match_date'] = pd.to_datetime(existing_df['match_date']).dt.date
-            recent_existing = existing_df[existing_df['match_date'] >= self.cutoff_date]
+            # Supprimer les anciennes données (mois expirés en bloc, mois frontière filtré)
+            recent_existing = drop_expired_months(existing_df, 'match_date', self.cutoff_date)
             
             combined_df = pd.concat([recent_existing, new_df], ignore_index=True)
         else:
             combined_df = new_df
         
         # Sauvegarder
-        filepath = os.path.join(self.match_lineups_folder, f"{league_code}_lineups.csv")
         try:
-            combined_df.to_csv(filepath, index=False, encoding='utf-8')
+            filepath = write_players('match_lineups', league_code, combined_df, self.players_folder)
             logger.info(f"💾 Compositions mises à jour: {filepath} ({len(combined_df)} matchs)")
+            sync_league('match_lineups', league_code, combined_df)
             self.stats['files_updated'] += 1
         except Exception as e:
             logger.error(f"❌ Erreur sauvegarde compositions {league_code}: {e}")
@@ -478,10 +457,10 @@ class FootballPlayersUpdater:
             combined_df = new_df
         
         # Sauvegarder
-        filepath = os.path.join(self.team_rosters_folder, f"{league_code}_rosters.csv")
         try:
-            combined_df.to_csv(filepath, index=False, encoding='utf-8')
+            filepath = write_players('team_rosters', league_code, combined_df, self.players_folder)
             logger.info(f"💾 Effectifs mis à jour: {filepath} ({len(combined_df)} joueurs)")
+            sync_league('team_rosters', league_code, combined_df)
             self.stats['files_updated'] += 1
         except Exception as e:
             logger.error(f"❌ Erreur sauvegarde effectifs {league_code}: {e}")
@@ -499,10 +478,6 @@ class FootballPlayersUpdater:
                 logger.info(f"\n🏟️ --- Mise à jour joueurs {league_code} ---")
                 self.update_league_players(league_code)
                 
-                # Pause entre les ligues
-                logger.info("⏱️ Pause de 5 secondes...")
-                time.sleep(5)
-                
             except Exception as e:
                 logger.error(f"❌ Erreur lors de la mise à jour joueurs {league_code}: {e}")
                 continue
@@ -519,7 +494,7 @@ class FootballPlayersUpdater:
         logger.info(f"📁 Fichiers mis à jour: {self.stats['files_updated']}")
         logger.info(f"🌐 Requêtes API: {self.stats['api_calls']}")
         logger.info(f"❌ Requêtes échouées: {self.stats['failed_requests']}")
-        logger.info(f"📁 Fenêtre de données maintenue: 365 derniers jours")
+        logger.info(f"📁 Fenêtre de données maintenue: {DATA_RETENTION_DAYS} derniers jours")
         
         # Résumé des fichiers par type
         logger.info(f"\n📊 === RÉSUMÉ DES DONNÉES ===")
@@ -530,24 +505,11 @@ class FootballPlayersUpdater:
             ("Effectifs", self.team_rosters_folder)
         ]:
             if os.path.exists(folder_path):
-                csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
-                total_size = 0
-                total_records = 0
-                
-                for csv_file in csv_files:
-                    file_path = os.path.join(folder_path, csv_file)
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        total_size += file_size
-                        
-                        # Compter les lignes
-                        df = pd.read_csv(file_path)
-                        total_records += len(df)
-                    except:
-                        pass
-                
-                size_mb = total_size / (1024 * 1024)
-                logger.info(f"📊 {folder_name}: {len(csv_files)} fichiers, {total_records} enregistrements, {size_mb:.2f} MB")
+                # Lignes et tailles lues dans le catalogue, sans relire les fichiers
+                entries = get_catalog().refresh([os.path.join(folder_path, f) for f in data_files(folder_path)])
+                total_records = sum(entry['rows'] for entry in entries.values())
+                size_mb = sum(entry['bytes'] for entry in entries.values()) / (1024 * 1024)
+                logger.info(f"📊 {folder_name}: {len(entries)} fichiers, {total_records} enregistrements, {size_mb:.2f} MB")
 
 def main():
     """Fonction principale"""
@@ -562,7 +524,8 @@ def main():
     
     # Création de l'updater et lancement
     updater = FootballPlayersUpdater(RAPIDAPI_KEY)
-    updater.run_incremental_update()
+    with updater.api_client.track_stage('Mise à jour des joueurs'):
+        updater.run_incremental_update()
 
 if __name__ == "__main__":
     main()
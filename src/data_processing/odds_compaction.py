@@ -0,0 +1,102 @@
+"""
+Compaction du store de cotes.
+
+Rôle :
+- Étape séparée de l'ingestion (`football_odds_collector`), qui ne fait qu'ajouter des segments.
+- Pour chaque ligue : fusionne les segments de chaque partition mensuelle, déduplique
+  sur (fixture_id, bookmaker_id, bet_type_id, bet_value) et supprime les cotes des
+  matchs plus anciens que `ODDS_RETENTION_DAYS`.
+- Les partitions des mois expirés sont supprimées en bloc ; les partitions déjà compactées
+  et non expirées ne sont pas relues.
+- Régénère l'export CSV `{league}_complete_odds.csv` (sauf `--no-csv`).
+
+Usage : python -m src.data_processing.odds_compaction [--league ENG1] [--no-csv]
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from src.config import ODDS_DATA_DIR, ODDS_EXPORT_CSV, ODDS_RETENTION_DAYS
+from src.data_processing.odds_store import OddsStore
+from src.data_processing.warehouse import get_warehouse
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(league_code: Optional[str] = None):
+    """Configure le logging pour écrire dans un fichier spécifique à la ligue."""
+    os.makedirs('logs', exist_ok=True)
+    log_file_name = f"odds_compaction_{league_code}.log" if league_code else "odds_compaction.log"
+    log_file = os.path.join('logs', log_file_name)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ],
+        force=True
+    )
+
+
+class OddsCompactor:
+    """Compacte le store de cotes ligue par ligue et produit l'export CSV."""
+
+    def __init__(self, store: Optional[OddsStore] = None, retention_days: int = ODDS_RETENTION_DAYS,
+                 export_csv: bool = ODDS_EXPORT_CSV, odds_folder: str = ODDS_DATA_DIR):
+        self.store = store or OddsStore()
+        self.export_csv = export_csv
+        self.odds_folder = odds_folder
+        self.cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        self.stats = {'leagues_compacted': 0, 'partitions_compacted': 0,
+                      'duplicates_removed': 0, 'records_pruned': 0}
+
+    def compact_league(self, league_code: str) -> None:
+        if not self.store.has_league(league_code):
+            logger.info(f"[{league_code}] Aucune partition dans le store, rien à compacter.")
+            return
+        result = self.store.compact(league_code, self.cutoff)
+        for key, value in result.items():
+            self.stats[key] += value
+        self.stats['leagues_compacted'] += 1
+        logger.info(f"🧹 [{league_code}] {result['partitions_compacted']} partitions compactées, "
+                    f"{result['duplicates_removed']} doublons et {result['records_pruned']} cotes expirées supprimés.")
+
+        warehouse = get_warehouse()
+        if warehouse is not None:
+            removed = warehouse.prune('odds', 'fixture_date', self.cutoff.strftime('%Y-%m-%dT%H:%M:%S+00:00'), league_code)
+            logger.info(f"🗄️ [{league_code}] Entrepôt : {removed} cotes expirées supprimées.")
+
+        if self.export_csv:
+            os.makedirs(self.odds_folder, exist_ok=True)
+            odds_file_path = os.path.join(self.odds_folder, f"{league_code}_complete_odds.csv")
+            rows = self.store.export_csv(league_code, odds_file_path)
+            logger.info(f"💾 Fichier de cotes pour {league_code} sauvegardé avec {rows} lignes.")
+
+    def run(self, leagues) -> None:
+        logger.info(f"🚀 === COMPACTION DU STORE DE COTES (matchs avant le {self.cutoff.date()} supprimés) ===")
+        for league_code in leagues:
+            try:
+                self.compact_league(league_code)
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de la compaction de {league_code}: {e}", exc_info=True)
+        logger.info(f"🎉 === COMPACTION TERMINÉE : {self.stats} ===")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compaction du store de cotes (déduplication, rétention, export CSV).")
+    parser.add_argument("--league", type=str, help="Code de la ligue à compacter (ex: ENG1).")
+    parser.add_argument("--no-csv", action="store_true",
+                        help="N'écrit pas l'export CSV {league}_complete_odds.csv (store Parquet seulement).")
+    args = parser.parse_args()
+    setup_logging(args.league)
+
+    store = OddsStore()
+    leagues = [args.league] if args.league else store.leagues()
+    OddsCompactor(store, export_csv=ODDS_EXPORT_CSV and not args.no_csv).run(leagues)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Cube de cotes par bookmaker, projeté en mémoire (memory-mapped).
+
+Rôle :
+- Garde le détail par bookmaker que les matrices de caractéristiques moyennent :
+  un tableau `float32` de forme (match × marché × bookmaker) dans `odds.npy`
+  (NaN quand le bookmaker ne cote pas ce marché), ouvert avec `mmap_mode='r'`.
+  Seules les pages lues sont chargées en RAM, quel que soit le nombre de saisons.
+- Fichiers d'index à côté du cube :
+  - `fixtures.csv` : fixture_id, fixture_date, league_code (axe 0, trié par date) ;
+  - `markets.csv` : identifiant "<type de pari>_<valeur>" (axe 1, voir `bet_identifier_column`) ;
+  - `bookmakers.csv` : bookmaker_id, bookmaker_name (axe 2).
+- Les requêtes par bookmaker sont des vues sans copie (`fixture_odds`, `market_odds`,
+  `bookmaker_odds`, `bookmaker_history`, `date_range`) ; `best_price` et `spread`
+  réduisent l'axe bookmaker sans recharger les CSV bruts.
+- Seuls les types de paris `ODDS_CUBE_BET_TYPES` sont gardés (les marchés exotiques,
+  scores exacts et paris joueurs, rendraient le cube creux et énorme).
+
+Usage : python -m src.data_processing.odds_cube [--league ENG1 --league FRA1]
+"""
+import argparse
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import ALL_LEAGUES, ODDS_CUBE_BET_TYPES, ODDS_CUBE_DIR
+from src.data_processing.file_io import file_lock, write_csv
+from src.data_processing.odds_store import OddsStore, bet_identifier_column, load_odds
+
+logger = logging.getLogger(__name__)
+
+CUBE_FILE = 'odds.npy'
+FIXTURES_FILE = 'fixtures.csv'
+MARKETS_FILE = 'markets.csv'
+BOOKMAKERS_FILE = 'bookmakers.csv'
+
+INDEX_COLUMNS = ['fixture_id', 'fixture_date', 'bookmaker_id', 'bookmaker_name', 'bet_type_name', 'bet_value']
+
+
+def _load_league(league_code: str, columns: List[str], bet_types: Optional[List[str]],
+                 store: OddsStore) -> pd.DataFrame:
+    df = load_odds([league_code], columns=columns, store=store)
+    if df.empty:
+        return df
+    if bet_types is not None:
+        df = df[df['bet_type_name'].isin(bet_types)]
+    df = df.dropna(subset=['fixture_id', 'bookmaker_id', 'bet_type_name', 'bet_value'])
+    df = df.assign(market=bet_identifier_column(df))
+    return df[df['market'].notna()]
+
+
+def build_cube(leagues: Iterable[str], cube_dir: str = ODDS_CUBE_DIR,
+               bet_types: Optional[List[str]] = ODDS_CUBE_BET_TYPES,
+               store: Optional[OddsStore] = None) -> 'OddsCube':
+    """
+    Construit le cube en deux passages ligue par ligue : les colonnes d'index d'abord
+    (dimensions du cube), puis les cotes, écrites directement dans le fichier projeté.
+    Quand une cote apparaît plusieurs fois (store non compacté), la plus récente l'emporte.
+    """
+    store = store or OddsStore()
+    leagues = list(leagues)
+
+    fixtures, markets, bookmakers = [], [], []
+    for league_code in leagues:
+        df = _load_league(league_code, INDEX_COLUMNS, bet_types, store)
+        if df.empty:
+            continue
+        fixtures.append(df.groupby('fixture_id')['fixture_date'].min().reset_index().assign(league_code=league_code))
+        markets.append(df[['market', 'bet_type_name', 'bet_value']].astype(str).drop_duplicates())
+        bookmakers.append(df[['bookmaker_id', 'bookmaker_name']].astype({'bookmaker_name': str}).drop_duplicates())
+    if not fixtures:
+        raise ValueError(f"Aucune cote à mettre dans le cube pour {leagues}")
+
+    fixtures_df = (pd.concat(fixtures, ignore_index=True).drop_duplicates('fixture_id')
+                     .sort_values(['fixture_date', 'fixture_id'], kind='stable').reset_index(drop=True))
+    markets_df = pd.concat(markets, ignore_index=True).drop_duplicates('market').sort_values('market').reset_index(drop=True)
+    bookmakers_df = (pd.concat(bookmakers, ignore_index=True).drop_duplicates('bookmaker_id')
+                       .sort_values('bookmaker_id').reset_index(drop=True))
+    fixture_index = pd.Index(fixtures_df['fixture_id'])
+    market_index = pd.Index(markets_df['market'])
+    bookmaker_index = pd.Index(bookmakers_df['bookmaker_id'])
+    shape = (len(fixture_index), len(market_index), len(bookmaker_index))
+
+    os.makedirs(cube_dir, exist_ok=True)
+    cube_path = os.path.join(cube_dir, CUBE_FILE)
+    tmp_path = cube_path + '.tmp'
+    with file_lock(cube_dir):
+        cube = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=shape)
+        cube[:] = np.nan
+        for league_code in leagues:
+            df = _load_league(league_code, INDEX_COLUMNS + ['odd', 'collected_at'], bet_types, store)
+            if df.empty:
+                continue
+            df = df.dropna(subset=['odd']).sort_values('collected_at', kind='stable')
+            # Une seule cote par emplacement, la plus récente : l'ordre d'une affectation
+            # NumPy avec indices répétés n'est pas garanti
+            df = df.drop_duplicates(subset=['fixture_id', 'market', 'bookmaker_id'], keep='last')
+            cube[fixture_index.get_indexer(df['fixture_id']),
+                 market_index.get_indexer(df['market'].astype(str)),
+                 bookmaker_index.get_indexer(df['bookmaker_id'])] = df['odd'].to_numpy(dtype=np.float32)
+            logger.info(f"🧊 {league_code}: {len(df)} cotes placées dans le cube")
+        cube.flush()
+        del cube
+        os.replace(tmp_path, cube_path)
+        fixtures_df = fixtures_df.assign(fixture_date=fixtures_df['fixture_date'].dt.strftime('%Y-%m-%dT%H:%M:%S+00:00'))
+        write_csv(fixtures_df, os.path.join(cube_dir, FIXTURES_FILE))
+        write_csv(markets_df, os.path.join(cube_dir, MARKETS_FILE))
+        write_csv(bookmakers_df, os.path.join(cube_dir, BOOKMAKERS_FILE))
+    logger.info(f"💾 Cube de cotes écrit dans {cube_dir}: {shape[0]} matchs × {shape[1]} marchés × "
+                f"{shape[2]} bookmakers ({os.path.getsize(cube_path) / 1e6:.1f} Mo)")
+    return OddsCube(cube_dir)
+
+
+def _utc(value) -> pd.Timestamp:
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+
+
+class OddsCube:
+    """Lecture du cube (match × marché × bookmaker) et de ses index, sans charger les cotes en RAM."""
+
+    def __init__(self, cube_dir: str = ODDS_CUBE_DIR):
+        self.cube_dir = cube_dir
+        # Verrou pendant l'ouverture : le cube et ses index viennent de la même construction
+        with file_lock(cube_dir):
+            self.odds = np.load(os.path.join(cube_dir, CUBE_FILE), mmap_mode='r')
+            self.fixtures = pd.read_csv(os.path.join(cube_dir, FIXTURES_FILE))
+            self.markets = pd.read_csv(os.path.join(cube_dir, MARKETS_FILE), dtype=str)
+            self.bookmakers = pd.read_csv(os.path.join(cube_dir, BOOKMAKERS_FILE))
+        self.fixtures['fixture_date'] = pd.to_datetime(self.fixtures['fixture_date'], utc=True, format='ISO8601')
+        self.fixture_index = pd.Index(self.fixtures['fixture_id'])
+        self.market_index = pd.Index(self.markets['market'])
+        self.bookmaker_index = pd.Index(self.bookmakers['bookmaker_id'])
+
+    @property
+    def shape(self):
+        return self.odds.shape
+
+    def _position(self, index: pd.Index, key, label: str) -> int:
+        try:
+            return index.get_loc(key)
+        except KeyError:
+            raise KeyError(f"{label} absent du cube: {key}") from None
+
+    # --- Vues sans copie ---
+
+    def fixture_odds(self, fixture_id: int) -> np.ndarray:
+        """Cotes d'un match, forme (marché × bookmaker)."""
+        return self.odds[self._position(self.fixture_index, fixture_id, 'Match')]
+
+    def market_odds(self, market: str) -> np.ndarray:
+        """Cotes d'un marché, forme (match × bookmaker)."""
+        return self.odds[:, self._position(self.market_index, market, 'Marché')]
+
+    def bookmaker_odds(self, bookmaker_id: int) -> np.ndarray:
+        """Cotes d'un bookmaker, forme (match × marché)."""
+        return self.odds[:, :, self._position(self.bookmaker_index, bookmaker_id, 'Bookmaker')]
+
+    def bookmaker_history(self, bookmaker_id: int, market: str) -> pd.Series:
+        """Historique d'un bookmaker sur un marché, indexé par fixture_id (dans l'ordre des dates)."""
+        values = self.odds[:, self._position(self.market_index, market, 'Marché'),
+                           self._position(self.bookmaker_index, bookmaker_id, 'Bookmaker')]
+        return pd.Series(values, index=self.fixture_index, name=market, copy=False)
+
+    def date_range(self, start=None, end=None) -> slice:
+        """Tranche de l'axe match couvrant [start, end] (les matchs sont triés par date)."""
+        dates = self.fixtures['fixture_date']
+        lo = 0 if start is None else int(dates.searchsorted(_utc(start), side='left'))
+        hi = len(dates) if end is None else int(dates.searchsorted(_utc(end), side='right'))
+        return slice(lo, hi)
+
+    # --- Agrégats sur l'axe bookmaker ---
+
+    def _reduce(self, ufunc: np.ufunc, market: Optional[str], rows: slice):
+        # fmax / fmin ignorent les NaN et renvoient NaN quand aucun bookmaker ne cote
+        odds = self.odds[rows] if market is None else self.market_odds(market)[rows]
+        return ufunc.reduce(odds, axis=-1)
+
+    def _frame(self, values: np.ndarray, market: Optional[str], rows: slice):
+        fixture_ids = self.fixture_index[rows]
+        if market is not None:
+            return pd.Series(values, index=fixture_ids, name=market)
+        return pd.DataFrame(values, index=fixture_ids, columns=self.market_index)
+
+    def best_price(self, market: Optional[str] = None, rows: slice = slice(None)):
+        """Meilleure cote par match (et par marché si `market` n'est pas donné)."""
+        return self._frame(self._reduce(np.fmax, market, rows), market, rows)
+
+    def spread(self, market: Optional[str] = None, rows: slice = slice(None)):
+        """Écart entre la meilleure et la moins bonne cote des bookmakers."""
+        values = self._reduce(np.fmax, market, rows) - self._reduce(np.fmin, market, rows)
+        return self._frame(values, market, rows)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Construit le cube de cotes par bookmaker (match × marché × bookmaker).")
+    parser.add_argument("--league", action="append", help="Code de ligue à inclure (répétable, toutes par défaut).")
+    args = parser.parse_args()
+    build_cube(args.league or list(ALL_LEAGUES))
+
+
+if __name__ == "__main__":
+    main()
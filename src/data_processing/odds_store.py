@@ -0,0 +1,368 @@
+"""
+Stockage colonnaire partitionné des cotes historiques.
+
+Rôle :
+- Range les cotes en fichiers Parquet sous
+  `data/odds/store/league=<CODE>/month=<AAAA-MM>/part-*.parquet`
+  (partition par ligue et par mois du match).
+- Colonnes typées : identifiants entiers, cotes flottantes, dates `datetime64`,
+  chaînes répétées (bookmaker, type de pari, valeur) en `category`.
+- L'ingestion est en ajout seul : chaque passage écrit un nouveau segment dans
+  les partitions concernées, sans relire ni réécrire l'historique.
+- La déduplication (clé `ODDS_KEY_COLUMNS`) et la suppression des cotes expirées
+  sont faites à part par `compact` (voir `src.data_processing.odds_compaction`).
+- Les lectures ne parcourent que les partitions demandées (ligues, mois) et
+  seulement les colonnes utiles.
+- L'export CSV `{league}_complete_odds.csv` reste disponible pour le site et les
+  outils existants (`ODDS_EXPORT_CSV`).
+
+Les ligues qui n'ont pas encore de partitions sont lues depuis leur CSV
+(et importées dans le store au premier passage du mainteneur de cotes).
+"""
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.api.odds_decoder import ODDS_COLUMNS
+from src.config import ODDS_DATA_DIR, ODDS_STORE_DIR
+from src.data_processing.catalog import record_frame, record_parquet
+from src.data_processing.file_io import file_lock, write_csv
+
+logger = logging.getLogger(__name__)
+
+# Clé d'unicité d'une cote
+ODDS_KEY_COLUMNS = ['fixture_id', 'bookmaker_id', 'bet_type_id', 'bet_value']
+
+# Chaînes très répétées : stockées en `category` (un code entier par ligne)
+CATEGORY_COLUMNS = ['bookmaker_name', 'bet_type_name', 'bet_value']
+# Petits identifiants entiers (bookmakers, types de paris)
+SMALL_ID_COLUMNS = ['bookmaker_id', 'bet_type_id']
+
+
+def encode_odds_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applique la représentation mémoire compacte aux colonnes présentes :
+    chaînes en `category`, identifiants entiers, cotes flottantes, dates `datetime64`.
+    """
+    if 'fixture_id' in df.columns:
+        fixture_ids = pd.to_numeric(df['fixture_id'], errors='coerce').astype('Int64')
+        # Entiers numpy quand il n'y a pas de valeur manquante (index des matrices de caractéristiques)
+        df['fixture_id'] = fixture_ids if fixture_ids.hasnans else fixture_ids.astype('int64')
+    for column in SMALL_ID_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int16')
+    if 'odd' in df.columns:
+        df['odd'] = pd.to_numeric(df['odd'], errors='coerce').astype('float64')
+    if 'fixture_date' in df.columns and not isinstance(df['fixture_date'].dtype, pd.DatetimeTZDtype):
+        df['fixture_date'] = pd.to_datetime(df['fixture_date'], utc=True, errors='coerce', format='ISO8601')
+    if 'collected_at' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['collected_at']):
+        df['collected_at'] = pd.to_datetime(df['collected_at'].astype('string'), errors='coerce', format='ISO8601')
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+
+def concat_odds_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatène des DataFrames de cotes en gardant les colonnes `category`
+    (pandas repasse en `object` quand les catégories diffèrent d'un morceau à l'autre).
+    """
+    if len(frames) == 1:
+        return frames[0]
+    for column in frames[0].columns:
+        if not isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            continue
+        categories = pd.api.types.union_categoricals(
+            [frame[column].cat.remove_unused_categories() for frame in frames if column in frame.columns]
+        ).categories
+        for frame in frames:
+            if column in frame.columns:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def bet_identifier_column(df: pd.DataFrame) -> pd.Categorical:
+    """
+    Identifiant "<type de pari>_<valeur>" construit à partir des codes des deux colonnes
+    `category` : une chaîne par combinaison distincte et non par ligne.
+    Donne le même libellé que `astype(str) + '_' + astype(str)`, y compris quand
+    le type ou la valeur manque (ex. "None_Home").
+    """
+    bet_types = df['bet_type_name'].astype('category')
+    bet_values = df['bet_value'].astype('category')
+    type_codes = bet_types.cat.codes.to_numpy()
+    value_codes = bet_values.cat.codes.to_numpy()
+    valid = (type_codes != -1) & (value_codes != -1)
+    pair_codes, pairs = pd.factorize(pd.MultiIndex.from_arrays([type_codes[valid], value_codes[valid]]))
+    labels = (bet_types.cat.categories.astype(str).to_numpy(dtype=object)[pairs.get_level_values(0).to_numpy()] + '_'
+              + bet_values.cat.categories.astype(str).to_numpy(dtype=object)[pairs.get_level_values(1).to_numpy()])
+    # Type ou valeur manquant : libellé construit ligne à ligne, comme la concaténation de chaînes
+    missing = ~valid
+    missing_labels = (df['bet_type_name'][missing].astype(str) + '_'
+                      + df['bet_value'][missing].astype(str)).to_numpy(dtype=object)
+    # Plusieurs couples peuvent donner le même libellé (ex. "1" et 1 selon la source)
+    unique_labels, label_codes = np.unique(np.concatenate([labels, missing_labels]).astype(str), return_inverse=True)
+    codes = np.empty(len(df), dtype=np.int64)
+    codes[valid] = label_codes[:len(labels)][pair_codes]
+    codes[missing] = label_codes[len(labels):]
+    return pd.Categorical.from_codes(codes, categories=unique_labels)
+
+
+def normalize_odds_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convertit un DataFrame de cotes (CSV ou API) vers les types du store."""
+    df = encode_odds_frame(df.reindex(columns=ODDS_COLUMNS))
+    return df.dropna(subset=['fixture_id', 'fixture_date'])
+
+
+def to_csv_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Remet les dates au format texte ISO utilisé par les fichiers CSV historiques."""
+    df = df[ODDS_COLUMNS].copy()
+    df['fixture_date'] = df['fixture_date'].dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    df['collected_at'] = df['collected_at'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+    return df
+
+
+class OddsStore:
+    """Store Parquet des cotes partitionné par ligue et mois de match."""
+
+    def __init__(self, root: str = ODDS_STORE_DIR):
+        self.root = root
+
+    # --- Partitions ---
+
+    def league_dir(self, league_code: str) -> str:
+        return os.path.join(self.root, f"league={league_code}")
+
+    def partition_dir(self, league_code: str, month: str) -> str:
+        return os.path.join(self.league_dir(league_code), f"month={month}")
+
+    def leagues(self) -> List[str]:
+        """Codes des ligues présentes dans le store."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[len('league='):] for name in os.listdir(self.root) if name.startswith('league='))
+
+    def lock(self, league_code: str):
+        """Verrou inter-processus des partitions d'une ligue (`league=<CODE>/league.lock`)."""
+        return file_lock(os.path.join(self.league_dir(league_code), 'league'))
+
+    def has_league(self, league_code: str) -> bool:
+        return bool(self.partitions(league_code))
+
+    def partitions(self, league_code: str, start_month: Optional[str] = None,
+                   end_month: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Liste triée des (mois, dossier) d'une ligue, bornée si demandé."""
+        league_dir = self.league_dir(league_code)
+        if not os.path.isdir(league_dir):
+            return []
+        partitions = []
+        for name in sorted(os.listdir(league_dir)):
+            if not name.startswith('month='):
+                continue
+            month = name[len('month='):]
+            if (start_month and month < start_month) or (end_month and month > end_month):
+                continue
+            partitions.append((month, os.path.join(league_dir, name)))
+        return partitions
+
+    @staticmethod
+    def partition_files(partition_dir: str) -> List[str]:
+        return [os.path.join(partition_dir, name) for name in sorted(os.listdir(partition_dir))
+                if name.endswith('.parquet')]
+
+    # --- Écriture ---
+
+    def _write_file(self, df: pd.DataFrame, partition_dir: str) -> str:
+        os.makedirs(partition_dir, exist_ok=True)
+        name = f"part-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(partition_dir, name)
+        tmp_path = path + '.tmp'
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def append(self, league_code: str, df: pd.DataFrame) -> int:
+        """Ajoute un segment de cotes dans chaque partition mensuelle concernée. Renvoie le nombre de lignes."""
+        df = normalize_odds_frame(df)
+        if df.empty:
+            return 0
+        months = df['fixture_date'].dt.strftime('%Y-%m')
+        with self.lock(league_code):
+            for month, month_df in df.groupby(months, sort=True):
+                self._write_file(month_df.reset_index(drop=True), self.partition_dir(league_code, month))
+            record_parquet(self.league_dir(league_code), 'fixture_date')
+        return len(df)
+
+    def rewrite_partition(self, league_code: str, month: str, df: pd.DataFrame) -> None:
+        """Remplace le contenu d'une partition (supprimée si `df` est vide)."""
+        partition_dir = self.partition_dir(league_code, month)
+        with self.lock(league_code):
+            old_files = self.partition_files(partition_dir) if os.path.isdir(partition_dir) else []
+            if not df.empty:
+                self._write_file(df.reset_index(drop=True), partition_dir)
+            for path in old_files:
+                os.remove(path)
+            if df.empty and os.path.isdir(partition_dir) and not os.listdir(partition_dir):
+                os.rmdir(partition_dir)
+
+    def compact(self, league_code: str, cutoff: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Compacte les partitions d'une ligue : fusionne les segments ajoutés par l'ingestion,
+        déduplique sur `ODDS_KEY_COLUMNS` (la collecte la plus récente l'emporte) et supprime
+        les cotes des matchs antérieurs à `cutoff`.
+        Les partitions antérieures au mois de `cutoff` sont supprimées en bloc, sans être relues ;
+        seules la partition frontière et les partitions à plusieurs segments sont relues.
+        La ligue reste verrouillée pendant la compaction : un segment ajouté en parallèle
+        attend la fin de la réécriture au lieu d'être supprimé avec les anciens segments.
+        """
+        stats = {'partitions_compacted': 0, 'duplicates_removed': 0, 'records_pruned': 0}
+        if cutoff is not None:
+            cutoff = pd.Timestamp(cutoff)
+            cutoff = cutoff.tz_localize('UTC') if cutoff.tzinfo is None else cutoff.tz_convert('UTC')
+        cutoff_month = cutoff.strftime('%Y-%m') if cutoff is not None else None
+
+        with self.lock(league_code):
+            for month, partition_dir in self.partitions(league_code):
+                files = self.partition_files(partition_dir)
+                if cutoff_month is not None and month < cutoff_month:
+                    stats['records_pruned'] += sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+                    shutil.rmtree(partition_dir)
+                    stats['partitions_compacted'] += 1
+                    continue
+                n_segments = len(files)
+                expired = month == cutoff_month
+                if n_segments <= 1 and not expired:
+                    continue
+                df = self._read_partition(partition_dir)
+                n_rows = len(df)
+                if expired:
+                    df = df[df['fixture_date'] >= cutoff]
+                    stats['records_pruned'] += n_rows - len(df)
+                if n_segments > 1:
+                    n_before_dedup = len(df)
+                    df = (df.sort_values('collected_at', kind='stable')
+                            .drop_duplicates(subset=ODDS_KEY_COLUMNS, keep='last')
+                            .sort_values(['fixture_date', 'fixture_id'], kind='stable'))
+                    stats['duplicates_removed'] += n_before_dedup - len(df)
+                if n_segments > 1 or len(df) < n_rows:
+                    self.rewrite_partition(league_code, month, df)
+                    stats['partitions_compacted'] += 1
+            if stats['partitions_compacted'] and os.path.isdir(self.league_dir(league_code)):
+                record_parquet(self.league_dir(league_code), 'fixture_date')
+        return stats
+
+    def import_csv(self, league_code: str, csv_path: str) -> int:
+        """Importe un fichier CSV historique dans le store si la ligue n'y est pas encore."""
+        with self.lock(league_code):
+            if self.has_league(league_code) or not os.path.exists(csv_path):
+                return 0
+            rows = self.append(league_code, pd.read_csv(csv_path))
+        logger.info(f"📦 {league_code}: {rows} cotes importées depuis {csv_path} dans {self.league_dir(league_code)}")
+        return rows
+
+    def export_csv(self, league_code: str, csv_path: str) -> int:
+        """Écrit toutes les cotes d'une ligue dans un CSV au format historique."""
+        df = self.read([league_code])
+        csv_df = to_csv_frame(df)
+        write_csv(csv_df, csv_path)
+        record_frame(csv_path, csv_df, 'fixture_date')
+        return len(df)
+
+    # --- Lecture ---
+
+    @staticmethod
+    def _read_partition(partition_dir: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return OddsStore.read_files(OddsStore.partition_files(partition_dir), columns)
+
+    @staticmethod
+    def read_files(paths: List[str], columns: Optional[List[str]] = None,
+                   fixture_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """Lit des segments, limités aux matchs `fixture_ids` si demandé (filtre appliqué par pyarrow)."""
+        filters = [('fixture_id', 'in', [int(fixture_id) for fixture_id in fixture_ids])] if fixture_ids is not None else None
+        frames = [encode_odds_frame(pd.read_parquet(path, columns=columns, filters=filters)) for path in paths]
+        if not frames:
+            return pd.DataFrame(columns=columns or ODDS_COLUMNS)
+        return concat_odds_frames(frames)
+
+    def read(self, leagues: Iterable[str], columns: Optional[List[str]] = None,
+             start_month: Optional[str] = None, end_month: Optional[str] = None,
+             add_league_code: bool = False) -> pd.DataFrame:
+        """Lit les cotes des ligues demandées, en ne parcourant que les partitions et colonnes utiles."""
+        frames = []
+        for league_code in leagues:
+            for _, partition_dir in self.partitions(league_code, start_month, end_month):
+                df = self._read_partition(partition_dir, columns)
+                if add_league_code:
+                    df['league_code'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[league_code])
+                frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=(columns or ODDS_COLUMNS) + (['league_code'] if add_league_code else []))
+        return concat_odds_frames(frames)
+
+    def fixture_ids(self, league_code: str) -> Set[int]:
+        """Identifiants des matchs déjà présents pour une ligue (lecture d'une seule colonne)."""
+        df = self.read([league_code], columns=['fixture_id'])
+        return set(df['fixture_id'].dropna().astype(int))
+
+
+def odds_source_units(leagues: Iterable[str], store: Optional[OddsStore] = None,
+                      csv_dir: str = ODDS_DATA_DIR) -> Dict[str, List[str]]:
+    """
+    Fichiers que `load_odds` lirait pour ces ligues, groupés par unité de lecture :
+    une entrée par partition du store (dossier → segments), sinon le CSV de la ligue
+    (chemin → [chemin]). Un match n'appartient qu'à une seule unité.
+    """
+    store = store or OddsStore()
+    units = {}
+    for league_code in leagues:
+        partitions = store.partitions(league_code)
+        if partitions:
+            for _, partition_dir in partitions:
+                units[partition_dir] = store.partition_files(partition_dir)
+        else:
+            csv_path = os.path.join(csv_dir, f"{league_code}_complete_odds.csv")
+            if os.path.exists(csv_path):
+                units[csv_path] = [csv_path]
+    return units
+
+
+def read_odds_csv(csv_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Lit un CSV de cotes historique avec les types du store."""
+    df = pd.read_csv(csv_path, usecols=columns, low_memory=False,
+                     dtype={column: 'category' for column in CATEGORY_COLUMNS})
+    return encode_odds_frame(df)
+
+
+def load_odds(leagues: Iterable[str], columns: Optional[List[str]] = None,
+              store: Optional[OddsStore] = None, csv_dir: str = ODDS_DATA_DIR) -> pd.DataFrame:
+    """
+    Charge les cotes historiques des ligues demandées avec une colonne `league_code`.
+    Lit le store partitionné quand la ligue y est, sinon le CSV `{league}_complete_odds.csv`.
+    Les chaînes sont chargées en `category` et les dates en `datetime64` (voir `encode_odds_frame`).
+    """
+    store = store or OddsStore()
+    frames = []
+    for league_code in leagues:
+        if store.has_league(league_code):
+            df = store.read([league_code], columns=columns)
+        else:
+            csv_path = os.path.join(csv_dir, f"{league_code}_complete_odds.csv")
+            if not os.path.exists(csv_path):
+                continue
+            df = read_odds_csv(csv_path, columns)
+        if df.empty:
+            continue
+        df['league_code'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[league_code])
+        frames.append(df)
+        logger.info(f"📂 {league_code}: {len(df)} cotes chargées")
+    if not frames:
+        return pd.DataFrame()
+    return concat_odds_frames(frames)
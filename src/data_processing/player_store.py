@@ -0,0 +1,119 @@
+"""
+Stockage compressé et typé des données joueurs.
+
+Rôle :
+- Stats joueurs, compositions et effectifs sont rangés par ligue en Parquet
+  compressé (zstd) : `data/players/<dataset>/<LIGUE>_<suffixe>.parquet`.
+- Colonnes typées : identifiants et compteurs en entiers nullables (`Int32`, `Int16`,
+  une statistique absente reste manquante au lieu de passer la colonne en flottants),
+  note en `Float32`, booléens nullables, chaînes répétées (noms, ligue, poste, date)
+  en `category`.
+- Les anciens CSV sont lus tant que le Parquet n'existe pas, puis supprimés au
+  premier enregistrement (sauf `PLAYERS_EXPORT_CSV`, qui continue de les écrire).
+
+Les collecteurs passent par `read_players` / `write_players` ; l'écriture est
+atomique et verrouillée comme les autres fichiers de données (`file_io`).
+"""
+import logging
+import os
+from typing import Dict, List
+
+import pandas as pd
+
+from src.config import PLAYERS_DATA_DIR, PLAYERS_EXPORT_CSV
+from src.data_processing.catalog import record_frame
+from src.data_processing.file_io import atomic_write, file_lock, write_csv
+
+logger = logging.getLogger(__name__)
+
+# Dossier et suffixe de fichier de chaque jeu de données (mêmes noms que les tables de l'entrepôt)
+PLAYER_DATASETS: Dict[str, tuple] = {
+    'player_stats': ('player_stats', 'players'),
+    'match_lineups': ('match_lineups', 'lineups'),
+    'team_rosters': ('team_rosters', 'rosters'),
+}
+
+PARQUET_COMPRESSION = 'zstd'
+
+_COUNT_COLUMNS = [
+    'minutes', 'shirt_number', 'goals_scored', 'goals_conceded', 'assists', 'saves',
+    'shots_total', 'shots_on_target', 'passes_total', 'passes_key', 'passes_accuracy',
+    'tackles_total', 'blocks', 'interceptions', 'duels_total', 'duels_won',
+    'dribbles_attempts', 'dribbles_success', 'dribbles_past', 'fouls_drawn', 'fouls_committed',
+    'yellow_cards', 'red_cards', 'penalty_won', 'penalty_committed', 'penalty_scored',
+    'penalty_missed', 'penalty_saved', 'offsides', 'team_1_players_count', 'team_2_players_count',
+]
+
+# Type de chaque colonne connue ; les autres colonnes sont gardées telles quelles
+PLAYER_DTYPES: Dict[str, str] = {
+    **{column: 'Int32' for column in ['fixture_id', 'player_id', 'team_id', 'team_1_id', 'team_2_id']},
+    **{column: 'Int16' for column in _COUNT_COLUMNS},
+    'rating': 'Float32',
+    'captain': 'boolean',
+    'substitute': 'boolean',
+    **{column: 'category' for column in ['league_code', 'match_date', 'player_name', 'team_name', 'position',
+                                          'home_team', 'away_team', 'team_1_name', 'team_2_name']},
+}
+
+
+def encode_players_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Applique les types compacts de `PLAYER_DTYPES` aux colonnes présentes."""
+    df = df.copy()
+    for column, dtype in PLAYER_DTYPES.items():
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        values = df[column]
+        if dtype == 'category':
+            df[column] = values.astype('string').astype('category')
+        elif dtype == 'boolean':
+            if not pd.api.types.is_bool_dtype(values):
+                # True/False couvrent aussi 1/0 (clés égales en Python)
+                values = values.map({True: True, False: False, 'True': True, 'False': False,
+                                     'true': True, 'false': False})
+            df[column] = values.astype('boolean')
+        else:
+            df[column] = pd.to_numeric(values, errors='coerce').astype(dtype)
+    return df
+
+
+def players_path(dataset: str, league_code: str, players_dir: str = PLAYERS_DATA_DIR,
+                 extension: str = 'parquet') -> str:
+    folder, suffix = PLAYER_DATASETS[dataset]
+    return os.path.join(players_dir, folder, f"{league_code}_{suffix}.{extension}")
+
+
+def data_files(folder: str) -> List[str]:
+    """Fichiers de données d'un dossier joueurs : les Parquet, et les CSV pas encore convertis."""
+    names = set(os.listdir(folder)) if os.path.isdir(folder) else set()
+    return sorted(name for name in names if name.endswith('.parquet')
+                  or (name.endswith('.csv') and name[:-len('.csv')] + '.parquet' not in names))
+
+
+def read_players(dataset: str, league_code: str, players_dir: str = PLAYERS_DATA_DIR) -> pd.DataFrame:
+    """Charge un jeu de données joueurs d'une ligue (Parquet, sinon ancien CSV). DataFrame vide s'il n'existe pas."""
+    path = players_path(dataset, league_code, players_dir)
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    csv_path = players_path(dataset, league_code, players_dir, 'csv')
+    if os.path.exists(csv_path):
+        return encode_players_frame(pd.read_csv(csv_path))
+    return pd.DataFrame()
+
+
+def write_players(dataset: str, league_code: str, df: pd.DataFrame, players_dir: str = PLAYERS_DATA_DIR) -> str:
+    """Enregistre un jeu de données joueurs d'une ligue en Parquet compressé. Renvoie le chemin écrit."""
+    path = players_path(dataset, league_code, players_dir)
+    csv_path = players_path(dataset, league_code, players_dir, 'csv')
+    df = encode_players_frame(df).reset_index(drop=True)
+    with file_lock(path):
+        with atomic_write(path, mode='wb') as f:
+            df.to_parquet(f, index=False, compression=PARQUET_COMPRESSION)
+        record_frame(path, df, 'match_date')
+        if PLAYERS_EXPORT_CSV:
+            write_csv(df, csv_path)
+            record_frame(csv_path, df, 'match_date')
+        elif os.path.exists(csv_path):
+            # Ancien format remplacé par le Parquet
+            os.remove(csv_path)
+            logger.info(f"🗜️ {csv_path} remplacé par {path}")
+    return path
@@ -4,7 +4,7 @@ leurs résultats de match réels.
 
 Rôle :
 - Charge l'historique complet des prédictions Elo.
-- Charge les données de tous les matchs joués.
+- Charge les scores de tous les matchs joués (entrepôt SQLite s'il est activé, CSV sinon).
 - Fusionne ces deux ensembles de données en se basant sur l'ID du match (fixture_id).
 - Filtre pour ne garder que les matchs qui ont à la fois une prédiction et un résultat.
 - Sauvegarde ce jeu de données complet dans `historical_elo_predictions_with_results.csv`.
@@ -14,10 +14,12 @@ nécessaires au script `elo_summary.py` pour analyser la performance du modèle.
 """
 import pandas as pd
 import numpy as np
-import os
-import glob
 import logging
 
+from src.data_processing.catalog import record_frame
+from src.data_processing.file_io import write_csv
+from src.data_processing.warehouse import load_dataset, load_matches
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -36,27 +38,27 @@ def update_predictions_with_results():
     # --- Chargement des données ---
 
     # Charger les prédictions historiques
-    if not os.path.exists(predictions_path):
-        logger.error(f"Fichier des prédictions historiques non trouvé: {predictions_path}")
-        return
     try:
-        predictions_df = pd.read_csv(predictions_path)
-        logger.info(f"✅ {len(predictions_df)} prédictions historiques chargées.")
+        predictions_df = load_dataset('elo_predictions', predictions_path)
     except Exception as e:
         logger.error(f"Erreur lors du chargement de {predictions_path}: {e}")
         return
-
-    # Charger tous les résultats de matchs
-    match_files = glob.glob(os.path.join(matches_dir, '*.csv'))
-    if not match_files:
-        logger.error(f"Aucun fichier de match trouvé dans: {matches_dir}")
+    if predictions_df.empty:
+        logger.error(f"Fichier des prédictions historiques non trouvé: {predictions_path}")
         return
+    logger.info(f"✅ {len(predictions_df)} prédictions historiques chargées.")
+
+    # Charger les scores de tous les matchs (seulement les colonnes utiles)
     try:
-        matches_df = pd.concat((pd.read_csv(f) for f in match_files), ignore_index=True)
-        logger.info(f"✅ {len(matches_df)} résultats de matchs chargés depuis {len(match_files)} fichiers.")
+        matches_df = load_matches(columns=['fixture_id', 'home_goals_fulltime', 'away_goals_fulltime',
+                                           'home_goals', 'away_goals'], matches_dir=matches_dir)
     except Exception as e:
-        logger.error(f"Erreur lors de la concaténation des fichiers de matchs: {e}")
+        logger.error(f"Erreur lors du chargement des matchs: {e}")
+        return
+    if matches_df.empty:
+        logger.error(f"Aucun fichier de match trouvé dans: {matches_dir}")
         return
+    logger.info(f"✅ {len(matches_df)} résultats de matchs chargés.")
 
     # --- Fusion et traitement ---
 
@@ -90,8 +92,8 @@ def update_predictions_with_results():
 
     # --- Sauvegarde ---
     try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        final_df.to_csv(output_path, index=False)
+        write_csv(final_df, output_path)
+        record_frame(output_path, final_df)
         logger.info(f"💾 Fichier de résultats combinés sauvegardé dans: {output_path}")
     except Exception as e:
         logger.error(f"Erreur lors de la sauvegarde du fichier final: {e}")
@@ -0,0 +1,49 @@
+"""
+Fenêtre de rétention des données (`DATA_RETENTION_DAYS`, 365 jours par défaut).
+
+Rôle :
+- Calcule la date limite commune aux collecteurs (matchs, joueurs, cotes).
+- Applique la rétention par mois entiers : les mois antérieurs au mois de la
+  date limite sont supprimés en bloc, les mois postérieurs gardés en bloc, et
+  seules les lignes du mois frontière sont converties en dates et filtrées.
+  Le mois est lu dans les 7 premiers caractères de la date ISO, sans conversion.
+
+Le store de cotes (`odds_store`) applique la même règle à ses partitions
+mensuelles : les dossiers expirés sont supprimés sans être relus.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+import pandas as pd
+
+from src.config import DATA_RETENTION_DAYS
+
+
+def retention_cutoff(retention_days: int = DATA_RETENTION_DAYS, today: Optional[date] = None) -> date:
+    """Premier jour conservé."""
+    return (today or date.today()) - timedelta(days=retention_days)
+
+
+def month_keys(dates: pd.Series) -> pd.Series:
+    """Mois 'AAAA-MM' de chaque date (texte ISO, `date` ou `datetime`) ; NaN si la date manque."""
+    # Sans masque, une date manquante deviendrait 'None' ou 'nan', classés après tous les mois
+    return dates.astype(str).str[:7].where(dates.notna())
+
+
+def drop_expired_months(df: pd.DataFrame, date_column: str, cutoff: date) -> pd.DataFrame:
+    """
+    Supprime les lignes antérieures à `cutoff`.
+    Seules les lignes du mois de `cutoff` sont converties en dates ; les lignes sans
+    date lisible sont supprimées, comme avec une comparaison de dates classique.
+    """
+    if df.empty or date_column not in df.columns:
+        return df
+    months = month_keys(df[date_column])
+    cutoff_month = cutoff.strftime('%Y-%m')
+    keep = (months.notna() & (months > cutoff_month)).to_numpy(copy=True)
+    boundary = (months == cutoff_month).to_numpy()
+    if boundary.any():
+        boundary_dates = pd.to_datetime(df.loc[boundary, date_column].astype(str), utc=True,
+                                        errors='coerce', format='ISO8601')
+        keep[boundary] = (boundary_dates.dt.date >= cutoff).fillna(False).to_numpy(dtype=bool)
+    return df[keep]
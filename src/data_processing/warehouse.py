@@ -0,0 +1,388 @@
+"""
+Entrepôt local (SQLite) des matchs, cotes, joueurs et prédictions.
+
+Rôle :
+- Une seule base `WAREHOUSE_PATH` au lieu de dizaines de CSV relus par chaque
+  script d'analyse.
+- Tables indexées sur `fixture_id`, la ligue, la date et les identifiants d'équipe
+  (voir `TABLES`) ; les colonnes sont créées à partir des DataFrames écrits
+  et complétées automatiquement quand de nouvelles statistiques apparaissent.
+- Les collecteurs y écrivent en plus de leurs CSV ; les modules d'analyse
+  passent par `load_matches` / `load_dataset`, qui lisent l'entrepôt quand il est
+  activé et alimenté, et les CSV sinon.
+- Les CSV restent la source publiée pour le site (`--export`).
+
+Optionnel : désactivé tant que la variable d'environnement
+`FOOTBALL_WAREHOUSE_PATH` n'est pas définie.
+
+Usage :
+    python -m src.data_processing.warehouse --import   # charge les CSV existants
+    python -m src.data_processing.warehouse --export   # régénère les CSV depuis l'entrepôt
+"""
+import argparse
+import glob
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.config import ALL_LEAGUES, MATCH_DATA_DIR, ODDS_DATA_DIR, PLAYERS_DATA_DIR, WAREHOUSE_PATH
+from src.data_processing.catalog import record_frame
+from src.data_processing.file_io import write_csv
+from src.data_processing.player_store import PLAYER_DATASETS, players_path, read_players, write_players
+
+logger = logging.getLogger(__name__)
+
+PREDICTIONS_DATA_DIR = os.path.join('data', 'predictions')
+# Attente maximale (secondes) quand un autre processus écrit dans la base
+SQLITE_BUSY_TIMEOUT = 30
+
+# Clé primaire et index de chaque table
+TABLES: Dict[str, Dict[str, List]] = {
+    'matches': {
+        'key': ['fixture_id'],
+        'indexes': [['league_code', 'date'], ['date'], ['home_team_id'], ['away_team_id']],
+    },
+    'odds': {
+        'key': ['fixture_id', 'bookmaker_id', 'bet_type_id', 'bet_value'],
+        'indexes': [['league_code', 'fixture_date'], ['fixture_date']],
+    },
+    'player_stats': {
+        'key': ['fixture_id', 'team_id', 'player_id'],
+        'indexes': [['league_code', 'match_date'], ['team_id'], ['player_id']],
+    },
+    'match_lineups': {
+        'key': ['fixture_id'],
+        'indexes': [['league_code', 'match_date'], ['team_1_id'], ['team_2_id']],
+    },
+    'team_rosters': {
+        'key': ['team_id', 'player_id'],
+        'indexes': [['league_code'], ['player_id']],
+    },
+    'predictions': {
+        'key': ['fixture_id', 'bet_type', 'bet_value'],
+        'indexes': [['league_code', 'date'], ['date']],
+    },
+    'elo_predictions': {
+        'key': ['fixture_id'],
+        'indexes': [['league_name', 'date'], ['date']],
+    },
+}
+
+# Fichiers CSV correspondant à chaque table (import / export) ; les tables joueurs
+# sont dans le stockage Parquet de `player_store`
+CSV_LAYOUT = {
+    'matches': os.path.join(MATCH_DATA_DIR, '{league}.csv'),
+    'odds': os.path.join(ODDS_DATA_DIR, '{league}_complete_odds.csv'),
+    **{table: players_path(table, '{league}', PLAYERS_DATA_DIR) for table in PLAYER_DATASETS},
+    'predictions': os.path.join(PREDICTIONS_DATA_DIR, 'historical_predictions.csv'),
+    'elo_predictions': os.path.join(PREDICTIONS_DATA_DIR, 'historical_elo_predictions.csv'),
+}
+
+# Tables dont les CSV n'ont pas de colonne `league_code` (ajoutée dans l'entrepôt)
+LEAGUE_CODE_ADDED = {'matches', 'odds'}
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()]
+
+
+def _to_records(df: pd.DataFrame) -> List[tuple]:
+    """Convertit un DataFrame en tuples de valeurs Python (dates en texte ISO, NaN en NULL)."""
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].map(lambda value: value.isoformat() if pd.notna(value) else None)
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+
+class Warehouse:
+    """
+    Base SQLite partagée par les collecteurs et les analyses.
+    La connexion est ouverte au premier accès et partagée entre threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # Plusieurs collecteurs (un processus par ligue) peuvent écrire en même temps
+            self._conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        return self._conn
+
+    # --- Schéma ---
+
+    def columns(self, table: str) -> List[str]:
+        with self._lock:
+            return _table_columns(self._connection(), table)
+
+    def has_table(self, table: str) -> bool:
+        return bool(self.columns(table))
+
+    def _ensure_table(self, conn: sqlite3.Connection, table: str, df: pd.DataFrame) -> None:
+        """Crée la table (clé primaire, index) ou ajoute les colonnes manquantes."""
+        spec = TABLES[table]
+        existing = _table_columns(conn, table)
+        if not existing:
+            column_defs = ', '.join(f"{_quote(column)} {_sql_type(df[column].dtype)}" for column in df.columns)
+            key = ', '.join(_quote(column) for column in spec['key'])
+            conn.execute(f"CREATE TABLE {_quote(table)} ({column_defs}, PRIMARY KEY ({key}))")
+        else:
+            for column in df.columns:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(column)} {_sql_type(df[column].dtype)}")
+        table_columns = set(existing) | set(df.columns)
+        for index_columns in spec['indexes']:
+            if set(index_columns) <= table_columns:
+                index_name = f"idx_{table}_{'_'.join(index_columns)}"
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(index_name)} ON {_quote(table)} "
+                             f"({', '.join(_quote(column) for column in index_columns)})")
+
+    # --- Écriture ---
+
+    def upsert(self, table: str, df: pd.DataFrame) -> int:
+        """Insère ou remplace des lignes (clé primaire de `TABLES`). Renvoie le nombre de lignes."""
+        df = df.dropna(subset=TABLES[table]['key'])
+        if df.empty:
+            return 0
+        placeholders = ', '.join('?' for _ in df.columns)
+        columns = ', '.join(_quote(column) for column in df.columns)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                self._ensure_table(conn, table, df)
+                conn.executemany(f"INSERT OR REPLACE INTO {_quote(table)} ({columns}) VALUES ({placeholders})",
+                                 _to_records(df))
+        return len(df)
+
+    def replace_league(self, table: str, league_code: str, df: pd.DataFrame) -> int:
+        """Remplace toutes les lignes d'une ligue par `df` (fichier CSV complet d'une ligue)."""
+        df = df.assign(league_code=league_code).dropna(subset=TABLES[table]['key'])
+        df = df.drop_duplicates(subset=TABLES[table]['key'], keep='last')
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if not df.empty:
+                    self._ensure_table(conn, table, df)
+                if 'league_code' in _table_columns(conn, table):
+                    conn.execute(f"DELETE FROM {_quote(table)} WHERE league_code = ?", (league_code,))
+                if df.empty:
+                    return 0
+                columns = ', '.join(_quote(column) for column in df.columns)
+                placeholders = ', '.join('?' for _ in df.columns)
+                conn.executemany(f"INSERT OR REPLACE INTO {_quote(table)} ({columns}) VALUES ({placeholders})",
+                                 _to_records(df))
+        return len(df)
+
+    def prune(self, table: str, date_column: str, cutoff: str, league_code: Optional[str] = None) -> int:
+        """Supprime les lignes dont `date_column` est antérieure à `cutoff` (date ISO). Renvoie le nombre de lignes."""
+        if not self.has_table(table):
+            return 0
+        sql = f"DELETE FROM {_quote(table)} WHERE {_quote(date_column)} < ?"
+        params: tuple = (cutoff,)
+        if league_code is not None:
+            sql += " AND league_code = ?"
+            params += (league_code,)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                return conn.execute(sql, params).rowcount
+
+    # --- Lecture ---
+
+    def query(self, sql: str, params: Iterable = ()) -> pd.DataFrame:
+        """Exécute une requête SQL et renvoie un DataFrame."""
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection(), params=tuple(params))
+
+    def read(self, table: str, columns: Optional[List[str]] = None,
+             league_code: Optional[str] = None) -> pd.DataFrame:
+        """Lit une table (colonnes disponibles parmi `columns`, éventuellement une seule ligue)."""
+        available = self.columns(table)
+        selected = [column for column in (columns or available) if column in available]
+        if not selected:
+            return pd.DataFrame()
+        sql = f"SELECT {', '.join(_quote(column) for column in selected)} FROM {_quote(table)}"
+        params: tuple = ()
+        if league_code is not None and 'league_code' in available:
+            sql += " WHERE league_code = ?"
+            params = (league_code,)
+        # Ordre d'écriture (celui des fichiers CSV)
+        return self.query(sql + " ORDER BY rowid", params)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- Import / export CSV ---
+
+    def import_csv(self) -> Dict[str, int]:
+        """Charge les fichiers CSV existants dans l'entrepôt. Renvoie le nombre de lignes par table."""
+        counts = {}
+        for table, pattern in CSV_LAYOUT.items():
+            counts[table] = 0
+            if '{league}' not in pattern:
+                if os.path.exists(pattern):
+                    counts[table] += self.upsert(table, pd.read_csv(pattern, low_memory=False))
+            else:
+                for league_code in ALL_LEAGUES:
+                    path = pattern.format(league=league_code)
+                    if table in PLAYER_DATASETS:
+                        df = read_players(table, league_code)
+                        if not df.empty:
+                            counts[table] += self.replace_league(table, league_code, df)
+                    elif os.path.exists(path):
+                        counts[table] += self.replace_league(table, league_code, pd.read_csv(path, low_memory=False))
+            logger.info(f"📥 {table}: {counts[table]} lignes importées")
+        return counts
+
+    def export_csv(self) -> None:
+        """Régénère les fichiers de données (un par ligue quand c'est le format du site) depuis l'entrepôt."""
+        for table, pattern in CSV_LAYOUT.items():
+            if not self.has_table(table):
+                continue
+            if '{league}' not in pattern:
+                df = self.read(table)
+                write_csv(df, pattern)
+                record_frame(pattern, df)
+                logger.info(f"💾 {table} exporté: {pattern}")
+                continue
+            for league_code in ALL_LEAGUES:
+                df = self.read(table, league_code=league_code)
+                if df.empty:
+                    continue
+                path = pattern.format(league=league_code)
+                if table in LEAGUE_CODE_ADDED:
+                    df = df.drop(columns=['league_code'])
+                if table in PLAYER_DATASETS:
+                    path = write_players(table, league_code, df)
+                else:
+                    write_csv(df, path)
+                    record_frame(path, df)
+                logger.info(f"💾 {table} exporté: {path} ({len(df)} lignes)")
+
+
+_warehouse: Optional[Warehouse] = None
+_warehouse_lock = threading.Lock()
+
+
+def get_warehouse() -> Optional[Warehouse]:
+    """Entrepôt partagé du processus, ou None s'il n'est pas activé (`WAREHOUSE_PATH`)."""
+    global _warehouse
+    if not WAREHOUSE_PATH:
+        return None
+    with _warehouse_lock:
+        if _warehouse is None:
+            _warehouse = Warehouse(WAREHOUSE_PATH)
+        return _warehouse
+
+
+def sync_league(table: str, league_code: str, df: pd.DataFrame) -> None:
+    """Recopie le contenu complet d'un fichier de ligue dans l'entrepôt, s'il est activé."""
+    warehouse = get_warehouse()
+    if warehouse is None:
+        return
+    try:
+        rows = warehouse.replace_league(table, league_code, df)
+        logger.info(f"🗄️ Entrepôt {table}: {rows} lignes pour {league_code}")
+    except (sqlite3.Error, KeyError) as e:
+        logger.warning(f"⚠️ Écriture dans l'entrepôt impossible ({table}, {league_code}): {e}")
+
+
+def sync_rows(table: str, df: pd.DataFrame) -> None:
+    """Ajoute ou remplace des lignes dans l'entrepôt, s'il est activé."""
+    warehouse = get_warehouse()
+    if warehouse is None:
+        return
+    try:
+        rows = warehouse.upsert(table, df)
+        logger.info(f"🗄️ Entrepôt {table}: {rows} lignes écrites")
+    except (sqlite3.Error, KeyError) as e:
+        logger.warning(f"⚠️ Écriture dans l'entrepôt impossible ({table}): {e}")
+
+
+def load_dataset(table: str, csv_path: str, columns: Optional[List[str]] = None,
+                 warehouse: Optional[Warehouse] = None) -> pd.DataFrame:
+    """
+    Lit une table de l'entrepôt s'il est activé et alimenté, sinon le fichier CSV équivalent
+    (dédupliqué sur la clé de la table, comme dans l'entrepôt).
+    """
+    warehouse = warehouse or get_warehouse()
+    if warehouse is not None and warehouse.has_table(table):
+        return warehouse.read(table, columns)
+    if not os.path.exists(csv_path):
+        return pd.DataFrame()
+    key = TABLES[table]['key']
+    usecols = (lambda column: column in columns or column in key) if columns else None
+    df = pd.read_csv(csv_path, usecols=usecols, low_memory=False)
+    # Les historiques de prédictions sont en ajout seul : dernière ligne de chaque clé
+    if set(key) <= set(df.columns):
+        df = df.drop_duplicates(subset=key, keep='last')
+    if columns:
+        df = df[[column for column in df.columns if column in columns]]
+    return df
+
+
+def load_matches(columns: Optional[List[str]] = None, warehouse: Optional[Warehouse] = None,
+                 matches_dir: str = MATCH_DATA_DIR) -> pd.DataFrame:
+    """
+    Charge les matchs de toutes les ligues (seulement les colonnes demandées qui existent).
+    Lit la table `matches` de l'entrepôt quand elle existe, sinon les CSV de `matches_dir`.
+    """
+    warehouse = warehouse or get_warehouse()
+    if warehouse is not None and warehouse.has_table('matches'):
+        if columns is None:
+            # Mêmes colonnes que les CSV (la ligue n'est ajoutée que dans l'entrepôt)
+            columns = [column for column in warehouse.columns('matches') if column != 'league_code']
+        return warehouse.read('matches', columns)
+    match_files = glob.glob(os.path.join(matches_dir, '*.csv'))
+    if not match_files:
+        return pd.DataFrame()
+    usecols = (lambda column: column in columns) if columns else None
+    return pd.concat((pd.read_csv(path, usecols=usecols, low_memory=False) for path in match_files),
+                     ignore_index=True)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Entrepôt SQLite des données football.")
+    parser.add_argument('--import', dest='import_csv', action='store_true', help="Charge les CSV existants.")
+    parser.add_argument('--export', dest='export_csv', action='store_true', help="Régénère les CSV du site.")
+    args = parser.parse_args()
+
+    warehouse = get_warehouse()
+    if warehouse is None:
+        logger.error("⚠️ Entrepôt désactivé : définir FOOTBALL_WAREHOUSE_PATH (ex: data/warehouse.sqlite).")
+        return
+    if args.import_csv:
+        warehouse.import_csv()
+    if args.export_csv:
+        warehouse.export_csv()
+    warehouse.close()
+
+
+if __name__ == "__main__":
+    main()
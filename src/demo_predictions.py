@@ -14,6 +14,18 @@ from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Tuple
 import random
 
+from src.data_processing.odds_store import load_odds
+from src.prediction.feature_matrix_cache import cached_feature_matrix
+from src.prediction.similarity_index import SimilarityIndex
+
+DEMO_ODDS_COLUMNS = ['fixture_id', 'bookmaker_id', 'bet_type_name', 'bet_value', 'odd']
+# Types de paris gardés pour l'analyse de démonstration
+DEMO_BET_TYPES = [
+    'Match Winner',       # Pour 1X2
+    'Both Teams Score',   # Pour BTTS
+    'Goals Over/Under'    # Pour Over/Under
+]
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -62,72 +74,36 @@ class DemoPredictionsWorkflow:
         
         # Charger les données historiques
         logger.info("🔄 Chargement des données historiques existantes...")
-        self.historical_odds_data = self.load_all_historical_odds()
+        self._historical_odds_data: Optional[pd.DataFrame] = None
+        self._similarity_index: Optional[SimilarityIndex] = None
         self.historical_feature_matrix = self.create_comprehensive_feature_matrix()
         logger.info(f"✅ Données historiques chargées: {len(self.historical_feature_matrix)} matchs")
 
+    @property
+    def historical_odds_data(self) -> pd.DataFrame:
+        """Cotes historiques brutes, chargées à la première utilisation (inutiles quand la matrice est en cache)"""
+        if self._historical_odds_data is None:
+            self._historical_odds_data = self.load_all_historical_odds()
+        return self._historical_odds_data
+
+    @historical_odds_data.setter
+    def historical_odds_data(self, df: pd.DataFrame) -> None:
+        self._historical_odds_data = df
+
     def load_all_historical_odds(self) -> pd.DataFrame:
         """Charge toutes les données de cotes historiques disponibles"""
-        all_odds = []
-        
-        for league_code in self.all_leagues.keys():
-            odds_file = os.path.join(self.odds_data_dir, f"{league_code}_complete_odds.csv")
-            if os.path.exists(odds_file):
-                try:
-                    df = pd.read_csv(odds_file)
-                    df['league_code'] = league_code
-                    all_odds.append(df)
-                    logger.info(f"📂 {league_code}: {len(df)} cotes chargées")
-                except Exception as e:
-                    logger.warning(f"Erreur lecture {league_code}: {e}")
-        
-        if all_odds:
-            combined_df = pd.concat(all_odds, ignore_index=True)
+        combined_df = load_odds(self.all_leagues.keys(),
+                                columns=DEMO_ODDS_COLUMNS)
+        if not combined_df.empty:
             logger.info(f"📊 Total cotes historiques: {len(combined_df)}")
-            return combined_df
-        return pd.DataFrame()
+        return combined_df
 
     def create_comprehensive_feature_matrix(self) -> pd.DataFrame:
-        """Crée une matrice de caractéristiques complète"""
-        if self.historical_odds_data.empty:
-            return pd.DataFrame()
-        
-        df = self.historical_odds_data.copy()
-        df['odd'] = pd.to_numeric(df['odd'], errors='coerce')
-        df.dropna(subset=['odd'], inplace=True)
-        
-        # === FILTRAGE DES TYPES DE PARIS ===
-        # On ne garde que les types de paris demandés pour l'analyse
-        allowed_bet_types = [
-            'Match Winner',       # Pour 1X2
-            'Both Teams Score',   # Pour BTTS
-            'Goals Over/Under'    # Pour Over/Under
-        ]
-        df = df[df['bet_type_name'].isin(allowed_bet_types)]
-
-        if df.empty:
-            logger.warning("Aucun des types de paris autorisés n'a été trouvé dans les données historiques.")
-            return pd.DataFrame()
-
-        logger.info(f"Paris filtrés. Gardés: {df['bet_type_name'].nunique()} types de paris principaux.")
-
-        df['bet_identifier'] = df['bet_type_name'].astype(str) + '_' + df['bet_value'].astype(str)
-        
-        # Filtrer les paris fiables
-        bookmaker_counts = df.groupby(['fixture_id', 'bet_identifier'])['bookmaker_id'].nunique().reset_index()
-        reliable_bets = bookmaker_counts[bookmaker_counts['bookmaker_id'] >= self.MIN_BOOKMAKERS_THRESHOLD]
-        
-        if reliable_bets.empty:
-            logger.warning("Aucun pari fiable trouvé")
-            return pd.DataFrame()
-        
-        reliable_df = pd.merge(df, reliable_bets[['fixture_id', 'bet_identifier']], 
-                              on=['fixture_id', 'bet_identifier'])
-        
-        mean_odds = reliable_df.groupby(['fixture_id', 'bet_identifier'])['odd'].mean().reset_index()
-        feature_matrix = mean_odds.pivot(index='fixture_id', columns='bet_identifier', values='odd')
-        
-        logger.info(f"✅ Matrice créée: {feature_matrix.shape[0]} matchs, {feature_matrix.shape[1]} types de paris")
+        """Matrice de caractéristiques complète (mise à jour pour les seuls matchs dont les cotes ont changé)"""
+        feature_matrix = cached_feature_matrix('demo', self.all_leagues.keys(), self.MIN_BOOKMAKERS_THRESHOLD,
+                                               bet_types=DEMO_BET_TYPES)
+        if feature_matrix.empty:
+            logger.warning("Aucun pari fiable trouvé parmi les types de paris autorisés")
         return feature_matrix
 
     def simulate_today_fixtures(self) -> List[Dict]:
@@ -212,36 +188,51 @@ class DemoPredictionsWorkflow:
         
         return simulated_odds
 
+    def similarity_index(self) -> SimilarityIndex:
+        """Index trié de la matrice historique (reconstruit si la matrice a été remplacée)"""
+        if self._similarity_index is None or self._similarity_index.feature_matrix is not self.historical_feature_matrix:
+            self._similarity_index = SimilarityIndex(self.historical_feature_matrix)
+        return self._similarity_index
+
     def calculate_similarity_for_all_bets(self, target_odds: Dict) -> Dict:
         """Calcule le pourcentage de similarité pour tous les types de paris"""
         if not target_odds or self.historical_feature_matrix.empty:
             return {}
-        
-        similarity_results = {}
-        
-        for bet_identifier, target_odd in target_odds.items():
-            if bet_identifier in self.historical_feature_matrix.columns:
-                historical_odds = self.historical_feature_matrix[bet_identifier].dropna()
-                
-                if len(historical_odds) < 10:
-                    continue
-                
-                distances = np.abs(historical_odds - target_odd)
-                similar_matches = distances[distances <= self.SIMILARITY_THRESHOLD]
-                
-                if len(similar_matches) > 0:
-                    similarity_percentage = (len(similar_matches) / len(historical_odds)) * 100
-                    avg_distance = similar_matches.mean()
-                    
-                    similarity_results[bet_identifier] = {
-                        'similarity_percentage': round(similarity_percentage, 2),
-                        'similar_matches_count': len(similar_matches),
-                        'total_historical_matches': len(historical_odds),
-                        'avg_distance': round(avg_distance, 4),
-                        'target_odd': target_odd,
-                        'confidence_score': min(100, (len(similar_matches) / 50) * 100)
-                    }
-        
+        similarities = self.calculate_similarity_batch(pd.DataFrame([target_odds]))[0]
+        return {bet_identifier: similarities[bet_identifier] for bet_identifier in target_odds
+                if bet_identifier in similarities}
+
+    def calculate_similarity_batch(self, targets: pd.DataFrame) -> Dict:
+        """
+        Similarités de plusieurs matchs à la fois (matchs × bet_identifier, NaN = pari non coté),
+        une passe vectorisée par type de pari. Renvoie {match: {bet_identifier: similarité}}.
+        """
+        similarity_results = {label: {} for label in targets.index}
+        if targets.empty or self.historical_feature_matrix.empty:
+            return similarity_results
+
+        similar_counts, avg_distances, totals = self.similarity_index().batch_similarity(
+            targets, self.SIMILARITY_THRESHOLD
+        )
+        selected = (totals >= 10) & (similar_counts > 0)
+        rows, columns = np.nonzero(selected)
+        labels, bet_identifiers = targets.index.tolist(), targets.columns.tolist()
+        for i, j, similar_count, total, avg_distance, target_odd in zip(
+            rows.tolist(), columns.tolist(),
+            similar_counts[rows, columns].tolist(),
+            totals[columns].tolist(),
+            np.round(avg_distances[rows, columns], 4).tolist(),
+            targets.to_numpy(dtype=np.float64)[rows, columns].tolist()
+        ):
+            similarity_results[labels[i]][bet_identifiers[j]] = {
+                'similarity_percentage': round((similar_count / total) * 100, 2),
+                'similar_matches_count': similar_count,
+                'total_historical_matches': total,
+                'avg_distance': avg_distance,
+                'target_odd': target_odd,
+                'confidence_score': min(100, (similar_count / 50) * 100)
+            }
+
         return similarity_results
 
     def create_demo_predictions_csv(self, fixtures_data: List[Dict]) -> Tuple[str, str]:
@@ -252,22 +243,33 @@ class DemoPredictionsWorkflow:
         
         all_predictions = []
         
-        for fixture_data in fixtures_data:
+        # Simuler les cotes actuelles de tous les matchs
+        target_odds_by_fixture = {}
+        for index, fixture_data in enumerate(fixtures_data):
             fixture_id = fixture_data.get('fixture', {}).get('id')
-            fixture_info = fixture_data.get('fixture', {})
             teams_info = fixture_data.get('teams', {})
-            league_info = fixture_data.get('league', {})
             
             logger.info(f"⚽ Analyse match {fixture_id}: {teams_info.get('home', {}).get('name')} vs {teams_info.get('away', {}).get('name')}")
             
-            # Simuler les cotes actuelles
             target_odds = self.simulate_fixture_odds(fixture_id)
             if not target_odds:
                 logger.warning(f"Impossible de simuler les cotes pour {fixture_id}")
                 continue
-            
-            # Calculer les similarités
-            similarities = self.calculate_similarity_for_all_bets(target_odds)
+            target_odds_by_fixture[index] = target_odds
+        
+        # Calculer les similarités de tous les matchs en une passe
+        similarities_by_fixture = self.calculate_similarity_batch(
+            pd.DataFrame.from_dict(target_odds_by_fixture, orient='index')
+        )
+        
+        for index, target_odds in target_odds_by_fixture.items():
+            fixture_data = fixtures_data[index]
+            fixture_id = fixture_data.get('fixture', {}).get('id')
+            fixture_info = fixture_data.get('fixture', {})
+            teams_info = fixture_data.get('teams', {})
+            league_info = fixture_data.get('league', {})
+            similarities = {bet_identifier: similarities_by_fixture[index][bet_identifier]
+                            for bet_identifier in target_odds if bet_identifier in similarities_by_fixture[index]}
             
             # Préparer les données de base
             base_data = {
@@ -3,7 +3,8 @@ Ce script génère des prédictions quotidiennes en se basant sur la similarité
 des cotes par rapport à un historique de matchs.
 
 Rôle :
-- Récupère les matchs du jour pour les ligues configurées.
+- Récupère les matchs du jour pour les ligues configurées (un seul appel
+  `fixtures?date=`, partagé avec le workflow Elo via `fixtures_discovery`).
 - Pour chaque match, récupère les cotes actuelles pour différents types de paris.
 - Compare ces cotes à une base de données historique de matchs (`data/odds/`).
 - Calcule un "pourcentage de similarité" qui indique la fréquence à laquelle
@@ -19,19 +20,30 @@ import numpy as np
 import os
 import glob
 import json
-import requests
 import logging
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Tuple
-import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.config import (
     MIN_SIMILAR_MATCHES_THRESHOLD,
     SIMILARITY_THRESHOLD,
     MIN_BOOKMAKERS_THRESHOLD,
     ALL_LEAGUES,
     MIN_SIMILARITY_PCT_THRESHOLD,
-    SEASONS_TO_COLLECT
+    ODDS_FETCH_WORKERS
 )
+from src.api.client import get_client
+from src.api.odds_decoder import decode_odds_response
+from src.prediction.fixtures_discovery import load_or_fetch_day_fixtures
+from src.prediction.feature_matrix_cache import cached_feature_matrix
+from src.prediction.prediction_history import predictions_history
+from src.prediction.similarity_index import SimilarityIndex
+from src.data_processing.catalog import record_frame
+from src.data_processing.odds_store import load_odds
+from src.data_processing.warehouse import sync_rows
+
+# Colonnes des cotes historiques utiles à la matrice de caractéristiques
+HISTORICAL_ODDS_COLUMNS = ['fixture_id', 'bookmaker_id', 'bet_type_name', 'bet_value', 'odd']
 
 # Configuration du logging
 os.makedirs('logs', exist_ok=True)
@@ -56,11 +68,7 @@ class DailyPredictionsWorkflow:
         Initialise le workflow avec la clé RapidAPI
         """
         self.api_key = rapidapi_key
-        self.base_url = "https://api-football-v1.p.rapidapi.com/v3"
-        self.headers = {
-            'x-rapidapi-host': 'api-football-v1.p.rapidapi.com',
-            'x-rapidapi-key': self.api_key
-        }
+        self.api_client = get_client(self.api_key)
         
         # Utilisation de la configuration centralisée
         self.all_leagues = ALL_LEAGUES
@@ -71,6 +79,9 @@ class DailyPredictionsWorkflow:
         self.MIN_SIMILAR_MATCHES_THRESHOLD = MIN_SIMILAR_MATCHES_THRESHOLD
         self.MIN_SIMILARITY_PCT_THRESHOLD = MIN_SIMILARITY_PCT_THRESHOLD
         
+        # Nombre de matchs dont les cotes sont récupérées en parallèle (1 = séquentiel)
+        self.odds_fetch_workers = ODDS_FETCH_WORKERS
+        
         # Dossiers
         self.odds_data_dir = 'data/odds/raw_data'
         self.predictions_dir = 'data/predictions'
@@ -81,124 +92,47 @@ class DailyPredictionsWorkflow:
         
         # Charger les données historiques une fois
         logger.info("🔄 Chargement des données historiques des 15 ligues...")
-        self.historical_odds_data = self.load_all_historical_odds()
+        self._historical_odds_data: Optional[pd.DataFrame] = None
         self.historical_feature_matrix = self.create_comprehensive_feature_matrix()
+        self._similarity_index: Optional[SimilarityIndex] = None
         logger.info(f"✅ Données historiques chargées: {len(self.historical_feature_matrix)} matchs")
 
     def make_api_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
-        """Effectue une requête à l'API avec gestion des erreurs"""
-        url = f"{self.base_url}/{endpoint}"
-        
-        for attempt in range(3):
-            try:
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
-                if response.status_code == 200:
-                    return response.json()
-                logger.warning(f"API error {response.status_code}: {response.text[:200]}")
-                time.sleep(2)
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request error: {e}")
-                time.sleep(2)
-        return None
+        """Effectue une requête à l'API via le client partagé (session poolée, retries)"""
+        return self.api_client.get(endpoint, params)
+
+    @property
+    def historical_odds_data(self) -> pd.DataFrame:
+        """Cotes historiques brutes, chargées à la première utilisation (inutiles quand la matrice est en cache)"""
+        if self._historical_odds_data is None:
+            self._historical_odds_data = self.load_all_historical_odds()
+        return self._historical_odds_data
+
+    @historical_odds_data.setter
+    def historical_odds_data(self, df: pd.DataFrame) -> None:
+        self._historical_odds_data = df
 
     def load_all_historical_odds(self) -> pd.DataFrame:
         """Charge toutes les données de cotes historiques des 15 ligues"""
-        all_odds = []
-        
-        for league_code in self.all_leagues.keys():
-            odds_file = os.path.join(self.odds_data_dir, f"{league_code}_complete_odds.csv")
-            if os.path.exists(odds_file):
-                try:
-                    df = pd.read_csv(odds_file)
-                    df['league_code'] = league_code
-                    all_odds.append(df)
-                    logger.info(f"📂 {league_code}: {len(df)} cotes chargées")
-                except Exception as e:
-                    logger.warning(f"Erreur lecture {league_code}: {e}")
-        
-        if all_odds:
-            combined_df = pd.concat(all_odds, ignore_index=True)
+        combined_df = load_odds(self.all_leagues.keys(), columns=HISTORICAL_ODDS_COLUMNS)
+        if not combined_df.empty:
             logger.info(f"📊 Total cotes historiques: {len(combined_df)}")
-            return combined_df
-        return pd.DataFrame()
+        return combined_df
 
     def create_comprehensive_feature_matrix(self) -> pd.DataFrame:
         """
-        Crée une matrice de caractéristiques complète pour TOUS les types de paris
+        Matrice de caractéristiques complète pour TOUS les types de paris,
+        relue depuis le disque et mise à jour pour les seuls matchs dont les cotes ont changé
         """
-        if self.historical_odds_data.empty:
-            return pd.DataFrame()
-        
-        # Nettoyage des données
-        df = self.historical_odds_data.copy()
-        df['odd'] = pd.to_numeric(df['odd'], errors='coerce')
-        df.dropna(subset=['odd'], inplace=True)
-        
-        # Créer un identifiant unique pour chaque type de pari + valeur
-        df['bet_identifier'] = df['bet_type_name'].astype(str) + '_' + df['bet_value'].astype(str)
-        
-        # Filtrer les paris avec suffisamment de bookmakers
-        bookmaker_counts = df.groupby(['fixture_id', 'bet_identifier'])['bookmaker_id'].nunique().reset_index()
-        reliable_bets = bookmaker_counts[
-            bookmaker_counts['bookmaker_id'] >= self.MIN_BOOKMAKERS_THRESHOLD
-        ]
-        
-        if reliable_bets.empty:
+        feature_matrix = cached_feature_matrix('daily', self.all_leagues.keys(), self.MIN_BOOKMAKERS_THRESHOLD)
+        if feature_matrix.empty:
             logger.warning("Aucun pari fiable trouvé")
-            return pd.DataFrame()
-        
-        # Joindre avec les données fiables
-        reliable_df = pd.merge(
-            df, 
-            reliable_bets[['fixture_id', 'bet_identifier']], 
-            on=['fixture_id', 'bet_identifier']
-        )
-        
-        # Calculer les cotes moyennes par fixture et type de pari
-        mean_odds = reliable_df.groupby(['fixture_id', 'bet_identifier'])['odd'].mean().reset_index()
-        
-        # Créer la matrice pivot
-        feature_matrix = mean_odds.pivot(
-            index='fixture_id', 
-            columns='bet_identifier', 
-            values='odd'
-        )
-        
-        logger.info(f"✅ Matrice créée: {feature_matrix.shape[0]} matchs, {feature_matrix.shape[1]} types de paris")
         return feature_matrix
 
     def get_today_fixtures(self) -> List[Dict]:
-        """Récupère tous les matchs du jour pour toutes les ligues"""
-        today_str = self.today.strftime('%Y-%m-%d')
-        logger.info(f"🔍 Recherche des matchs du {today_str}")
-        
-        all_fixtures = []
-        
-        for league_code, league_info in self.all_leagues.items():
-            logger.info(f"🏆 Récupération {league_code} - {league_info['name']}")
-            
-            # Essayer différentes saisons
-            for season in SEASONS_TO_COLLECT:
-                params = {
-                    'league': league_info['id'],
-                    'season': season,
-                    'date': today_str
-                }
-                
-                data = self.make_api_request('fixtures', params)
-                if data and 'response' in data:
-                    season_fixtures = data['response']
-                    
-                    for fixture in season_fixtures:
-                        fixture['league_code'] = league_code
-                        fixture['league_name'] = league_info['name']
-                        fixture['country'] = league_info['country']
-                    
-                    all_fixtures.extend(season_fixtures)
-                    logger.info(f"📅 {league_code} saison {season}: {len(season_fixtures)} matchs")
-                
-                time.sleep(0.5)  # Respecter les limites API
-        
+        """Récupère tous les matchs du jour pour toutes les ligues (étape de découverte partagée)"""
+        logger.info(f"🔍 Recherche des matchs du {self.today.strftime('%Y-%m-%d')}")
+        all_fixtures = load_or_fetch_day_fixtures(self.make_api_request, self.today)
         logger.info(f"📊 Total matchs du jour: {len(all_fixtures)}")
         return all_fixtures
 
@@ -213,32 +147,14 @@ class DailyPredictionsWorkflow:
         if not odds_data:
             return {}
         
-        processed_odds = []
-        
-        for odds_entry in odds_data:
-            for bookmaker in odds_entry.get('bookmakers', []):
-                for bet in bookmaker.get('bets', []):
-                    for value in bet.get('values', []):
-                        processed_odds.append({
-                            'fixture_id': fixture_id,
-                            'bet_type_name': bet.get('name'),
-                            'bet_value': value.get('value'),
-                            'odd': value.get('odd'),
-                            'bookmaker_id': bookmaker.get('id')
-                        })
-        
-        if not processed_odds:
+        df = decode_odds_response(odds_data, fixture_id=fixture_id)
+        df = df[df['odd'].notna()]
+        if df.empty:
             return {}
-        
-        # Créer DataFrame et traiter comme les données historiques
-        df = pd.DataFrame(processed_odds)
-        df['odd'] = pd.to_numeric(df['odd'], errors='coerce')
-        df.dropna(subset=['odd'], inplace=True)
 
-        df['bet_identifier'] = df['bet_type_name'].astype(str) + '_' + df['bet_value'].astype(str)
         # Compter les bookmakers distincts par type de pari
         bookmaker_counts = (
-            df.groupby('bet_identifier')['bookmaker_id']
+            df.groupby('bet_identifier', observed=True)['bookmaker_id']
             .nunique()
             .reset_index(name='bookmaker_count')
         )
@@ -254,9 +170,15 @@ class DailyPredictionsWorkflow:
         filtered_df = df[df['bet_identifier'].isin(valid_bets)]
 
         # Calculer cotes moyennes sur ce sous-ensemble
-        mean_odds = filtered_df.groupby('bet_identifier')['odd'].mean()
+        mean_odds = filtered_df.groupby('bet_identifier', observed=True)['odd'].mean()
+
+        return {str(bet_identifier): odd for bet_identifier, odd in mean_odds.items()}
 
-        return mean_odds.to_dict()
+    def similarity_index(self) -> SimilarityIndex:
+        """Index trié de la matrice historique (reconstruit si la matrice a été remplacée)"""
+        if self._similarity_index is None or self._similarity_index.feature_matrix is not self.historical_feature_matrix:
+            self._similarity_index = SimilarityIndex(self.historical_feature_matrix)
+        return self._similarity_index
 
     def calculate_similarity_for_all_bets(self, target_odds: Dict) -> Dict:
         """
@@ -264,45 +186,143 @@ class DailyPredictionsWorkflow:
         """
         if not target_odds or self.historical_feature_matrix.empty:
             return {}
-        
-        similarity_results = {}
-        
-        for bet_identifier, target_odd in target_odds.items():
-            if bet_identifier in self.historical_feature_matrix.columns:
-                # Récupérer les cotes historiques pour ce type de pari
-                historical_odds = self.historical_feature_matrix[bet_identifier].dropna()
-                
-                if len(historical_odds) < self.MIN_SIMILAR_MATCHES_THRESHOLD:
-                    logger.debug(f"Pas assez de données pour {bet_identifier}: {len(historical_odds)} matchs < {self.MIN_SIMILAR_MATCHES_THRESHOLD}")
-                    continue
-                
-                # Calculer les distances (différences absolues)
-                distances = np.abs(historical_odds - target_odd)
-
-                # Trouver les matchs similaires
-                similar_matches = distances[distances <= self.SIMILARITY_THRESHOLD]
-
-                # Appliquer le seuil de matchs similaires
-                total_historical_matches = len(historical_odds)
-                if len(similar_matches) >= self.MIN_SIMILAR_MATCHES_THRESHOLD:
-                    # Calculer le pourcentage de similarité
-                    similarity_percentage = (len(similar_matches) / total_historical_matches) * 100
-                    
-                    # Appliquer le nouveau seuil de pourcentage de similarité
-                    if similarity_percentage >= self.MIN_SIMILARITY_PCT_THRESHOLD:
-                        avg_distance = similar_matches.mean()
-
-                        similarity_results[bet_identifier] = {
-                            'similarity_percentage': round(similarity_percentage, 2),
-                            'similar_matches_count': len(similar_matches),
-                            'total_historical_matches': total_historical_matches,
-                            'avg_distance': round(avg_distance, 4),
-                            'target_odd': target_odd,
-                            'similarity_reference_count': total_historical_matches
-                        }
-        
+        similarities = self.calculate_similarity_batch(pd.DataFrame([target_odds]))[0]
+        return {bet_identifier: similarities[bet_identifier] for bet_identifier in target_odds
+                if bet_identifier in similarities}
+
+    def calculate_similarity_batch(self, targets: pd.DataFrame) -> Dict:
+        """
+        Calcule les similarités de plusieurs matchs à la fois.
+        `targets` : matchs (index) × bet_identifier (colonnes), NaN quand le pari n'est pas coté.
+        Renvoie {match: {bet_identifier: similarité}} (même format que `calculate_similarity_for_all_bets`).
+        """
+        similarity_results = {label: {} for label in targets.index}
+        if targets.empty or self.historical_feature_matrix.empty:
+            return similarity_results
+
+        # Matchs similaires (|cote - cible| <= seuil) et distances moyennes, une passe par type de pari
+        similar_counts, avg_distances, totals = self.similarity_index().batch_similarity(
+            targets, self.SIMILARITY_THRESHOLD
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity_percentages = similar_counts / totals * 100
+
+        # Seuils : historique suffisant, matchs similaires et pourcentage de similarité
+        selected = (
+            (totals >= self.MIN_SIMILAR_MATCHES_THRESHOLD)
+            & (similar_counts >= self.MIN_SIMILAR_MATCHES_THRESHOLD)
+            & (similarity_percentages >= self.MIN_SIMILARITY_PCT_THRESHOLD)
+        )
+        rows, columns = np.nonzero(selected)
+        labels, bet_identifiers = targets.index.tolist(), targets.columns.tolist()
+        for i, j, percentage, similar_count, total, avg_distance, target_odd in zip(
+            rows.tolist(), columns.tolist(),
+            similarity_percentages[rows, columns].tolist(),
+            similar_counts[rows, columns].tolist(),
+            totals[columns].tolist(),
+            np.round(avg_distances[rows, columns], 4).tolist(),
+            targets.to_numpy(dtype=np.float64)[rows, columns].tolist()
+        ):
+            similarity_results[labels[i]][bet_identifiers[j]] = {
+                'similarity_percentage': round(percentage, 2),
+                'similar_matches_count': similar_count,
+                'total_historical_matches': total,
+                'avg_distance': avg_distance,
+                'target_odd': target_odd,
+                'similarity_reference_count': total
+            }
+
         return similarity_results
 
+    def fetch_fixtures_odds(self, fixtures_data: List[Dict]) -> Iterator[Tuple[int, Optional[List[Dict]]]]:
+        """
+        Récupère les cotes de tous les matchs en parallèle.
+        Renvoie (index du match, cotes) au fur et à mesure de leur arrivée ;
+        le débit global est borné par le limiteur du client API partagé.
+        """
+        if self.odds_fetch_workers <= 1:
+            for index, fixture_data in enumerate(fixtures_data):
+                yield index, self.get_fixture_odds(fixture_data.get('fixture', {}).get('id'))
+            return
+
+        with ThreadPoolExecutor(max_workers=self.odds_fetch_workers) as executor:
+            futures = {
+                executor.submit(self.get_fixture_odds, fixture_data.get('fixture', {}).get('id')): index
+                for index, fixture_data in enumerate(fixtures_data)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    yield index, future.result()
+                except Exception as e:
+                    logger.error(f"Erreur récupération des cotes: {e}")
+                    yield index, None
+
+    def fixture_target_odds(self, fixture_data: Dict, odds_data: Optional[List[Dict]]) -> Dict:
+        """Cotes moyennes (vecteur de caractéristiques) d'un match, vide si elles sont inutilisables"""
+        fixture_id = fixture_data.get('fixture', {}).get('id')
+        teams_info = fixture_data.get('teams', {})
+
+        logger.info(f"⚽ Analyse match {fixture_id}: {teams_info.get('home', {}).get('name')} vs {teams_info.get('away', {}).get('name')}")
+
+        if not odds_data:
+            logger.warning(f"Pas de cotes pour le match {fixture_id}")
+            return {}
+
+        # Traiter les cotes
+        target_odds = self.process_fixture_odds(fixture_id, odds_data)
+        if not target_odds:
+            logger.warning(f"Impossible de traiter les cotes pour {fixture_id}")
+        return target_odds
+
+    def build_fixture_predictions(self, fixture_data: Dict, target_odds: Dict, similarities: Dict) -> List[Dict]:
+        """Construit les lignes de prédiction (format long) d'un match à partir de ses similarités"""
+        if not target_odds:
+            return []
+
+        fixture_id = fixture_data.get('fixture', {}).get('id')
+        fixture_info = fixture_data.get('fixture', {})
+        teams_info = fixture_data.get('teams', {})
+        league_info = fixture_data.get('league', {})
+
+        base_data = {
+            'date': self.today.strftime('%Y-%m-%d'),
+            'match_time': fixture_info.get('date', ''),
+            'fixture_id': fixture_id,
+            'league_code': fixture_data.get('league_code', ''),
+            'league_name': league_info.get('name', ''),
+            'country': fixture_data.get('country', ''),
+            'home_team': teams_info.get('home', {}).get('name', ''),
+            'away_team': teams_info.get('away', {}).get('name', ''),
+            'venue': fixture_info.get('venue', {}).get('name', ''),
+            'status': fixture_info.get('status', {}).get('long', ''),
+            'analysis_timestamp': datetime.now().isoformat()
+        }
+
+        if not similarities:
+            row = base_data.copy()
+            row['bet_type'] = "NO_BETS"
+            return [row]
+
+        rows = []
+        # Paris dans l'ordre des cotes du match
+        for bet_identifier in target_odds:
+            sim_data = similarities.get(bet_identifier)
+            if sim_data is None:
+                continue
+            bet_type, bet_value = bet_identifier.split('_', 1)
+            row = base_data.copy()
+            row.update({
+                'bet_type': bet_type,
+                'bet_value': bet_value,
+                'target_odd': sim_data['target_odd'],
+                'similarity_pct': sim_data['similarity_percentage'],
+                'similar_matches_count': sim_data['similar_matches_count'],
+                'similarity_reference_count': sim_data['similarity_reference_count']
+            })
+            rows.append(row)
+        return rows
+
     def create_daily_predictions_csv(self, fixtures_data: List[Dict]) -> Tuple[str, str]:
         """
         Crée les fichiers CSV quotidien et historique
@@ -311,64 +331,24 @@ class DailyPredictionsWorkflow:
         daily_filepath = os.path.join(self.predictions_dir, daily_filename)
         historical_filepath = os.path.join(self.predictions_dir, "historical_predictions.csv")
         
-        all_long_format_predictions = []
-        
-        for fixture_data in fixtures_data:
-            fixture_id = fixture_data.get('fixture', {}).get('id')
-            fixture_info = fixture_data.get('fixture', {})
-            teams_info = fixture_data.get('teams', {})
-            league_info = fixture_data.get('league', {})
-            
-            logger.info(f"⚽ Analyse match {fixture_id}: {teams_info.get('home', {}).get('name')} vs {teams_info.get('away', {}).get('name')}")
-            
-            # Récupérer les cotes actuelles
-            odds_data = self.get_fixture_odds(fixture_id)
-            if not odds_data:
-                logger.warning(f"Pas de cotes pour le match {fixture_id}")
-                continue
-            
-            # Traiter les cotes
-            target_odds = self.process_fixture_odds(fixture_id, odds_data)
-            if not target_odds:
-                logger.warning(f"Impossible de traiter les cotes pour {fixture_id}")
-                continue
-            
-            # Calculer les similarités
-            similarities = self.calculate_similarity_for_all_bets(target_odds)
-            
-            base_data = {
-                'date': self.today.strftime('%Y-%m-%d'),
-                'match_time': fixture_info.get('date', ''),
-                'fixture_id': fixture_id,
-                'league_code': fixture_data.get('league_code', ''),
-                'league_name': league_info.get('name', ''),
-                'country': fixture_data.get('country', ''),
-                'home_team': teams_info.get('home', {}).get('name', ''),
-                'away_team': teams_info.get('away', {}).get('name', ''),
-                'venue': fixture_info.get('venue', {}).get('name', ''),
-                'status': fixture_info.get('status', {}).get('long', ''),
-                'analysis_timestamp': datetime.now().isoformat()
-            }
-            
-            if not similarities:
-                row = base_data.copy()
-                row['bet_type'] = "NO_BETS"
-                all_long_format_predictions.append(row)
-            else:
-                for bet_identifier, sim_data in similarities.items():
-                    bet_type, bet_value = bet_identifier.split('_', 1)
-                    row = base_data.copy()
-                    row.update({
-                        'bet_type': bet_type,
-                        'bet_value': bet_value,
-                        'target_odd': sim_data['target_odd'],
-                        'similarity_pct': sim_data['similarity_percentage'],
-                        'similar_matches_count': sim_data['similar_matches_count'],
-                        'similarity_reference_count': sim_data['similarity_reference_count']
-                    })
-                    all_long_format_predictions.append(row)
-
-            time.sleep(1)  # Pause entre les appels API
+        # Les cotes de chaque match sont traitées dès qu'elles arrivent, puis les similarités
+        # de tous les matchs sont calculées en une passe ; les lignes suivent l'ordre des matchs
+        target_odds_by_fixture = {}
+        for index, odds_data in self.fetch_fixtures_odds(fixtures_data):
+            target_odds_by_fixture[index] = self.fixture_target_odds(fixtures_data[index], odds_data)
+
+        targets = pd.DataFrame.from_dict(
+            {index: target_odds for index, target_odds in sorted(target_odds_by_fixture.items()) if target_odds},
+            orient='index'
+        )
+        similarities = self.calculate_similarity_batch(targets)
+
+        all_long_format_predictions = [
+            row for index in sorted(target_odds_by_fixture)
+            for row in self.build_fixture_predictions(
+                fixtures_data[index], target_odds_by_fixture[index], similarities.get(index, {})
+            )
+        ]
         
         if not all_long_format_predictions:
             logger.warning("Aucune prédiction générée")
@@ -379,28 +359,13 @@ class DailyPredictionsWorkflow:
         
         # Sauvegarder CSV quotidien
         predictions_df.to_csv(daily_filepath, index=False, encoding='utf-8')
+        record_frame(daily_filepath, predictions_df)
         logger.info(f"💾 CSV quotidien sauvegardé: {daily_filepath} ({len(predictions_df)} matchs)")
         
-        # Ajouter au CSV historique
-        if os.path.exists(historical_filepath):
-            # Charger l'historique existant et ajouter les nouvelles données
-            historical_df = pd.read_csv(historical_filepath)
-            combined_df = pd.concat([historical_df, predictions_df], ignore_index=True)
-        else:
-            combined_df = predictions_df
-
-        # Dédupliquer en conservant la dernière analyse
-        combined_df.sort_values('analysis_timestamp', inplace=True)
-        combined_df = combined_df.drop_duplicates(
-            subset=['fixture_id', 'bet_type', 'bet_value'],
-            keep='last'
-        )
-
-        # Sauvegarder l'historique dédupliqué
-        combined_df.to_csv(historical_filepath, index=False, encoding='utf-8')
-        logger.info(
-            f"📚 CSV historique mis à jour: {historical_filepath} ({len(combined_df)} entrées totales)"
-        )
+        # Ajouter au CSV historique (ajout seul, la dernière analyse de chaque pari l'emporte)
+        appended = predictions_history(historical_filepath).upsert(predictions_df)
+        logger.info(f"📚 CSV historique mis à jour: {historical_filepath} ({appended} lignes ajoutées)")
+        sync_rows('predictions', predictions_df)
         
         return daily_filepath, historical_filepath
 
@@ -445,7 +410,8 @@ def main():
     
     # Lancer le workflow
     workflow = DailyPredictionsWorkflow(RAPIDAPI_KEY)
-    workflow.run_daily_workflow()
+    with workflow.api_client.track_stage('Prédictions par similarité'):
+        workflow.run_daily_workflow()
 
 if __name__ == "__main__":
     main()
@@ -3,13 +3,15 @@ Ce script génère des prédictions quotidiennes pour les matchs de football
 en se basant sur les classements Elo des équipes.
 
 Rôle :
-- Récupère les matchs prévus pour le jour même via l'API de football.
+- Récupère les matchs prévus pour le jour même dans les ligues configurées
+  (étape de découverte partagée avec le workflow de similarité).
 - Charge les classements Elo actuels depuis `data/elo_ratings.csv`.
 - Pour chaque match, calcule les probabilités de victoire, de nul et de défaite
   en se basant sur la différence d'Elo entre les deux équipes.
 - Inclut la différence d'Elo brute comme information supplémentaire.
 - Sauvegarde les prédictions dans un fichier CSV quotidien (`daily_elo_predictions.csv`)
-  et les ajoute à un historique complet (`historical_elo_predictions.csv`).
+  et les ajoute à un historique complet (`historical_elo_predictions.csv`, en ajout seul,
+  voir `src.prediction.prediction_history`).
 
 Dépendances :
 - `data/elo_ratings.csv` doit exister et être à jour.
@@ -19,11 +21,16 @@ import pandas as pd
 import numpy as np
 import os
 import glob
-import requests
 import logging
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple
 
+from src.api.client import get_client
+from src.prediction.fixtures_discovery import load_or_fetch_day_fixtures
+from src.prediction.prediction_history import elo_predictions_history
+from src.data_processing.catalog import record_frame
+from src.data_processing.warehouse import sync_rows
+
 # Configuration du logging
 os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
@@ -46,11 +53,7 @@ class EloPredictionWorkflow:
         Initialise le workflow avec la clé RapidAPI.
         """
         self.api_key = rapidapi_key
-        self.base_url = "https://api-football-v1.p.rapidapi.com/v3"
-        self.headers = {
-            'x-rapidapi-host': 'api-football-v1.p.rapidapi.com',
-            'x-rapidapi-key': self.api_key
-        }
+        self.api_client = get_client(self.api_key)
 
         self.elo_ratings_path = 'data/elo_ratings.csv'
         self.summary_path = 'data/analysis/elo_summary.csv'
@@ -100,26 +103,14 @@ class EloPredictionWorkflow:
             return pd.DataFrame()
 
     def make_api_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
-        """Effectue une requête à l'API."""
-        url = f"{self.base_url}/{endpoint}"
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur de requête API: {e}")
-            return None
+        """Effectue une requête à l'API via le client partagé."""
+        return self.api_client.get(endpoint, params)
 
     def get_today_fixtures(self) -> List[Dict]:
-        """Récupère les matchs du jour."""
-        today_str = self.today.strftime('%Y-%m-%d')
-        params = {'date': today_str}
-        data = self.make_api_request('fixtures', params)
-
-        if data and 'response' in data:
-            logger.info(f"Matchs du jour récupérés: {len(data['response'])}")
-            return data['response']
-        return []
+        """Récupère les matchs du jour des ligues configurées (étape de découverte partagée)."""
+        fixtures = load_or_fetch_day_fixtures(self.make_api_request, self.today)
+        logger.info(f"Matchs du jour récupérés: {len(fixtures)}")
+        return fixtures
 
     def calculate_elo_probabilities(self, home_elo: float, away_elo: float) -> Tuple[float, float, float]:
         """Calcule les probabilités de victoire basées sur l'Elo."""
@@ -226,19 +217,14 @@ class EloPredictionWorkflow:
         daily_filename = "daily_elo_predictions.csv"
         daily_filepath = os.path.join(self.predictions_dir, daily_filename)
         daily_df.to_csv(daily_filepath, index=False)
+        record_frame(daily_filepath, daily_df)
         logger.info(f"Prédictions Elo du jour sauvegardées dans: {daily_filepath}")
 
         # Mise à jour de l'historique
         historical_filepath = os.path.join(self.predictions_dir, 'historical_elo_predictions.csv')
-        if os.path.exists(historical_filepath):
-            historical_df = pd.read_csv(historical_filepath)
-            combined_df = pd.concat([historical_df, daily_df], ignore_index=True)
-        else:
-            combined_df = daily_df
-
-        combined_df.drop_duplicates(subset=['fixture_id'], keep='last', inplace=True)
-        combined_df.to_csv(historical_filepath, index=False)
+        elo_predictions_history(historical_filepath).upsert(daily_df)
         logger.info(f"Historique des prédictions Elo mis à jour: {historical_filepath}")
+        sync_rows('elo_predictions', daily_df)
 
         logger.info("✅ Workflow de prédiction Elo terminé.")
 
@@ -251,7 +237,8 @@ def main():
         return
 
     workflow = EloPredictionWorkflow(rapidapi_key=RAPIDAPI_KEY)
-    workflow.run()
+    with workflow.api_client.track_stage('Prédictions Elo'):
+        workflow.run()
 
 if __name__ == "__main__":
     main()
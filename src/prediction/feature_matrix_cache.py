@@ -0,0 +1,280 @@
+"""
+Matrices de caractéristiques historiques (match × pari) persistées et mises à jour
+de façon incrémentale.
+
+Rôle :
+- Les workflows de prédiction (quotidien, démo) refaisaient toute la chaîne
+  groupby → nunique → merge → mean → pivot sur l'année de cotes dès qu'une semaine
+  de cotes était ajoutée.
+- La matrice est enregistrée dans `FEATURE_MATRIX_CACHE_DIR` : `<nom>.npy` (cotes
+  moyennes, float64) et `<nom>.json` (index, colonnes, paramètres, état des sources).
+- L'état des sources retient, pour chaque unité de lecture (partition du store ou
+  CSV d'une ligue, voir `odds_source_units`), ses fichiers (taille, date de
+  modification) et les matchs qu'elle contient avec leur date.
+- Au chargement, seuls les matchs dont les cotes ont changé sont recalculés :
+  - segments ajoutés à une partition : les matchs présents dans ces segments ;
+  - partition réécrite (compaction), CSV modifié ou unité supprimée : les matchs
+    de l'unité, avant et après ;
+  les lignes de ces matchs sont agrégées (`build_feature_rows`) puis remplacées
+  dans la matrice.
+- Les matchs sortis de la fenêtre de rétention (date la plus récente antérieure à
+  `retention_days` jours) sont retirés de la matrice.
+- Le résultat est identique à une construction complète sur les mêmes cotes ;
+  un changement de paramètres (seuil de bookmakers, types de paris, ligues)
+  repart de zéro.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from src.config import FEATURE_MATRIX_CACHE_DIR, ODDS_DATA_DIR, ODDS_RETENTION_DAYS
+from src.data_processing.file_io import atomic_write, file_lock
+from src.data_processing.odds_store import (OddsStore, bet_identifier_column, concat_odds_frames,
+                                            odds_source_units, read_odds_csv)
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand la construction de la matrice change (invalide les caches existants)
+FEATURE_MATRIX_VERSION = 2
+
+# Colonnes de cotes lues pour construire la matrice
+FEATURE_ODDS_COLUMNS = ['fixture_id', 'fixture_date', 'bookmaker_id', 'bet_type_name', 'bet_value', 'odd']
+
+
+def params_fingerprint(params: Dict) -> str:
+    """Empreinte des paramètres de construction."""
+    payload = json.dumps({'version': FEATURE_MATRIX_VERSION, **params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def file_states(paths: Iterable[str]) -> Dict[str, List[int]]:
+    """Taille et date de modification de chaque fichier, par nom."""
+    states = {}
+    for path in paths:
+        stat = os.stat(path)
+        states[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+    return states
+
+
+def fixture_dates(df: pd.DataFrame) -> Dict[str, Optional[int]]:
+    """Date la plus récente (ns depuis l'epoch, None si inconnue) de chaque match."""
+    df = df.dropna(subset=['fixture_id'])
+    if df.empty:
+        return {}
+    latest = df.groupby('fixture_id')['fixture_date'].max()
+    return {str(int(fixture_id)): (None if pd.isna(date) else int(date.value)) for fixture_id, date in latest.items()}
+
+
+def build_feature_rows(odds: pd.DataFrame, min_bookmakers: int,
+                       bet_types: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Cotes moyennes par match et type de pari, pour les paris proposés par au moins
+    `min_bookmakers` bookmakers. Chaque ligne ne dépend que des cotes de son match.
+    """
+    if odds.empty:
+        return pd.DataFrame()
+
+    # Nettoyage des données
+    df = odds.copy()
+    df['odd'] = pd.to_numeric(df['odd'], errors='coerce')
+    df.dropna(subset=['odd'], inplace=True)
+    if bet_types is not None:
+        df = df[df['bet_type_name'].isin(bet_types)]
+    if df.empty:
+        return pd.DataFrame()
+
+    # Identifiant unique pour chaque type de pari + valeur (colonne category)
+    df['bet_identifier'] = bet_identifier_column(df)
+
+    # Filtrer les paris avec suffisamment de bookmakers
+    bookmaker_counts = df.groupby(['fixture_id', 'bet_identifier'], observed=True)['bookmaker_id'].nunique().reset_index()
+    reliable_bets = bookmaker_counts[bookmaker_counts['bookmaker_id'] >= min_bookmakers]
+    if reliable_bets.empty:
+        return pd.DataFrame()
+
+    reliable_df = pd.merge(df, reliable_bets[['fixture_id', 'bet_identifier']], on=['fixture_id', 'bet_identifier'])
+
+    # Cotes moyennes par fixture et type de pari, puis pivot
+    mean_odds = reliable_df.groupby(['fixture_id', 'bet_identifier'], observed=True)['odd'].mean().reset_index()
+    feature_matrix = mean_odds.pivot(index='fixture_id', columns='bet_identifier', values='odd')
+    feature_matrix.columns = feature_matrix.columns.astype(str)
+    return feature_matrix.sort_index(axis=1)
+
+
+class FeatureMatrixCache:
+    """Matrices enregistrées sous `cache_dir`, une paire `.npy` / `.json` par nom."""
+
+    def __init__(self, cache_dir: str = FEATURE_MATRIX_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _paths(self, name: str):
+        base = os.path.join(self.cache_dir, name)
+        return base + '.npy', base + '.json'
+
+    def load(self, name: str, fingerprint: str):
+        """(matrice, état des sources) enregistrés pour cette empreinte de paramètres, ou None."""
+        values_path, meta_path = self._paths(name)
+        with file_lock(values_path):
+            if not (os.path.exists(values_path) and os.path.exists(meta_path)):
+                return None
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('fingerprint') != fingerprint:
+                return None
+            values = np.load(values_path)
+        index = pd.Index(meta['index'], dtype=meta['index_dtype'], name=meta['index_name'])
+        columns = pd.Index(meta['columns'], dtype=meta['columns_dtype'], name=meta['columns_name'])
+        return pd.DataFrame(values, index=index, columns=columns, copy=False), meta['units']
+
+    def save(self, name: str, fingerprint: str, matrix: pd.DataFrame, units: Dict[str, Dict]) -> None:
+        values_path, meta_path = self._paths(name)
+        meta = {
+            'fingerprint': fingerprint,
+            'index': matrix.index.tolist(),
+            'index_dtype': str(matrix.index.dtype),
+            'index_name': matrix.index.name,
+            'columns': [str(column) for column in matrix.columns],
+            'columns_dtype': str(matrix.columns.dtype),
+            'columns_name': matrix.columns.name,
+            'units': units,
+        }
+        with file_lock(values_path):
+            with atomic_write(values_path, mode='wb') as f:
+                np.save(f, matrix.to_numpy(dtype=np.float64))
+            with atomic_write(meta_path) as f:
+                json.dump(meta, f)
+
+
+class IncrementalFeatureMatrix:
+    """Matrice `name` des ligues `leagues`, tenue à jour à partir de l'état enregistré."""
+
+    def __init__(self, name: str, leagues: Iterable[str], min_bookmakers: int,
+                 bet_types: Optional[List[str]] = None, retention_days: Optional[int] = ODDS_RETENTION_DAYS,
+                 store: Optional[OddsStore] = None, csv_dir: str = ODDS_DATA_DIR,
+                 cache: Optional[FeatureMatrixCache] = None):
+        self.name = name
+        self.leagues = list(leagues)
+        self.min_bookmakers = min_bookmakers
+        self.bet_types = list(bet_types) if bet_types is not None else None
+        self.retention_days = retention_days
+        self.store = store or OddsStore()
+        self.csv_dir = csv_dir
+        self.cache = cache or FeatureMatrixCache()
+
+    def fingerprint(self) -> str:
+        return params_fingerprint({'leagues': self.leagues, 'min_bookmakers': self.min_bookmakers,
+                                   'bet_types': self.bet_types, 'retention_days': self.retention_days})
+
+    def _load_state(self, fingerprint: str):
+        try:
+            state = self.cache.load(self.name, fingerprint)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Cache de la matrice {self.name} illisible, reconstruction: {e}")
+            state = None
+        return state or (pd.DataFrame(), {})
+
+    def _read_unit(self, unit: str, paths: List[str], columns: List[str],
+                   fixture_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """Cotes d'une unité (partition ou CSV), limitées à `fixture_ids` si demandé."""
+        if unit.endswith('.csv'):
+            df = read_odds_csv(unit, columns)
+            return df if fixture_ids is None else df[df['fixture_id'].isin(list(fixture_ids))]
+        return self.store.read_files(paths, columns, fixture_ids)
+
+    def _cutoff(self) -> Optional[int]:
+        if self.retention_days is None:
+            return None
+        return (pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=self.retention_days)).value
+
+    def update(self) -> pd.DataFrame:
+        """Matrice à jour : seuls les matchs dont les cotes ont changé sont recalculés."""
+        fingerprint = self.fingerprint()
+        matrix, old_units = self._load_state(fingerprint)
+        sources = odds_source_units(self.leagues, self.store, self.csv_dir)
+
+        # 1. Matchs touchés : lecture des seuls identifiants et dates des fichiers nouveaux ou modifiés
+        units: Dict[str, Dict] = {}
+        touched: Set[str] = set()
+        for unit, paths in sources.items():
+            files = file_states(paths)
+            old = old_units.get(unit)
+            if old is not None and old['files'] == files:
+                units[unit] = old
+                continue
+            appended_only = (old is not None and not unit.endswith('.csv')
+                             and all(files.get(name) == state for name, state in old['files'].items()))
+            if appended_only:
+                new_paths = [path for path in paths if os.path.basename(path) not in old['files']]
+                new_fixtures = fixture_dates(self._read_unit(unit, new_paths, ['fixture_id', 'fixture_date']))
+                fixtures = dict(old['fixtures'])
+                for fixture_id, date in new_fixtures.items():
+                    previous = fixtures.get(fixture_id)
+                    fixtures[fixture_id] = date if previous is None or (date is not None and date > previous) else previous
+            else:
+                new_fixtures = fixture_dates(self._read_unit(unit, paths, ['fixture_id', 'fixture_date']))
+                fixtures = new_fixtures
+                touched.update(old['fixtures'] if old is not None else ())
+            touched.update(new_fixtures)
+            units[unit] = {'files': files, 'fixtures': fixtures}
+        for unit in old_units.keys() - sources.keys():
+            touched.update(old_units[unit]['fixtures'])
+
+        # 2. Fenêtre de rétention : date la plus récente de chaque match, toutes unités confondues
+        latest: Dict[str, Optional[int]] = {}
+        for unit in units.values():
+            for fixture_id, date in unit['fixtures'].items():
+                if date is not None and (latest.get(fixture_id) is None or date > latest[fixture_id]):
+                    latest[fixture_id] = date
+                else:
+                    latest.setdefault(fixture_id, date)
+        cutoff = self._cutoff()
+        expired = {fixture_id for fixture_id, date in latest.items()
+                   if cutoff is not None and date is not None and date < cutoff}
+        stale = {int(fixture_id) for fixture_id in touched | expired}
+        stale.intersection_update(matrix.index)
+        recompute = sorted(int(fixture_id) for fixture_id in touched if fixture_id in latest and fixture_id not in expired)
+
+        if not touched and not stale:
+            logger.info(f"⚡ Matrice {self.name} relue depuis le cache: {matrix.shape[0]} matchs, {matrix.shape[1]} types de paris")
+            return matrix
+
+        # 3. Agrégation des seuls matchs touchés (lignes lues dans l'ordre de `load_odds`)
+        new_rows = pd.DataFrame()
+        if recompute:
+            wanted = {str(fixture_id) for fixture_id in recompute}
+            frames = []
+            for unit, paths in sources.items():
+                fixture_ids = [int(fixture_id) for fixture_id in units[unit]['fixtures'] if fixture_id in wanted]
+                if fixture_ids:
+                    frames.append(self._read_unit(unit, paths, FEATURE_ODDS_COLUMNS, sorted(fixture_ids)))
+            if frames:
+                new_rows = build_feature_rows(concat_odds_frames(frames), self.min_bookmakers, self.bet_types)
+
+        matrix = matrix.drop(index=list(stale))
+        if not new_rows.empty:
+            matrix = new_rows if matrix.empty else pd.concat([matrix, new_rows])
+        if not matrix.empty:
+            matrix = matrix.dropna(axis=1, how='all').sort_index().sort_index(axis=1)
+            matrix.columns = matrix.columns.astype(str)
+            matrix.columns.name = 'bet_identifier'
+        logger.info(f"🔄 Matrice {self.name} mise à jour: {len(recompute)} matchs recalculés, "
+                    f"{len(stale - set(recompute))} retirés → "
+                    f"{matrix.shape[0]} matchs, {matrix.shape[1]} types de paris")
+
+        try:
+            self.cache.save(self.name, fingerprint, matrix, units)
+        except OSError as e:
+            logger.warning(f"⚠️ Cache de la matrice {self.name} non enregistré: {e}")
+        return matrix
+
+
+def cached_feature_matrix(name: str, leagues: Iterable[str], min_bookmakers: int,
+                          bet_types: Optional[List[str]] = None,
+                          cache: Optional[FeatureMatrixCache] = None) -> pd.DataFrame:
+    """Matrice `name` des cotes de `leagues`, mise à jour depuis le dernier passage."""
+    return IncrementalFeatureMatrix(name, leagues, min_bookmakers, bet_types=bet_types, cache=cache).update()
@@ -0,0 +1,115 @@
+"""
+Étape de découverte des matchs du jour, partagée par les workflows de prédiction.
+
+Rôle :
+- Récupère tous les matchs d'une date avec un seul appel `fixtures?date=`
+  (en suivant la pagination si l'API en renvoie une).
+- Filtre localement les ligues configurées dans `config.ALL_LEAGUES` et
+  enrichit chaque match avec `league_code`, `league_name` et `country`.
+- Écrit un instantané `data/cache/fixtures_<date>.json` : le workflow Elo et le
+  workflow de similarité d'une même exécution de la pipeline réutilisent cette
+  liste au lieu d'interroger l'API chacun de leur côté.
+
+Pour lancer l'étape seule :
+python -m src.prediction.fixtures_discovery
+"""
+import json
+import logging
+import os
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from src.config import ALL_LEAGUES, API_CACHE_TTLS
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_SNAPSHOT_DIR = os.path.join('data', 'cache')
+
+# Durée pendant laquelle l'instantané est considéré comme valable (une exécution de pipeline)
+FIXTURES_SNAPSHOT_TTL = API_CACHE_TTLS['fixtures']
+
+# Index des ligues configurées par identifiant API
+LEAGUES_BY_ID = {info['id']: (code, info) for code, info in ALL_LEAGUES.items()}
+
+
+def fetch_day_fixtures(make_api_request: Callable[[str, Dict], Optional[Dict]], day: date) -> List[Dict]:
+    """Récupère les matchs du jour des ligues configurées en une seule requête (paginée si besoin)."""
+    params = {'date': day.strftime('%Y-%m-%d')}
+    data = make_api_request('fixtures', params)
+    if not data or 'response' not in data:
+        return []
+
+    day_fixtures = list(data['response'])
+    total_pages = data.get('paging', {}).get('total', 1) or 1
+    for page in range(2, total_pages + 1):
+        page_data = make_api_request('fixtures', {**params, 'page': page})
+        if page_data and 'response' in page_data:
+            day_fixtures.extend(page_data['response'])
+
+    fixtures = []
+    for fixture in day_fixtures:
+        league_id = fixture.get('league', {}).get('id')
+        if league_id not in LEAGUES_BY_ID:
+            continue
+        league_code, league_info = LEAGUES_BY_ID[league_id]
+        fixture['league_code'] = league_code
+        fixture['league_name'] = league_info['name']
+        fixture['country'] = league_info['country']
+        fixtures.append(fixture)
+
+    logger.info(f"📅 {len(fixtures)} matchs du {params['date']} dans les ligues configurées "
+                f"(sur {len(day_fixtures)} matchs au total)")
+    return fixtures
+
+
+def snapshot_path(day: date, snapshot_dir: str = FIXTURES_SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, f"fixtures_{day.strftime('%Y-%m-%d')}.json")
+
+
+def load_or_fetch_day_fixtures(make_api_request: Callable[[str, Dict], Optional[Dict]], day: date,
+                               snapshot_dir: str = FIXTURES_SNAPSHOT_DIR) -> List[Dict]:
+    """
+    Renvoie les matchs du jour depuis l'instantané de la pipeline s'il est récent,
+    sinon les récupère via l'API et met l'instantané à jour.
+    """
+    path = snapshot_path(day, snapshot_dir)
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < FIXTURES_SNAPSHOT_TTL:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                fixtures = json.load(f)
+            logger.info(f"📂 {len(fixtures)} matchs du jour repris de l'étape de découverte: {path}")
+            return fixtures
+        except (OSError, ValueError) as e:
+            logger.warning(f"Instantané des matchs illisible ({path}): {e}")
+
+    fixtures = fetch_day_fixtures(make_api_request, day)
+    if fixtures:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(fixtures, f)
+    return fixtures
+
+
+def main():
+    """Point d'entrée : lance l'étape de découverte pour aujourd'hui."""
+    from src.api.client import get_client
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    api_key = os.environ.get('RAPIDAPI_KEY')
+    if not api_key:
+        logger.error("Clé RAPIDAPI_KEY non trouvée dans les variables d'environnement.")
+        return
+
+    client = get_client(api_key)
+    today = date.today()
+    with client.track_stage('Découverte des matchs'):
+        fixtures = fetch_day_fixtures(client.get, today)
+    os.makedirs(FIXTURES_SNAPSHOT_DIR, exist_ok=True)
+    with open(snapshot_path(today), 'w', encoding='utf-8') as f:
+        json.dump(fixtures, f)
+    logger.info(f"💾 Instantané des matchs du jour: {snapshot_path(today)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Historiques cumulatifs des prédictions en ajout seul.
+
+Rôle :
+- `historical_predictions.csv` (clé fixture_id, bet_type, bet_value) et
+  `historical_elo_predictions.csv` (clé fixture_id) ne sont plus relus, triés et
+  réécrits en entier à chaque exécution : les nouvelles lignes sont ajoutées en fin
+  de fichier.
+- Un index persistant des clés (`<fichier>.keys.sqlite`) garde, pour chaque clé,
+  l'horodatage de sa dernière analyse. Une mise à jour ne consulte que les clés
+  des nouvelles lignes : son coût ne dépend pas de la longueur de l'historique.
+- Une ligne plus ancienne que celle déjà enregistrée pour sa clé est ignorée ;
+  les lignes remplacées restent dans le fichier jusqu'à la compaction, faite
+  automatiquement quand elles atteignent le nombre de lignes à jour (coût amorti
+  constant par ligne ajoutée). `read()` renvoie toujours la dernière ligne de chaque clé,
+  comme l'ancien tri + déduplication.
+- L'index est reconstruit depuis le CSV quand ce dernier a été modifié par ailleurs
+  (taille différente de celle enregistrée), par exemple après un `git pull`.
+"""
+import logging
+import os
+import sqlite3
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from src.data_processing.catalog import record_frame
+from src.data_processing.file_io import file_lock, write_csv
+
+logger = logging.getLogger(__name__)
+
+PREDICTIONS_KEY = ['fixture_id', 'bet_type', 'bet_value']
+ELO_PREDICTIONS_KEY = ['fixture_id']
+INDEX_SUFFIX = '.keys.sqlite'
+
+
+class PredictionHistory:
+    """Historique CSV en ajout seul, dédupliqué sur `key_columns` (dernier `order_column` gagnant)."""
+
+    def __init__(self, csv_path: str, key_columns: List[str], order_column: Optional[str] = None):
+        self.csv_path = csv_path
+        self.key_columns = key_columns
+        self.order_column = order_column
+        self.index_path = os.path.splitext(csv_path)[0] + INDEX_SUFFIX
+
+    # --- Index des clés ---
+
+    def _csv_bytes(self) -> int:
+        return os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+
+    def _connect(self, rebuild: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.index_path)
+        key_sql = ', '.join(f'k{i} TEXT NOT NULL' for i in range(len(self.key_columns)))
+        primary_key = ', '.join(f'k{i}' for i in range(len(self.key_columns)))
+        conn.execute(f"CREATE TABLE IF NOT EXISTS keys ({key_sql}, stamp TEXT, PRIMARY KEY ({primary_key}))")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        meta = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+        if rebuild or meta.get('csv_bytes') != self._csv_bytes():
+            self._rebuild_index(conn)
+        return conn
+
+    def _key_tuples(self, df: pd.DataFrame) -> List[Tuple[str, ...]]:
+        return list(zip(*([('' if pd.isna(value) else str(value)) for value in df[column]]
+                          for column in self.key_columns)))
+
+    def _stamps(self, df: pd.DataFrame) -> List[Optional[str]]:
+        if self.order_column is None:
+            return [None] * len(df)
+        return [None if pd.isna(value) else str(value) for value in df[self.order_column]]
+
+    def _write_index(self, conn: sqlite3.Connection, df: pd.DataFrame) -> None:
+        placeholders = ', '.join('?' * (len(self.key_columns) + 1))
+        conn.executemany(f"INSERT OR REPLACE INTO keys VALUES ({placeholders})",
+                         [key + (stamp,) for key, stamp in zip(self._key_tuples(df), self._stamps(df))])
+
+    def _set_meta(self, conn: sqlite3.Connection, rows: int) -> None:
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                         [('rows', rows), ('csv_bytes', self._csv_bytes())])
+        conn.commit()
+
+    def _rebuild_index(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM keys")
+        df = self._read_csv(dtype=str)
+        if not df.empty:
+            self._write_index(conn, self._latest(df))
+            logger.info(f"🔑 Index des clés reconstruit pour {self.csv_path} ({len(df)} lignes)")
+        self._set_meta(conn, len(df))
+
+    # --- Lecture ---
+
+    def _read_csv(self, **kwargs) -> pd.DataFrame:
+        if not os.path.exists(self.csv_path):
+            return pd.DataFrame()
+        return pd.read_csv(self.csv_path, **kwargs)
+
+    def _latest(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Dernière ligne de chaque clé (après tri stable sur `order_column`)."""
+        if df.empty or not set(self.key_columns) <= set(df.columns):
+            return df
+        if self.order_column in df.columns:
+            df = df.sort_values(self.order_column, kind='stable')
+        return df.drop_duplicates(subset=self.key_columns, keep='last')
+
+    def read(self) -> pd.DataFrame:
+        """Historique dédupliqué."""
+        return self._latest(self._read_csv())
+
+    # --- Écriture ---
+
+    def compact(self, new_rows: Optional[pd.DataFrame] = None) -> int:
+        """Réécrit le fichier sans les lignes remplacées. Renvoie le nombre de lignes gardées."""
+        with file_lock(self.csv_path):
+            df = self._read_csv()
+            if new_rows is not None:
+                df = pd.concat([df, new_rows], ignore_index=True)
+            df = self._latest(df)
+            write_csv(df, self.csv_path, encoding='utf-8')
+            record_frame(self.csv_path, df)
+            self._connect(rebuild=True).close()
+            return len(df)
+
+    def upsert(self, df: pd.DataFrame) -> int:
+        """Ajoute les lignes nouvelles ou plus récentes que l'historique. Renvoie le nombre de lignes ajoutées."""
+        df = self._latest(df)
+        if df.empty:
+            return 0
+        with file_lock(self.csv_path):
+            conn = self._connect()
+            try:
+                keys = self._key_tuples(df)
+                where = ' AND '.join(f'k{i} = ?' for i in range(len(self.key_columns)))
+                known = [conn.execute(f"SELECT stamp FROM keys WHERE {where}", key).fetchone() for key in keys]
+                if self.order_column is not None:
+                    keep = [row is None or row[0] is None or (stamp is not None and stamp >= row[0])
+                            for row, stamp in zip(known, self._stamps(df))]
+                    df = df[keep]
+                    known = [row for row, kept in zip(known, keep) if kept]
+                if df.empty:
+                    return 0
+                replaced = sum(row is not None for row in known)
+                rows = (conn.execute("SELECT value FROM meta WHERE name = 'rows'").fetchone() or (0,))[0]
+
+                header = list(pd.read_csv(self.csv_path, nrows=0).columns) if os.path.exists(self.csv_path) else None
+                if header is None:
+                    write_csv(df, self.csv_path, encoding='utf-8')
+                    record_frame(self.csv_path, df)
+                elif not set(df.columns) <= set(header):
+                    # Nouvelles colonnes : le fichier est réécrit une fois avec l'en-tête élargi
+                    conn.close()
+                    conn = None
+                    self.compact(df)
+                    logger.info(f"📚 {self.csv_path}: en-tête élargi, historique réécrit")
+                    return len(df)
+                else:
+                    with open(self.csv_path, 'a', encoding='utf-8', newline='') as f:
+                        df.reindex(columns=header).to_csv(f, index=False, header=False)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    record_frame(self.csv_path, df.reindex(columns=header), append=True)
+
+                self._write_index(conn, df)
+                rows += len(df)
+                self._set_meta(conn, rows)
+                live = conn.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+            finally:
+                if conn is not None:
+                    conn.close()
+            if rows - live >= live:
+                self.compact()
+                logger.info(f"🧹 {self.csv_path}: {rows - live} lignes remplacées supprimées")
+            logger.debug(f"{self.csv_path}: {len(df)} lignes ajoutées dont {replaced} remplacent une analyse")
+            return len(df)
+
+
+def predictions_history(csv_path: str) -> PredictionHistory:
+    """Historique des prédictions par similarité (dernière analyse de chaque pari)."""
+    return PredictionHistory(csv_path, PREDICTIONS_KEY, order_column='analysis_timestamp')
+
+
+def elo_predictions_history(csv_path: str) -> PredictionHistory:
+    """Historique des prédictions Elo (dernière prédiction de chaque match)."""
+    return PredictionHistory(csv_path, ELO_PREDICTIONS_KEY)
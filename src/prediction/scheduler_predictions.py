@@ -14,16 +14,10 @@ from datetime import datetime
 # Déterminer la racine du dépôt
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
-# Chemins des scripts utilisés par le scheduler
-DAILY_PREDICTIONS_SCRIPT = os.path.join(
-    ROOT_DIR, "src", "prediction", "daily_predictions_workflow.py"
-)
-DATA_UPDATER_SCRIPT = os.path.join(
-    ROOT_DIR, "src", "data_processing", "football_data_updater.py"
-)
-ODDS_COLLECTOR_SCRIPT = os.path.join(
-    ROOT_DIR, "src", "data_processing", "football_odds_collector.py"
-)
+# Modules lancés par le scheduler (via `python3 -m` pour résoudre les imports `src.`)
+DAILY_PREDICTIONS_SCRIPT = "src.prediction.daily_predictions_workflow"
+DATA_UPDATER_SCRIPT = "src.data_processing.football_data_updater"
+ODDS_COLLECTOR_SCRIPT = "src.data_processing.football_odds_collector"
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,7 +36,7 @@ def run_daily_predictions():
     try:
         # Exécuter le script de prédictions
         result = subprocess.run(
-            ["python3", DAILY_PREDICTIONS_SCRIPT],
+            ["python3", "-m", DAILY_PREDICTIONS_SCRIPT],
             capture_output=True,
             text=True,
             cwd=ROOT_DIR
@@ -84,7 +78,7 @@ def run_data_collection():
     try:
         # Lancer la mise à jour des données de matchs
         result1 = subprocess.run(
-            ["python3", DATA_UPDATER_SCRIPT],
+            ["python3", "-m", DATA_UPDATER_SCRIPT],
             capture_output=True,
             text=True,
             cwd=ROOT_DIR
@@ -100,7 +94,7 @@ def run_data_collection():
         
         # Lancer la collecte des cotes
         result2 = subprocess.run(
-            ["python3", ODDS_COLLECTOR_SCRIPT],
+            ["python3", "-m", ODDS_COLLECTOR_SCRIPT],
             capture_output=True,
             text=True,
             cwd=ROOT_DIR
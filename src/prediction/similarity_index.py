@@ -0,0 +1,150 @@
+"""
+Index trié de la matrice de caractéristiques pour le calcul de similarité.
+
+Rôle :
+- Pour chaque colonne (bet_identifier) de la matrice historique (match × pari),
+  garde les cotes non manquantes triées et leurs sommes cumulées.
+- Le nombre de matchs à moins de `threshold` d'une cote cible et leur distance
+  moyenne se calculent alors avec deux `searchsorted` (O(log N) par pari) au lieu
+  d'un parcours complet de la colonne (`dropna`, `abs`, masque).
+- `SimilarityIndex.batch_similarity` traite une matrice de cibles (tous les matchs
+  du jour, ou de la semaine, × bet_identifier) en une passe vectorisée par colonne :
+  `searchsorted` sur toutes les cibles de la colonne, sans boucle Python par pari.
+- Les résultats sont identiques à l'ancien calcul :
+  - les bornes sont ajustées avec le prédicat exact `abs(cote - cible) <= threshold`
+    (monotone en la cote), sur les seules valeurs voisines des bornes ;
+  - la moyenne issue des sommes cumulées n'est gardée que si elle est loin d'une
+    limite d'arrondi à `AVG_DISTANCE_DECIMALS` décimales ; sinon elle est recalculée
+    comme avant (somme des distances dans l'ordre de la matrice).
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Décimales de `avg_distance` dans les prédictions
+AVG_DISTANCE_DECIMALS = 4
+# Marge relative autour des bornes (bien au-dessus de l'erreur d'arrondi de `cote - cible`)
+_BOUND_MARGIN = 1e-9
+_EPS = np.finfo(np.float64).eps
+
+
+class SortedOddsColumn:
+    """Cotes non manquantes d'un pari : dans l'ordre de la matrice, triées, et sommes cumulées."""
+
+    __slots__ = ('values', 'order', 'sorted_values', 'prefix_sums')
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.order = np.argsort(values, kind='stable')
+        self.sorted_values = values[self.order]
+        self.prefix_sums = np.concatenate(([0.0], np.cumsum(self.sorted_values)))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _count_within(self, starts: np.ndarray, stops: np.ndarray, targets: np.ndarray,
+                      threshold: float) -> np.ndarray:
+        """Pour chaque cible, nombre de cotes de la tranche triée [start, stop) à moins de `threshold`."""
+        lengths = stops - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(len(targets), dtype=np.int64)
+        # Tranches mises bout à bout (elles ne contiennent que les cotes voisines des bornes)
+        owners = np.repeat(np.arange(len(targets)), lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        within = np.abs(self.sorted_values[starts[owners] + offsets] - targets[owners]) <= threshold
+        return np.bincount(owners, weights=within, minlength=len(targets)).astype(np.int64)
+
+    def similar_ranges(self, targets: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Tranches [lo, hi) des cotes triées telles que `abs(cote - cible) <= threshold`, pour chaque cible."""
+        margin = np.minimum(_BOUND_MARGIN * np.maximum(1.0, np.abs(targets) + threshold), threshold / 2)
+        values = self.sorted_values
+        # Borne basse : dans la zone ambiguë, les cotes hors seuil sont en tête
+        a = values.searchsorted(targets - threshold - margin, side='left')
+        b = values.searchsorted(targets - threshold + margin, side='right')
+        lo = b - self._count_within(a, b, targets, threshold)
+        # Borne haute : dans la zone ambiguë, les cotes dans le seuil sont en tête
+        c = values.searchsorted(targets + threshold - margin, side='left')
+        d = values.searchsorted(targets + threshold + margin, side='right')
+        hi = c + self._count_within(c, d, targets, threshold)
+        return lo, np.maximum(lo, hi)
+
+    def distance_sums(self, lo: np.ndarray, hi: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Sommes des `abs(cote - cible)` des tranches triées [lo, hi), par les sommes cumulées."""
+        mid = np.clip(self.sorted_values.searchsorted(targets, side='left'), lo, hi)
+        below = targets * (mid - lo) - (self.prefix_sums[mid] - self.prefix_sums[lo])
+        above = (self.prefix_sums[hi] - self.prefix_sums[mid]) - targets * (hi - mid)
+        return below + above
+
+    def exact_mean_distance(self, lo: int, hi: int, target: float) -> np.float64:
+        """Moyenne des distances comme l'ancien calcul pandas (ordre de la matrice)."""
+        distances = np.abs(self.values[np.sort(self.order[lo:hi])] - target)
+        return distances.sum() / len(distances)
+
+    def batch_similarity(self, targets: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Nombre de cotes similaires et distance moyenne (NaN si aucune) de chaque cible, en une passe."""
+        targets = np.asarray(targets, dtype=np.float64)
+        lo, hi = self.similar_ranges(targets, threshold)
+        counts = hi - lo
+        found = counts > 0
+        means = np.full(len(targets), np.nan)
+        means[found] = self.distance_sums(lo[found], hi[found], targets[found]) / counts[found]
+        # Borne (large) de l'erreur des sommes cumulées, en unités de la dernière décimale
+        scale = 10 ** AVG_DISTANCE_DECIMALS
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = 4 * len(self) * _EPS * (self.prefix_sums[-1] + np.abs(targets) * counts) / counts * scale
+            scaled = means * scale
+            ambiguous = found & ((np.abs(scaled - np.floor(scaled) - 0.5) <= error) | (means < 0))
+        # Cas rares : moyenne recalculée dans l'ordre de la matrice
+        for k in np.flatnonzero(ambiguous):
+            means[k] = self.exact_mean_distance(lo[k], hi[k], targets[k])
+        return counts, means
+
+    def similarity(self, target: float, threshold: float) -> Tuple[int, Optional[np.float64]]:
+        """Nombre de cotes similaires et distance moyenne (None si aucune)."""
+        counts, means = self.batch_similarity(np.array([target]), threshold)
+        if counts[0] == 0:
+            return 0, None
+        return int(counts[0]), means[0]
+
+
+class SimilarityIndex:
+    """Colonnes triées de la matrice de caractéristiques, construites à la première utilisation."""
+
+    def __init__(self, feature_matrix: pd.DataFrame):
+        self.feature_matrix = feature_matrix
+        self._columns: Dict[str, SortedOddsColumn] = {}
+
+    def __contains__(self, bet_identifier: str) -> bool:
+        return bet_identifier in self.feature_matrix.columns
+
+    def column(self, bet_identifier: str) -> SortedOddsColumn:
+        column = self._columns.get(bet_identifier)
+        if column is None:
+            values = self.feature_matrix[bet_identifier].to_numpy(dtype=np.float64)
+            column = SortedOddsColumn(values[~np.isnan(values)])
+            self._columns[bet_identifier] = column
+        return column
+
+    def batch_similarity(self, targets: pd.DataFrame,
+                         threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Similarité d'une matrice de cibles (matchs × bet_identifier, NaN = pari non coté),
+        calculée colonne par colonne sur toutes les cibles à la fois.
+        Renvoie (nombres de cotes similaires, distances moyennes, nombres de cotes historiques par colonne) ;
+        les colonnes absentes de la matrice historique ont 0 cote historique.
+        """
+        values = targets.to_numpy(dtype=np.float64)
+        counts = np.zeros(values.shape, dtype=np.int64)
+        means = np.full(values.shape, np.nan)
+        totals = np.zeros(values.shape[1], dtype=np.int64)
+        for j, bet_identifier in enumerate(targets.columns):
+            if bet_identifier not in self:
+                continue
+            column = self.column(bet_identifier)
+            totals[j] = len(column)
+            rows = np.flatnonzero(~np.isnan(values[:, j]))
+            if len(rows) and len(column):
+                counts[rows, j], means[rows, j] = column.batch_similarity(values[rows, j], threshold)
+        return counts, means, totals
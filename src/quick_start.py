@@ -10,6 +10,8 @@ import logging
 import argparse
 from datetime import datetime
 
+from src.data_processing.catalog import get_catalog
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -151,11 +153,18 @@ def show_status():
         if not found:
             logger.info("📁 Aucun fichier de prédictions trouvé")
     
-    # Données historiques
-    odds_dir = 'data/odds/raw_data'
-    if os.path.exists(odds_dir):
-        odds_files = [f for f in os.listdir(odds_dir) if f.endswith('.csv')]
-        logger.info(f"📈 Fichiers de cotes: {len(odds_files)}")
+    # Données historiques (catalogue : lignes, période et dernière écriture sans relire les fichiers)
+    catalog = get_catalog()
+    for label, pattern in [("Matchs", 'matches/*.csv'), ("Cotes", 'odds/raw_data/*.csv'),
+                           ("Store de cotes", 'odds/store/league=*'), ("Stats joueurs", 'players/player_stats/*'),
+                           ("Prédictions", 'predictions/*.csv')]:
+        entries = catalog.datasets(pattern)
+        if not entries:
+            continue
+        rows = sum(entry['rows'] for entry in entries.values())
+        last_date = max((entry['max_date'] for entry in entries.values() if entry['max_date']), default='-')
+        last_write = max(entry['updated_at'] for entry in entries.values())
+        logger.info(f"📈 {label}: {len(entries)} fichiers, {rows} lignes, jusqu'au {last_date} (écrit le {last_write})")
 
 def main():
     """Point d'entrée principal"""
@@ -9,6 +9,8 @@ import subprocess
 import sys
 from datetime import datetime
 
+from src.data_processing.catalog import get_catalog
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -78,9 +80,10 @@ def check_historical_data():
         logger.warning(f"❌ Dossier des cotes non trouvé: {odds_dir}")
         return False
     
-    # Compter les fichiers de cotes
-    odds_files = [f for f in os.listdir(odds_dir) if f.endswith('_complete_odds.csv')]
-    logger.info(f"📈 {len(odds_files)} fichiers de cotes trouvés")
+    # Fichiers de cotes, décrits par le catalogue des données
+    odds_files = get_catalog().datasets('odds/raw_data/*_complete_odds.csv')
+    rows = sum(entry['rows'] for entry in odds_files.values())
+    logger.info(f"📈 {len(odds_files)} fichiers de cotes trouvés ({rows} cotes)")
     
     if len(odds_files) < 5:
         logger.warning("⚠️ Peu de données historiques disponibles (< 5 ligues)")
@@ -4,13 +4,18 @@ from jinja2 import Environment, FileSystemLoader
 import os
 from datetime import datetime
 
-def load_csv_to_dict(path, file_type=""):
-    """Charge un fichier CSV et le retourne comme une liste de dictionnaires."""
+from src.prediction.prediction_history import elo_predictions_history, predictions_history
+
+def load_csv_to_dict(path, file_type="", history=None):
+    """
+    Charge un fichier CSV et le retourne comme une liste de dictionnaires.
+    `history` (historique en ajout seul) renvoie seulement la dernière ligne de chaque clé.
+    """
     if not os.path.exists(path):
         print(f"ℹ️ Fichier non trouvé pour {file_type}: {path}")
         return []
     try:
-        df = pd.read_csv(path)
+        df = history(path).read() if history else pd.read_csv(path)
         # Remplacer les NaN par None pour une meilleure gestion par Jinja2
         df = df.replace({np.nan: None})
         print(f"✅ {len(df)} lignes chargées depuis {path}")
@@ -57,8 +62,8 @@ def generate_site():
     elo_history_path = 'data/predictions/historical_elo_predictions.csv'
     odds_history_path = 'data/predictions/historical_predictions.csv'
     summary_data = load_csv_to_dict(summary_path, "Bilan Elo")
-    elo_history_data = load_csv_to_dict(elo_history_path, "Historique Elo")
-    odds_history_data = load_csv_to_dict(odds_history_path, "Historique Cotes")
+    elo_history_data = load_csv_to_dict(elo_history_path, "Historique Elo", elo_predictions_history)
+    odds_history_data = load_csv_to_dict(odds_history_path, "Historique Cotes", predictions_history)
 
     # Paramètres communs pour les modèles
     template_params = {
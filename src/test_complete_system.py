@@ -18,7 +18,7 @@ def test_demo_workflow():
     logger.info("🎭 === TEST DU WORKFLOW DÉMONSTRATION ===")
     
     try:
-        from demo_predictions import DemoPredictionsWorkflow
+        from src.demo_predictions import DemoPredictionsWorkflow
         
         workflow = DemoPredictionsWorkflow()
         workflow.run_demo_workflow()
@@ -33,7 +33,7 @@ def test_analyzer():
     logger.info("📊 === TEST DE L'ANALYSEUR ===")
     
     try:
-        from analysis.predictions_analyzer import PredictionsAnalyzer
+        from src.analysis.predictions_analyzer import PredictionsAnalyzer
         import pandas as pd
         
         analyzer = PredictionsAnalyzer()
@@ -68,7 +68,7 @@ def test_enrich_predictions():
     logger.info("📈 === TEST ENRICHISSEMENT DES PRÉDICTIONS ===")
 
     try:
-        from analysis.predictions_analyzer import PredictionsAnalyzer
+        from src.analysis.predictions_analyzer import PredictionsAnalyzer
         import pandas as pd
 
         analyzer = PredictionsAnalyzer()
@@ -0,0 +1,266 @@
+import pytest
+import requests
+from src.api.client import ApiFootballClient, get_client
+
+
+@pytest.fixture
+def client(mocker):
+    """Client de test sans pause entre les tentatives."""
+    mocker.patch("src.api.client.time.sleep", return_value=None)
+    return ApiFootballClient(api_key="dummy_key_for_testing", base_url="http://localhost/v3")
+
+
+def _response(mocker, status_code, payload=None, headers=None):
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = payload or {}
+    response.text = str(payload)
+    return response
+
+
+def test_get_client_is_shared_per_key():
+    """Le même client (et donc le même pool de connexions) est renvoyé pour une clé donnée."""
+    assert get_client("key_a") is get_client("key_a")
+    assert get_client("key_a") is not get_client("key_b")
+
+
+def test_session_requests_gzip_with_api_headers(client):
+    headers = client.session.headers
+    assert headers["x-rapidapi-key"] == "dummy_key_for_testing"
+    assert "gzip" in headers["Accept-Encoding"]
+
+
+def test_get_retries_server_errors(client, mocker):
+    """Une erreur 5xx est réessayée, puis la réponse valide est renvoyée."""
+    mock_get = mocker.patch.object(
+        client.session, "get",
+        side_effect=[_response(mocker, 500), _response(mocker, 200, {"response": [1]})]
+    )
+
+    assert client.get("odds", {"fixture": 1}) == {"response": [1]}
+    assert mock_get.call_count == 2
+    mock_get.assert_called_with("http://localhost/v3/odds", params={"fixture": 1}, timeout=client.timeout)
+
+
+def test_get_does_not_retry_client_errors(client, mocker):
+    """Une erreur 4xx (hors 429) n'est pas réessayée."""
+    mock_get = mocker.patch.object(client.session, "get", return_value=_response(mocker, 403))
+
+    assert client.get("odds", {"fixture": 1}) is None
+    assert mock_get.call_count == 1
+    assert client.stats["failed_requests"] == 1
+
+
+def test_get_gives_up_after_max_retries(client, mocker):
+    mock_get = mocker.patch.object(
+        client.session, "get", side_effect=requests.exceptions.ConnectionError("down")
+    )
+
+    assert client.get("fixtures", {"date": "2025-01-01"}) is None
+    assert mock_get.call_count == client.max_retries
+
+
+def test_token_bucket_waits_when_empty(mocker):
+    """Au-delà de la capacité, le seau impose une attente proportionnelle au débit."""
+    from src.api.rate_limiter import TokenBucket
+    sleep = mocker.patch("src.api.rate_limiter.time.sleep")
+    bucket = TokenBucket(rate=2, capacity=2)
+    mocker.patch("src.api.rate_limiter.time.monotonic", return_value=bucket._last_refill)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    with pytest.raises(StopIteration):
+        # Le temps est figé : le seau ne se remplit jamais, l'attente est demandée
+        sleep.side_effect = StopIteration
+        bucket.acquire()
+    sleep.assert_called_once_with(pytest.approx(0.5))
+
+
+def test_resolve_ttl_by_endpoint_and_status():
+    from src.api.cache import resolve_ttl
+    now = 1_700_000_000
+    stats = {"response": [{"team": {}}, {"team": {}}]}
+
+    assert resolve_ttl("fixtures/statistics", stats, "FT", now=now) is None
+    assert resolve_ttl("fixtures/statistics", stats, "2H", now=now) > 0
+    assert resolve_ttl("fixtures/statistics", {"response": []}, "FT", now=now) == 0
+
+    past_odds = {"response": [{"fixture": {"timestamp": now - 86400}}]}
+    upcoming_odds = {"response": [{"fixture": {"timestamp": now + 3600}}]}
+    assert resolve_ttl("odds", past_odds, now=now) is None
+    assert 0 < resolve_ttl("odds", upcoming_odds, now=now) <= 3600
+
+
+def test_client_serves_cached_response(mocker, tmp_path):
+    """Une réponse définitive est servie depuis le cache sans nouvel appel réseau."""
+    from src.api.cache import ResponseCache
+    client = ApiFootballClient(
+        api_key="dummy_key_for_testing", base_url="http://localhost/v3",
+        cache=ResponseCache(str(tmp_path / "cache.sqlite")), coalesce_window=0
+    )
+    payload = {"response": [{"team": {"id": 1}}, {"team": {"id": 2}}]}
+    mock_get = mocker.patch.object(client.session, "get", return_value=_response(mocker, 200, payload))
+
+    assert client.get("fixtures/statistics", {"fixture": 7}, fixture_status="FT") == payload
+    # Paramètres équivalents (type différent) : même clé de cache
+    assert client.get("fixtures/statistics", {"fixture": "7"}) == payload
+    assert mock_get.call_count == 1
+    assert client.stats["cache_hits"] == 1
+
+
+def test_rate_follows_rate_limit_headers(client, mocker):
+    """Le débit suit le quota par minute annoncé et ralentit quand il s'épuise."""
+    fresh = {"x-ratelimit-limit": "600", "x-ratelimit-remaining": "590"}
+    exhausted = {"x-ratelimit-limit": "600", "x-ratelimit-remaining": "30"}
+    mocker.patch.object(client.session, "get", side_effect=[
+        _response(mocker, 200, {"response": []}, fresh),
+        _response(mocker, 200, {"response": []}, exhausted),
+    ])
+
+    client.get("fixtures", {"date": "2025-01-01"})
+    assert client.rate_limiter.rate == pytest.approx(10)
+    client.get("fixtures", {"date": "2025-01-02"})
+    assert client.rate_limiter.rate == pytest.approx(5)
+
+
+def test_429_uses_retry_after_then_exponential_backoff(client, mocker):
+    sleep = mocker.patch("src.api.client.time.sleep")
+    mocker.patch.object(client.session, "get", side_effect=[
+        _response(mocker, 429, headers={"Retry-After": "7"}),
+        _response(mocker, 429),
+        _response(mocker, 200, {"response": [1]}),
+    ])
+
+    assert client.get("odds", {"fixture": 1}) == {"response": [1]}
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert delays[0] == 7
+    # 2e tentative : plafond retry_delay * 2, avec gigue dans [plafond/2, plafond]
+    assert client.retry_delay <= delays[1] <= client.retry_delay * 2
+    assert client.stats["rate_limited"] == 2
+
+
+def test_client_against_stub_server(mocker):
+    """Le client fonctionne contre le serveur local : données synthétiques, en-têtes de quota et erreurs."""
+    from src.api.stub_server import StubApiServer
+
+    mocker.patch("src.api.client.time.sleep", return_value=None)
+    with StubApiServer(rate_limit=600, error_rate=0.0, fixtures_per_day=2) as server:
+        client = ApiFootballClient(api_key="stub", base_url=server.url)
+
+        fixtures = client.get("fixtures", {"league": 39, "season": 2024, "date": "2025-03-01"})
+        assert fixtures["results"] == 2
+        fixture_id = fixtures["response"][0]["fixture"]["id"]
+
+        stats = client.get("fixtures/statistics", {"fixture": fixture_id})
+        assert len(stats["response"]) == 2
+
+        odds = client.get("odds", {"fixture": fixture_id})
+        assert odds["response"][0]["fixture"]["id"] == fixture_id
+        assert client.rate_limiter.rate == 10
+        assert server.stats["fixtures"] == 1
+
+        server.error_rate = 1.0
+        assert client.get("fixtures/players", {"fixture": fixture_id}) is None
+        assert server.stats["errors_injected"] == client.max_retries
+
+
+def test_get_client_skips_disk_cache_for_other_hosts():
+    assert get_client("key_stub", base_url="http://127.0.0.1:1/v3").cache is None
+
+
+def test_identical_requests_share_one_call(client, mocker):
+    """Une requête identique récente est servie sans nouvel appel réseau."""
+    mock_get = mocker.patch.object(client.session, "get", return_value=_response(mocker, 200, {"response": [1]}))
+
+    assert client.get("fixtures", {"date": "2025-08-30"}) == {"response": [1]}
+    assert client.get("fixtures", {"date": "2025-08-30"}) == {"response": [1]}
+    assert client.get("fixtures", {"date": "2025-08-31"}) == {"response": [1]}
+    assert mock_get.call_count == 2
+    assert client.stats["coalesced"] == 1
+
+
+def test_concurrent_identical_requests_are_coalesced(client, mocker):
+    """Des requêtes identiques simultanées attendent le même appel en cours."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    release = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        release.wait(timeout=5)
+        return _response(mocker, 200, {"response": ["odds"]})
+
+    mock_get = mocker.patch.object(client.session, "get", side_effect=slow_get)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(client.get, "odds", {"fixture": 7}) for _ in range(4)]
+        while len(client._in_flight) == 0:
+            pass
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [{"response": ["odds"]}] * 4
+    assert mock_get.call_count == 1
+    assert client.stats["coalesced"] == 3
+
+
+def test_circuit_breaker_skips_failing_endpoint(client, mocker, tmp_path):
+    """Après plusieurs échecs, l'endpoint est coupé et les requêtes vont dans la file de reprise."""
+    from src.api.circuit_breaker import RetryQueue
+
+    client.retry_queue = RetryQueue(str(tmp_path / "retry_queue.json"), max_age_days=30)
+    mock_get = mocker.patch.object(client.session, "get", return_value=_response(mocker, 503))
+
+    for fixture_id in range(5):
+        assert client.get("fixtures/statistics", {"fixture": fixture_id}) is None
+
+    # 5 échecs ouvrent le circuit : les appels suivants ne partent plus
+    assert mock_get.call_count == 5
+    assert client.stats["short_circuited"] >= 3
+    # Les autres endpoints ont leur propre disjoncteur et restent appelés
+    assert client.get("odds", {"fixture": 1}) is None
+    assert mock_get.call_count == 5 + client.max_retries
+
+    client.retry_queue.save()
+    reloaded = RetryQueue(str(tmp_path / "retry_queue.json"), max_age_days=30)
+    assert sorted(p["fixture"] for p in reloaded.pending("fixtures/statistics")) == [0, 1, 2, 3, 4]
+
+    # Au passage suivant, une réussite retire la requête de la file
+    fresh = ApiFootballClient(api_key="dummy_key_for_testing", base_url="http://localhost/v3", retry_queue=reloaded)
+    mocker.patch.object(fresh.session, "get", return_value=_response(mocker, 200, {"response": [1]}))
+    assert fresh.get("fixtures/statistics", {"fixture": 3}) == {"response": [1]}
+    assert 3 not in [p["fixture"] for p in reloaded.pending("fixtures/statistics")]
+
+
+def test_retry_budget_limits_retries(mocker):
+    mocker.patch("src.api.client.time.sleep", return_value=None)
+    client = ApiFootballClient(api_key="dummy_key_for_testing", base_url="http://localhost/v3", retry_budget=1)
+    mock_get = mocker.patch.object(
+        client.session, "get", side_effect=requests.exceptions.ConnectionError("down")
+    )
+
+    assert client.get("fixtures", {"date": "2025-01-01"}) is None
+    assert client.get("odds", {"fixture": 1}) is None
+    # 2 tentatives pour la première requête (1 retry du budget), 1 seule pour la seconde
+    assert mock_get.call_count == 3
+    assert client.stats["retries_skipped"] == 2
+
+
+def test_rate_limited_trial_call_reopens_circuit(client, mocker):
+    """Un 429 sur l'appel d'essai rouvre le circuit au lieu de le laisser semi-ouvert."""
+    breaker = client.breakers["fixtures/statistics"]
+    clock = mocker.patch("src.api.circuit_breaker.time.monotonic", return_value=1000.0)
+    breaker.state = breaker.OPEN
+    breaker.opened_at = 1000.0 - breaker.reset_timeout
+    mock_get = mocker.patch.object(client.session, "get", return_value=_response(mocker, 429))
+
+    assert client.get("fixtures/statistics", {"fixture": 1}) is None
+    assert mock_get.call_count == 1
+    assert breaker.state == breaker.OPEN
+    assert breaker.failures == 0
+
+    # Après un nouveau délai, un appel d'essai repart et referme le circuit
+    clock.return_value = 1000.0 + breaker.reset_timeout
+    mock_get.return_value = _response(mocker, 200, {"response": [1]})
+    assert client.get("fixtures/statistics", {"fixture": 2}) == {"response": [1]}
+    assert breaker.state == breaker.CLOSED
@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+
+from src.data_processing.catalog import DataCatalog, frame_stats
+
+
+def test_record_and_append_answer_from_the_catalog(tmp_path, mocker):
+    catalog = DataCatalog(str(tmp_path / 'catalog.json'))
+    path = str(tmp_path / 'matches' / 'FRA1.csv')
+    os.makedirs(os.path.dirname(path))
+    df = pd.DataFrame({'fixture_id': [1, 2], 'date': ['2025-03-01', '2025-03-08'], 'home_goals': [2, 0]})
+    df.to_csv(path, index=False)
+    catalog.record(path, frame_stats(df))
+
+    new_rows = pd.DataFrame({'fixture_id': [3], 'date': ['2025-03-15'], 'home_goals': [1]})
+    new_rows.to_csv(path, mode='a', header=False, index=False)
+    catalog.record(path, frame_stats(new_rows), append=True)
+    read_csv = mocker.spy(pd, 'read_csv')
+
+    entry = catalog.refresh([path])['matches/FRA1.csv']
+
+    assert read_csv.call_count == 0
+    assert (entry['rows'], entry['min_date'], entry['max_date']) == (3, '2025-03-01', '2025-03-15')
+    assert entry['bytes'] == os.path.getsize(path)
+    assert entry['schema_hash'] == frame_stats(pd.read_csv(path))['schema_hash']
+    assert catalog.key(str(tmp_path.parent / 'elsewhere.csv')) is None
+
+
+def test_refresh_recomputes_files_changed_outside_the_writers(tmp_path):
+    catalog = DataCatalog(str(tmp_path / 'catalog.json'))
+    path = str(tmp_path / 'FRA1_players.parquet')
+    df = pd.DataFrame({'player_id': [7, 9], 'match_date': ['2025-03-01', '2025-04-02']})
+    df.to_parquet(path, index=False)
+    catalog.record(path, frame_stats(df))
+
+    pd.concat([df, df.assign(match_date='2025-05-10')]).to_parquet(path, index=False)
+    entries = catalog.refresh()
+
+    assert entries['FRA1_players.parquet']['rows'] == 4
+    assert entries['FRA1_players.parquet']['max_date'] == '2025-05-10'
+    os.remove(path)
+    assert catalog.refresh() == {} and catalog.entries() == {}
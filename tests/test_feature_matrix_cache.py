@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from src.data_processing.odds_store import OddsStore, load_odds
+from src.prediction import feature_matrix_cache
+from src.prediction.feature_matrix_cache import (FEATURE_ODDS_COLUMNS, FeatureMatrixCache, IncrementalFeatureMatrix,
+                                                 build_feature_rows)
+
+BET_VALUES = {'Match Winner': ['Home', 'Draw', 'Away'], 'Both Teams Score': ['Yes', 'No'],
+              'Goals Over/Under': ['Over 2.5', 'Under 2.5']}
+
+
+def _odds(rng, fixture_ids, fixture_dates, collected_at='2025-08-21T12:25:15.526371'):
+    rows = []
+    for fixture_id, fixture_date in zip(fixture_ids, fixture_dates):
+        for bookmaker_id in range(1, int(rng.integers(2, 6)) + 1):
+            for bet_type_id, (bet_type, values) in enumerate(BET_VALUES.items(), start=1):
+                for value in values:
+                    if rng.random() < 0.85:
+                        rows.append((fixture_id, fixture_date, bookmaker_id, f"Book{bookmaker_id}", bet_type_id,
+                                     bet_type, value, round(float(rng.uniform(1.05, 6.0)), 2), collected_at))
+    return pd.DataFrame(rows, columns=['fixture_id', 'fixture_date', 'bookmaker_id', 'bookmaker_name', 'bet_type_id',
+                                       'bet_type_name', 'bet_value', 'odd', 'collected_at'])
+
+
+def _dates(start, n, days=3):
+    return [(start + pd.Timedelta(days=days * i)).strftime('%Y-%m-%dT15:00:00+00:00')
+            for i in range(n)]
+
+
+def _full_build(store, tmp_path, leagues, retention_days):
+    odds = load_odds(leagues, columns=FEATURE_ODDS_COLUMNS, store=store, csv_dir=str(tmp_path / 'csv'))
+    cutoff = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=retention_days)
+    latest = odds.groupby('fixture_id')['fixture_date'].transform('max')
+    return build_feature_rows(odds[latest >= cutoff], 3)
+
+
+def test_incremental_matrix_recomputes_only_changed_fixtures_and_matches_a_full_build(tmp_path, mocker):
+    rng = np.random.default_rng(7)
+    store = OddsStore(str(tmp_path / 'store'))
+    today = pd.Timestamp.now(tz='UTC').normalize()
+    store.append('FRA1', _odds(rng, range(1, 41), _dates(today - pd.Timedelta(days=130), 40)))
+    store.append('ENG1', _odds(rng, range(101, 131), _dates(today - pd.Timedelta(days=100), 30)))
+
+    def matrix(cache_dir='cache'):
+        return IncrementalFeatureMatrix('daily', ['FRA1', 'ENG1'], 3, retention_days=120, store=store,
+                                        csv_dir=str(tmp_path / 'csv'),
+                                        cache=FeatureMatrixCache(str(tmp_path / cache_dir))).update()
+
+    first = matrix()
+    pd.testing.assert_frame_equal(first, _full_build(store, tmp_path, ['FRA1', 'ENG1'], 120), check_exact=True)
+    assert first.index.min() > 1
+
+    # Une semaine de cotes : nouveaux matchs et nouvelles cotes d'un match déjà connu
+    build = mocker.spy(feature_matrix_cache, 'build_feature_rows')
+    week = pd.concat([_odds(rng, [131, 132], _dates(today - pd.Timedelta(days=2), 2)),
+                      _odds(rng, [130], [store.read(['ENG1'], columns=['fixture_date'])['fixture_date'].max()
+                                         .strftime('%Y-%m-%dT%H:%M:%S+00:00')], collected_at='2025-08-28T09:00:00')])
+    store.append('ENG1', week)
+    updated = matrix()
+
+    assert sorted(build.call_args.args[0]['fixture_id'].unique()) == [130, 131, 132]
+    pd.testing.assert_frame_equal(updated, _full_build(store, tmp_path, ['FRA1', 'ENG1'], 120), check_exact=True)
+    pd.testing.assert_frame_equal(updated, matrix('fresh_cache'), check_exact=True)
+
+    # Sans nouvelle cote : relecture seule ; la compaction recalcule les matchs des partitions réécrites
+    build.reset_mock()
+    pd.testing.assert_frame_equal(matrix(), updated, check_exact=True)
+    assert build.call_count == 0
+    store.compact('ENG1')
+    pd.testing.assert_frame_equal(matrix(), _full_build(store, tmp_path, ['FRA1', 'ENG1'], 120), check_exact=True)
@@ -0,0 +1,41 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+from src.data_processing.file_io import atomic_write, file_lock, write_csv
+
+
+def _increment(path, times):
+    for _ in range(times):
+        with file_lock(path):
+            count = int(pd.read_csv(path)['count'].iloc[0])
+            write_csv(pd.DataFrame({'count': [count + 1]}), path)
+
+
+def test_parallel_read_modify_write_loses_no_update(tmp_path):
+    path = str(tmp_path / "ENG1.csv")
+    write_csv(pd.DataFrame({'count': [0]}), path)
+
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_increment, args=(path, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert pd.read_csv(path)['count'].iloc[0] == 100
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['ENG1.csv', 'ENG1.csv.lock']
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "FRA1.csv")
+    write_csv(pd.DataFrame({'fixture_id': [1, 2]}), path)
+
+    with pytest.raises(RuntimeError):
+        with file_lock(path), atomic_write(path) as f:
+            f.write("fixture_id\n3\n")
+            raise RuntimeError("collecte interrompue")
+
+    assert pd.read_csv(path)['fixture_id'].tolist() == [1, 2]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['FRA1.csv', 'FRA1.csv.lock']
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from src.data_processing.football_odds_collector import FootballOddsMaintainer
+
+
+def _odds_entry(fixture_id, bookmaker_id=8):
+    return {
+        "fixture": {"id": fixture_id, "date": "2025-08-30T15:00:00+00:00"},
+        "bookmakers": [
+            {"id": bookmaker_id, "name": "Bet365",
+             "bets": [{"id": 1, "name": "Match Winner", "values": [{"value": "Home", "odd": "1.80"}]}]}
+        ]
+    }
+
+
+@pytest.fixture
+def maintainer(mocker):
+    maintainer = FootballOddsMaintainer(rapidapi_key='dummy_key_for_testing')
+    mocker.patch.object(maintainer.api_client, 'cache', None)
+    mocker.patch.object(maintainer.api_client, 'coalesce_window', 0)
+    mocker.patch.object(maintainer.api_client, 'retry_queue', None)
+    return maintainer
+
+
+def test_bulk_ingestion_pages_and_fans_out_by_fixture(maintainer, mocker):
+    """Vérifie qu'une requête paginée par date alimente tous les matchs de la ligue."""
+    pages = [
+        {"paging": {"current": 1, "total": 2}, "response": [_odds_entry(101), _odds_entry(999)]},
+        {"paging": {"current": 2, "total": 2}, "response": [_odds_entry(102)]},
+    ]
+    mock_request = mocker.patch.object(maintainer, 'make_api_request', side_effect=pages)
+    fixtures = pd.DataFrame({
+        'fixture_id': [101, 102],
+        'season': [2025, 2025],
+        'date': pd.to_datetime(['2025-08-30', '2025-08-30'])
+    })
+
+    frames = maintainer.collect_league_odds_bulk('ENG1', fixtures)
+
+    assert sorted(pd.concat(frames)['fixture_id']) == [101, 102]
+    assert mock_request.call_count == 2
+    assert mock_request.call_args_list[0].args == ('odds', {'league': 39, 'season': 2025, 'date': '2025-08-30'})
+    assert mock_request.call_args_list[1].args[1]['page'] == 2
+
+
+def test_bulk_ingestion_one_request_per_date(maintainer, mocker):
+    """Vérifie qu'il y a une requête par (saison, date) et non par match."""
+    mock_request = mocker.patch.object(maintainer, 'make_api_request',
+                                       return_value={"paging": {"current": 1, "total": 1}, "response": []})
+    fixtures = pd.DataFrame({
+        'fixture_id': [1, 2, 3, 4],
+        'season': [2025] * 4,
+        'date': pd.to_datetime(['2025-08-30', '2025-08-30', '2025-08-31', '2025-08-31'])
+    })
+
+    assert maintainer.collect_league_odds_bulk('ENG1', fixtures) == []
+    assert mock_request.call_count == 2
+
+
+def test_process_odds_data_decodes_typed_columns(maintainer):
+    """Vérifie le décodage colonnaire : colonnes du CSV, cotes numériques, un seul horodatage."""
+    entry = _odds_entry(101)
+    entry["bookmakers"].append({"id": 6, "name": "Bwin", "bets": [
+        {"id": 1, "name": "Match Winner", "values": [{"value": "Home", "odd": "1.85"}, {"value": "Away", "odd": "n/a"}]}
+    ]})
+
+    odds_df = maintainer.process_odds_data(101, [entry])
+
+    assert list(odds_df.columns) == ['fixture_id', 'fixture_date', 'bookmaker_id', 'bookmaker_name', 'bet_type_id',
+                                     'bet_type_name', 'bet_value', 'odd', 'collected_at']
+    assert odds_df['bookmaker_id'].tolist() == [8, 6, 6]
+    assert odds_df['bet_value'].tolist() == ['Home', 'Home', 'Away']
+    assert odds_df['odd'].dtype == 'float64'
+    assert odds_df['odd'].iloc[:2].tolist() == [1.80, 1.85]
+    assert pd.isna(odds_df['odd'].iloc[2])
+    assert odds_df['collected_at'].nunique() == 1
+    assert maintainer.stats['new_odds_collections'] == 1
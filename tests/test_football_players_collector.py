@@ -0,0 +1,24 @@
+import pandas as pd
+
+from src.data_processing.football_players_collector import FootballPlayersCollector
+from src.data_processing.player_store import write_players
+
+
+def test_full_collection_summarises_written_files(tmp_path, monkeypatch, mocker, caplog):
+    """La collecte complète se termine par le décompte des fichiers créés par dossier."""
+    monkeypatch.chdir(tmp_path)
+    collector = FootballPlayersCollector(rapidapi_key='dummy_key_for_testing')
+    collector.leagues = {'FRA1': 'Ligue 1'}
+
+    def collect(league_code):
+        stats = pd.DataFrame({'fixture_id': [1], 'player_id': [10], 'player_name': ['A'], 'minutes_played': [90]})
+        write_players('player_stats', league_code, stats, collector.players_folder)
+        collector.stats['leagues_processed'] += 1
+
+    mocker.patch.object(collector, 'collect_league_players', side_effect=collect)
+
+    with caplog.at_level('INFO'):
+        collector.run_full_collection()
+
+    assert "📊 Stats joueurs: 1 fichiers" in caplog.text
+    assert "📊 Compositions: 0 fichiers" in caplog.text
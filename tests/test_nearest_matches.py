@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.analyzer import analyze_fixture, find_similar_matches
+from src.analysis.nearest_matches import NearestMatchIndex
+
+
+def _historical_matrix(rng, n=600):
+    columns = ['Match Winner_Home', 'Match Winner_Draw', 'Match Winner_Away', 'Over/Under_Over 2.5',
+               'Over/Under_Under 2.5', 'Both Teams to Score_Yes', 'Both Teams to Score_No', 'Correct Score_1:0']
+    values = np.round(rng.gamma(4, 0.5, (n, len(columns))) + 1, 2)
+    values[rng.random(values.shape) < 0.25] = np.nan
+    # Matchs cotés sur un seul marché, étranger à la cible
+    values[:50, :7] = np.nan
+    return pd.DataFrame(values, index=pd.Index(range(10000, 10000 + n), name='fixture_id'), columns=columns)
+
+
+def _full_scan(target, historical):
+    common = target.dropna().index.intersection(historical.columns)
+    return np.abs(historical[common] - target[common]).mean(axis=1).dropna()
+
+
+def test_index_matches_a_full_scan_for_top_k_and_radius():
+    rng = np.random.default_rng(3)
+    historical = _historical_matrix(rng)
+    index = NearestMatchIndex(historical)
+
+    for _ in range(20):
+        target = pd.Series(np.round(rng.gamma(4, 0.5, 8) + 1, 2), index=historical.columns)
+        target.iloc[7] = np.nan
+        expected = _full_scan(target, historical)
+        for k, radius in [(None, None), (15, None), (None, 0.6), (10, 0.6), (0, None)]:
+            result = index.query(target, k=k, radius=radius)
+            reference = expected if radius is None else expected[expected <= radius]
+            reference = reference.sort_values(kind='stable')
+            if k is not None:
+                reference = reference.iloc[:k]
+            assert list(result.index) == list(reference.index)
+            np.testing.assert_allclose(result.to_numpy(), reference.to_numpy(), rtol=0, atol=1e-12)
+
+    # Les matchs sans aucun marché commun ne sont même pas candidats
+    target = pd.Series(2.0, index=historical.columns[:3])
+    assert not set(historical.index[:50]) & set(index.candidates([0, 1, 2], target.to_numpy()))
+
+
+def test_find_similar_matches_keeps_its_result_format():
+    rng = np.random.default_rng(5)
+    historical = _historical_matrix(rng, n=200)
+    target = historical.iloc[120].fillna(2.0)
+    historical.iloc[120] = target
+
+    result = find_similar_matches(target, historical, k=5)
+
+    assert result['common_bets'] == historical.columns.tolist()
+    assert result['distances'].loc[historical.index[120]] == 0
+    assert len(result['distances']) == 5 and result['distances'].is_monotonic_increasing
+    few_bets = find_similar_matches(target.iloc[:3], historical)
+    assert few_bets['distances'].empty and len(few_bets['common_bets']) == 3
+
+
+def test_analyze_fixture_without_neighbour_in_radius_is_a_success(tmp_path, monkeypatch, mocker):
+    """Des paris communs mais aucun match dans le rayon : pas de prédiction, sans échec."""
+    monkeypatch.chdir(tmp_path)
+    columns = [f'Match Winner_{i}' for i in range(6)]
+    historical = pd.DataFrame({column: [1.5, 1.6] for column in columns}, index=pd.Index([1, 2], name='fixture_id'))
+    historical['result'] = ['Home', 'Away']
+    target = pd.DataFrame([[5.5] * 6], columns=columns, index=[99])
+    mocker.patch('src.analysis.analyzer.get_api_odds_for_fixture', return_value=target)
+
+    analyze_fixture(99, historical)
+    with open(tmp_path / 'predictions' / 'prediction_99.json') as f:
+        report = json.load(f)
+
+    assert report['status'] == 'success'
+    assert report['error_message'] == 'No historically similar matches found.'
+    assert report['diagnostics']['common_bets_count'] == 6
+
+    # Trop peu de paris communs : l'analyse échoue toujours
+    mocker.patch('src.analysis.analyzer.get_api_odds_for_fixture', return_value=target[columns[:3]])
+    analyze_fixture(99, historical)
+    with open(tmp_path / 'predictions' / 'prediction_99.json') as f:
+        assert json.load(f)['status'] == 'failed'
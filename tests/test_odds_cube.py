@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.odds_cube import OddsCube, build_cube
+from src.data_processing.odds_store import OddsStore
+
+
+def _odds(fixture_id, fixture_date, bookmaker_id, bet_value, odd, collected_at='2025-08-21T12:00:00',
+          bet_type_name='Match Winner'):
+    return {'fixture_id': fixture_id, 'fixture_date': fixture_date, 'bookmaker_id': bookmaker_id,
+            'bookmaker_name': f"Book{bookmaker_id}", 'bet_type_id': 1, 'bet_type_name': bet_type_name,
+            'bet_value': bet_value, 'odd': odd, 'collected_at': collected_at}
+
+
+@pytest.fixture
+def cube(tmp_path):
+    store = OddsStore(str(tmp_path / "store"))
+    store.append('ENG1', pd.DataFrame([
+        _odds(10, '2025-08-16T14:00:00+00:00', 1, 'Home', 2.10),
+        _odds(10, '2025-08-16T14:00:00+00:00', 2, 'Home', 2.30),
+        _odds(10, '2025-08-16T14:00:00+00:00', 1, 'Away', 3.40),
+        _odds(10, '2025-08-16T14:00:00+00:00', 1, 'Yes', 1.70, bet_type_name='Exact Score'),
+    ]))
+    # Segment plus récent non compacté : la cote la plus récente l'emporte
+    store.append('ENG1', pd.DataFrame([_odds(10, '2025-08-16T14:00:00+00:00', 2, 'Home', 2.25, '2025-08-22T09:00:00')]))
+    store.append('FRA1', pd.DataFrame([_odds(20, '2025-08-09T19:00:00+00:00', 2, 'Home', 1.80)]))
+    return build_cube(['ENG1', 'FRA1'], cube_dir=str(tmp_path / "cube"), bet_types=['Match Winner'], store=store)
+
+
+def test_cube_dimensions_and_indexes(cube):
+    assert cube.shape == (2, 2, 2)
+    assert cube.fixtures['fixture_id'].tolist() == [20, 10]
+    assert cube.fixtures['league_code'].tolist() == ['FRA1', 'ENG1']
+    assert cube.markets['market'].tolist() == ['Match Winner_Away', 'Match Winner_Home']
+    assert cube.bookmakers['bookmaker_name'].tolist() == ['Book1', 'Book2']
+    np.testing.assert_array_equal(cube.fixture_odds(10), np.array([[3.40, np.nan], [2.10, 2.25]], dtype=np.float32))
+
+
+def test_bookmaker_queries_are_views_of_the_mapped_file(cube, tmp_path):
+    history = cube.bookmaker_history(2, 'Match Winner_Home')
+    assert history.index.tolist() == [20, 10]
+    assert history.tolist() == pytest.approx([1.80, 2.25])
+    assert np.shares_memory(history.to_numpy(), cube.odds)
+    assert np.shares_memory(cube.bookmaker_odds(1), cube.odds)
+    assert isinstance(OddsCube(str(tmp_path / "cube")).odds, np.memmap)
+
+    assert cube.best_price('Match Winner_Home').to_dict() == pytest.approx({20: 1.80, 10: 2.25})
+    spread = cube.spread()
+    assert spread.loc[10, 'Match Winner_Home'] == pytest.approx(0.15)
+    assert pd.isna(spread.loc[20, 'Match Winner_Away'])
+
+    august_16 = cube.date_range('2025-08-16', '2025-08-17')
+    assert cube.best_price('Match Winner_Away', rows=august_16).to_dict() == pytest.approx({10: 3.40})
@@ -0,0 +1,146 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.data_processing.odds_store import OddsStore, bet_identifier_column, load_odds
+
+
+def _odds_rows(fixture_id, fixture_date, n_bookmakers=3):
+    return pd.DataFrame({
+        'fixture_id': [fixture_id] * n_bookmakers,
+        'fixture_date': [fixture_date] * n_bookmakers,
+        'bookmaker_id': list(range(1, n_bookmakers + 1)),
+        'bookmaker_name': [f"Book{i}" for i in range(1, n_bookmakers + 1)],
+        'bet_type_id': [1] * n_bookmakers,
+        'bet_type_name': ['Match Winner'] * n_bookmakers,
+        'bet_value': ['Home'] * n_bookmakers,
+        'odd': ['1.80'] * n_bookmakers,
+        'collected_at': ['2025-08-21T12:25:15.526371'] * n_bookmakers
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OddsStore(str(tmp_path / "store"))
+
+
+def test_append_partitions_by_league_and_month(store):
+    store.append('ENG1', pd.concat([_odds_rows(1, '2025-07-30T15:00:00+00:00'),
+                                    _odds_rows(2, '2025-08-02T15:00:00+00:00')]))
+    store.append('ENG1', _odds_rows(3, '2025-08-09T15:00:00+00:00'))
+
+    assert [month for month, _ in store.partitions('ENG1')] == ['2025-07', '2025-08']
+    assert len(store.partition_files(store.partition_dir('ENG1', '2025-08'))) == 2
+
+    august = store.read(['ENG1'], columns=['fixture_id', 'odd'], start_month='2025-08')
+    assert sorted(august['fixture_id'].unique()) == [2, 3]
+    assert list(august.columns) == ['fixture_id', 'odd']
+    assert august['odd'].dtype == 'float64'
+    assert store.fixture_ids('ENG1') == {1, 2, 3}
+
+
+def test_compact_prunes_only_expired_partitions(store):
+    store.append('ENG1', pd.concat([_odds_rows(1, '2024-06-10T15:00:00+00:00'),
+                                    _odds_rows(2, '2024-07-20T15:00:00+00:00'),
+                                    _odds_rows(3, '2024-07-02T15:00:00+00:00'),
+                                    _odds_rows(4, '2025-08-02T15:00:00+00:00')]))
+    untouched = store.partition_files(store.partition_dir('ENG1', '2025-08'))
+
+    stats = store.compact('ENG1', pd.Timestamp('2024-07-15', tz='UTC'))
+
+    assert stats == {'partitions_compacted': 2, 'duplicates_removed': 0, 'records_pruned': 6}
+    assert [month for month, _ in store.partitions('ENG1')] == ['2024-07', '2025-08']
+    assert store.partition_files(store.partition_dir('ENG1', '2025-08')) == untouched
+    assert store.fixture_ids('ENG1') == {2, 4}
+
+
+def test_compact_drops_expired_months_without_reading_them(store, mocker):
+    store.append('ENG1', _odds_rows(1, '2023-01-10T15:00:00+00:00'))
+    store.append('ENG1', _odds_rows(2, '2023-01-20T15:00:00+00:00'))
+    store.append('ENG1', _odds_rows(3, '2024-03-05T15:00:00+00:00'))
+    read_partition = mocker.spy(OddsStore, '_read_partition')
+
+    stats = store.compact('ENG1', pd.Timestamp('2024-03-01', tz='UTC'))
+
+    assert stats == {'partitions_compacted': 1, 'duplicates_removed': 0, 'records_pruned': 6}
+    assert [month for month, _ in store.partitions('ENG1')] == ['2024-03']
+    assert [call.args[0] for call in read_partition.call_args_list] == [store.partition_dir('ENG1', '2024-03')]
+    assert not os.path.exists(store.partition_dir('ENG1', '2023-01'))
+
+
+def test_append_is_log_only_and_compact_keeps_latest_odds(store):
+    store.append('ENG1', _odds_rows(1, '2025-08-02T15:00:00+00:00'))
+    update = _odds_rows(1, '2025-08-02T15:00:00+00:00', n_bookmakers=2)
+    update['odd'] = '2.10'
+    update['collected_at'] = '2025-08-28T08:00:00'
+    store.append('ENG1', update)
+
+    partition_dir = store.partition_dir('ENG1', '2025-08')
+    assert len(store.read(['ENG1'])) == 5
+    assert len(store.partition_files(partition_dir)) == 2
+
+    stats = store.compact('ENG1')
+
+    assert stats['duplicates_removed'] == 2
+    assert len(store.partition_files(partition_dir)) == 1
+    compacted = store.read(['ENG1']).set_index('bookmaker_id')['odd']
+    assert compacted.to_dict() == {1: 2.10, 2: 2.10, 3: 1.80}
+    assert store.compact('ENG1')['partitions_compacted'] == 0
+
+
+def test_csv_import_export_round_trip(store, tmp_path):
+    csv_path = tmp_path / "ENG1_complete_odds.csv"
+    _odds_rows(1, '2025-08-24T15:30:00+00:00').to_csv(csv_path, index=False)
+
+    assert store.import_csv('ENG1', str(csv_path)) == 3
+    assert store.import_csv('ENG1', str(csv_path)) == 0
+
+    export_path = tmp_path / "export.csv"
+    store.export_csv('ENG1', str(export_path))
+    exported = pd.read_csv(export_path)
+    assert exported['fixture_date'].tolist() == ['2025-08-24T15:30:00+00:00'] * 3
+    assert exported['collected_at'].iloc[0] == '2025-08-21T12:25:15.526371'
+
+
+def test_load_odds_reads_store_then_csv_fallback(store, tmp_path):
+    store.append('ENG1', _odds_rows(1, '2025-08-24T15:30:00+00:00'))
+    csv_dir = tmp_path / "raw_data"
+    os.makedirs(csv_dir)
+    _odds_rows(2, '2025-08-24T15:30:00+00:00').to_csv(csv_dir / "FRA1_complete_odds.csv", index=False)
+
+    df = load_odds(['ENG1', 'FRA1', 'ITA1'], columns=['fixture_id', 'odd'], store=store, csv_dir=str(csv_dir))
+
+    assert df.groupby('league_code', observed=True)['fixture_id'].first().to_dict() == {'ENG1': 1, 'FRA1': 2}
+
+
+def test_load_odds_uses_compact_dtypes_across_sources(store, tmp_path):
+    store.append('ENG1', _odds_rows(1, '2025-08-24T15:30:00+00:00'))
+    store.append('ENG1', _odds_rows(2, '2025-09-14T15:30:00+00:00', n_bookmakers=5))
+    csv_dir = tmp_path / "raw_data"
+    os.makedirs(csv_dir)
+    _odds_rows(3, '2025-08-24T15:30:00+00:00').to_csv(csv_dir / "FRA1_complete_odds.csv", index=False)
+
+    df = load_odds(['ENG1', 'FRA1'], store=store, csv_dir=str(csv_dir))
+
+    assert df['fixture_id'].dtype == 'int64'
+    assert isinstance(df['fixture_date'].dtype, pd.DatetimeTZDtype)
+    assert str(df['fixture_date'].dtype.tz) == 'UTC'
+    assert pd.api.types.is_datetime64_dtype(df['collected_at'])
+    for column in ['bookmaker_name', 'bet_type_name', 'bet_value', 'league_code']:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype), column
+    assert list(df['bookmaker_name'].cat.categories) == ['Book1', 'Book2', 'Book3', 'Book4', 'Book5']
+
+
+def test_bet_identifier_column_matches_string_concatenation():
+    df = pd.DataFrame({
+        'bet_type_name': ['Match Winner', 'Match Winner', 'Goals Over/Under', None, 'Match Winner'],
+        'bet_value': pd.Categorical(['Home', 'Away', 'Over 2.5', 'Home', None]),
+    })
+
+    identifiers = bet_identifier_column(df)
+
+    expected = df['bet_type_name'].astype(str) + '_' + df['bet_value'].astype(str)
+    assert list(identifiers) == expected.tolist()
+    # Un type ou une valeur manquant garde son libellé au lieu de devenir NaN
+    assert not identifiers.isna().any()
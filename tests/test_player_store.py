@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+
+from src.data_processing.player_store import (data_files, encode_players_frame, players_path, read_players,
+                                              write_players)
+
+
+def _legacy_stats():
+    return pd.DataFrame({
+        'fixture_id': [101, 101, 102],
+        'league_code': ['FRA1', 'FRA1', 'FRA1'],
+        'match_date': ['2025-03-01', '2025-03-01', '2025-03-08'],
+        'player_id': [7, 9, 7],
+        'player_name': ['A. Martin', 'B. Diallo', 'A. Martin'],
+        'minutes': [90.0, None, 78.0],
+        'rating': [7.3, None, 6.8],
+        'captain': [True, False, True],
+        'assists': [1.0, None, 0.0],
+    })
+
+
+def test_write_players_converts_legacy_csv_to_typed_parquet(tmp_path):
+    players_dir = str(tmp_path)
+    csv_path = players_path('player_stats', 'FRA1', players_dir, 'csv')
+    os.makedirs(os.path.dirname(csv_path))
+    _legacy_stats().to_csv(csv_path, index=False)
+
+    legacy = read_players('player_stats', 'FRA1', players_dir)
+    path = write_players('player_stats', 'FRA1', legacy, players_dir)
+    df = read_players('player_stats', 'FRA1', players_dir)
+
+    assert path.endswith('FRA1_players.parquet')
+    assert not os.path.exists(csv_path)
+    assert data_files(os.path.dirname(path)) == ['FRA1_players.parquet']
+    assert df.dtypes.astype(str).to_dict() == {
+        'fixture_id': 'Int32', 'league_code': 'category', 'match_date': 'category', 'player_id': 'Int32',
+        'player_name': 'category', 'minutes': 'Int16', 'rating': 'Float32', 'captain': 'boolean', 'assists': 'Int16',
+    }
+    assert df['minutes'].tolist()[0] == 90 and df['minutes'].isna().tolist() == [False, True, False]
+    assert df['player_name'].astype(str).tolist() == ['A. Martin', 'B. Diallo', 'A. Martin']
+
+
+def test_write_players_accepts_typed_and_new_rows_together(tmp_path):
+    players_dir = str(tmp_path)
+    write_players('player_stats', 'FRA1', _legacy_stats(), players_dir)
+    existing = read_players('player_stats', 'FRA1', players_dir)
+    new_rows = encode_players_frame(pd.DataFrame([{'fixture_id': 103, 'league_code': 'FRA1', 'match_date': '2025-03-15',
+                              'player_id': 11, 'player_name': 'C. Petit', 'minutes': 12, 'rating': None,
+                              'captain': False, 'assists': None}]))
+
+    write_players('player_stats', 'FRA1', pd.concat([existing, new_rows], ignore_index=True), players_dir)
+    df = read_players('player_stats', 'FRA1', players_dir)
+
+    assert df['fixture_id'].tolist() == [101, 101, 102, 103]
+    assert str(df['minutes'].dtype) == 'Int16' and df['minutes'].iloc[-1] == 12
+    assert df['match_date'].cat.categories.tolist() == ['2025-03-01', '2025-03-08', '2025-03-15']
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from src.prediction.prediction_history import elo_predictions_history, predictions_history
+
+
+def _run(fixture_ids, timestamp, similarity):
+    return pd.DataFrame({
+        'fixture_id': fixture_ids,
+        'bet_type': ['Match Winner'] * len(fixture_ids),
+        'bet_value': ['Home'] * len(fixture_ids),
+        'similarity_pct': [similarity] * len(fixture_ids),
+        'analysis_timestamp': [timestamp] * len(fixture_ids),
+    })
+
+
+def _full_rewrite(runs):
+    """Ancienne mise à jour : concaténation, tri sur l'horodatage, dernière analyse gardée."""
+    combined = pd.concat(runs, ignore_index=True).sort_values('analysis_timestamp', kind='stable')
+    return combined.drop_duplicates(subset=['fixture_id', 'bet_type', 'bet_value'], keep='last')
+
+
+def test_upsert_appends_and_reads_like_full_rewrite(tmp_path):
+    path = str(tmp_path / "historical_predictions.csv")
+    history = predictions_history(path)
+    runs = [_run([1, 2], '2025-08-20T08:00:00', 60.0),
+            _run([2, 3], '2025-08-20T14:00:00', 70.0),
+            _run([3], '2025-08-20T11:00:00', 10.0)]  # plus ancienne que l'analyse déjà enregistrée
+
+    appended = [history.upsert(run) for run in runs]
+
+    assert appended == [2, 2, 0]
+    assert len(pd.read_csv(path)) == 4  # la ligne remplacée du match 2 reste jusqu'à la compaction
+    expected = _full_rewrite(runs).reset_index(drop=True)
+    pd.testing.assert_frame_equal(history.read().reset_index(drop=True), expected)
+
+
+def test_compaction_and_index_rebuild(tmp_path):
+    path = str(tmp_path / "historical_elo_predictions.csv")
+    history = elo_predictions_history(path)
+    history.upsert(pd.DataFrame({'fixture_id': [1, 2], 'home_win_prob': [0.5, 0.4]}))
+    history.upsert(pd.DataFrame({'fixture_id': [1], 'home_win_prob': [0.55]}))
+    assert len(pd.read_csv(path)) == 3
+
+    # Deuxième remplacement : autant de lignes remplacées que de lignes à jour, le fichier est compacté
+    history.upsert(pd.DataFrame({'fixture_id': [2], 'home_win_prob': [0.45]}))
+    assert pd.read_csv(path).to_dict('list') == {'fixture_id': [1, 2], 'home_win_prob': [0.55, 0.45]}
+
+    # Fichier modifié par ailleurs (git pull) : l'index est reconstruit, la nouvelle colonne élargit l'en-tête
+    pd.DataFrame({'fixture_id': [1, 2, 7], 'home_win_prob': [0.55, 0.45, 0.3]}).to_csv(path, index=False)
+    assert elo_predictions_history(path).upsert(pd.DataFrame({'fixture_id': [7], 'home_win_prob': [0.35],
+                                                              'elo_diff': [12.0]})) == 1
+    df = pd.read_csv(path)
+    assert df['fixture_id'].tolist() == [1, 2, 7]
+    assert df.loc[2, 'home_win_prob'] == 0.35 and df.loc[2, 'elo_diff'] == 12.0
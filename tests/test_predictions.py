@@ -1,8 +1,10 @@
+import os
 import pytest
 import pandas as pd
 import numpy as np
 import requests
 from src.prediction.daily_predictions_workflow import DailyPredictionsWorkflow
+from src.prediction.fixtures_discovery import fetch_day_fixtures, load_or_fetch_day_fixtures
 from src.config import (
     SIMILARITY_THRESHOLD,
     MIN_BOOKMAKERS_THRESHOLD,
@@ -18,6 +20,9 @@ def predictions_workflow(mocker):
     mocker.patch.object(DailyPredictionsWorkflow, 'load_all_historical_odds', return_value=pd.DataFrame())
     mocker.patch.object(DailyPredictionsWorkflow, 'create_comprehensive_feature_matrix', return_value=pd.DataFrame())
     workflow = DailyPredictionsWorkflow(rapidapi_key='dummy_key_for_testing')
+    mocker.patch.object(workflow.api_client, 'cache', None)
+    mocker.patch.object(workflow.api_client, 'coalesce_window', 0)
+    mocker.patch.object(workflow.api_client, 'retry_queue', None)
     return workflow
 
 
@@ -120,12 +125,68 @@ def test_calculate_similarity_with_all_thresholds(predictions_workflow):
     assert 'Fail_Pct_Bet' not in similarity_results
 
 
+def test_sorted_similarity_index_matches_full_column_scan(predictions_workflow):
+    """Les recherches dans l'index trié donnent exactement le résultat du parcours complet des colonnes."""
+    rng = np.random.default_rng(7)
+    values = np.round(rng.gamma(4, 0.5, 500) + 1, 2)
+    values[rng.random(500) < 0.3] = np.nan
+    predictions_workflow.historical_feature_matrix = pd.DataFrame({'Bet': values})
+    predictions_workflow.MIN_SIMILAR_MATCHES_THRESHOLD = 1
+    predictions_workflow.MIN_SIMILARITY_PCT_THRESHOLD = 0
+
+    historical = pd.Series(values).dropna()
+    # Cibles exactement à la limite du seuil pour certaines cotes historiques
+    for target in list(historical.iloc[:20] + 0.1) + list(historical.iloc[:20] - 0.1) + [1.0, 2.345, 50.0]:
+        distances = np.abs(historical - target)
+        similar = distances[distances <= 0.1]
+        result = predictions_workflow.calculate_similarity_for_all_bets({'Bet': target}).get('Bet')
+        if similar.empty:
+            assert result is None
+        else:
+            assert result['similar_matches_count'] == len(similar)
+            assert result['avg_distance'] == round(similar.mean(), 4)
+
+
+def test_batch_similarity_matches_fixture_by_fixture_results(predictions_workflow):
+    """Le calcul vectorisé sur tous les matchs donne les mêmes similarités que l'appel match par match."""
+    rng = np.random.default_rng(11)
+    historical = np.round(rng.gamma(4, 0.5, (400, 6)) + 1, 2)
+    historical[rng.random(historical.shape) < 0.3] = np.nan
+    predictions_workflow.historical_feature_matrix = pd.DataFrame(historical, columns=[f"Bet{j}_X" for j in range(6)])
+    predictions_workflow.MIN_SIMILAR_MATCHES_THRESHOLD = 5
+    predictions_workflow.MIN_SIMILARITY_PCT_THRESHOLD = 2
+
+    # Cibles aléatoires, à la limite du seuil, paris non cotés et pari absent de l'historique
+    targets = pd.DataFrame(np.round(rng.gamma(4, 0.5, (60, 7)) + 1, 2), columns=[f"Bet{j}_X" for j in range(7)])
+    targets.iloc[:20, 0] = pd.Series(historical[:, 0]).dropna().iloc[:20].to_numpy() + 0.1
+    targets = targets.mask(rng.random(targets.shape) < 0.2)
+
+    batch = predictions_workflow.calculate_similarity_batch(targets)
+
+    # Référence : parcours complet de chaque colonne, match par match
+    for label, row in targets.iterrows():
+        expected = {}
+        for bet, target in row.dropna().items():
+            if bet not in predictions_workflow.historical_feature_matrix.columns:
+                continue
+            column = predictions_workflow.historical_feature_matrix[bet].dropna()
+            distances = np.abs(column - target)
+            similar = distances[distances <= predictions_workflow.SIMILARITY_THRESHOLD]
+            percentage = len(similar) / len(column) * 100
+            if len(similar) >= 5 and percentage >= 2:
+                expected[bet] = (round(percentage, 2), len(similar), round(similar.mean(), 4), target)
+        assert {bet: (result['similarity_percentage'], result['similar_matches_count'], result['avg_distance'],
+                      result['target_odd']) for bet, result in batch[label].items()} == expected
+        assert batch[label] == predictions_workflow.calculate_similarity_for_all_bets(row.dropna().to_dict())
+    assert any(batch.values()) and not any('Bet6_X' in result for result in batch.values())
+
+
 def test_make_api_request_success(predictions_workflow, mocker):
     """Vérifie qu'une réponse API valide est renvoyée correctement."""
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = {"response": "ok"}
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch.object(predictions_workflow.api_client.session, "get", return_value=mock_response)
 
     data = predictions_workflow.make_api_request("fixtures", {"a": 1})
 
@@ -134,10 +195,11 @@ def test_make_api_request_success(predictions_workflow, mocker):
 
 def test_make_api_request_failure(predictions_workflow, mocker):
     """Vérifie que la fonction renvoie None après des erreurs répétées."""
-    mock_get = mocker.patch(
-        "requests.get", side_effect=requests.exceptions.RequestException("boom")
+    mock_get = mocker.patch.object(
+        predictions_workflow.api_client.session, "get",
+        side_effect=requests.exceptions.RequestException("boom")
     )
-    mocker.patch("src.prediction.daily_predictions_workflow.time.sleep", return_value=None)
+    mocker.patch("src.api.client.time.sleep", return_value=None)
 
     data = predictions_workflow.make_api_request("fixtures", {"a": 1})
 
@@ -185,16 +247,19 @@ def test_create_daily_predictions_csv_exports_counts(predictions_workflow, mocke
     mocker.patch.object(predictions_workflow, 'process_fixture_odds', return_value={'Bet_X_value': 1.5})
     mocker.patch.object(
         predictions_workflow,
-        'calculate_similarity_for_all_bets',
-        return_value={
-            'Bet_X_value': {
-                'similarity_percentage': 80.0,
-                'similar_matches_count': 12,
-                'total_historical_matches': 15,
-                'avg_distance': 0.1,
-                'target_odd': 1.5,
-                'similarity_reference_count': 15
+        'calculate_similarity_batch',
+        side_effect=lambda targets: {
+            label: {
+                'Bet_X_value': {
+                    'similarity_percentage': 80.0,
+                    'similar_matches_count': 12,
+                    'total_historical_matches': 15,
+                    'avg_distance': 0.1,
+                    'target_odd': 1.5,
+                    'similarity_reference_count': 15
+                }
             }
+            for label in targets.index
         }
     )
 
@@ -205,3 +270,80 @@ def test_create_daily_predictions_csv_exports_counts(predictions_workflow, mocke
     assert 'similarity_reference_count' in df.columns
     assert df.loc[0, 'similar_matches_count'] == 12
     assert df.loc[0, 'similarity_reference_count'] == 15
+
+
+def test_concurrent_odds_fetch_matches_sequential_output(predictions_workflow, mocker, tmp_path):
+    """Le mode parallèle produit les mêmes lignes, dans le même ordre, que le mode séquentiel."""
+    fixtures_data = [
+        {
+            'fixture': {'id': fixture_id, 'date': '', 'venue': {}, 'status': {}},
+            'teams': {'home': {'name': f'H{fixture_id}'}, 'away': {'name': f'A{fixture_id}'}},
+            'league': {'name': 'League'},
+        }
+        for fixture_id in range(1, 9)
+    ]
+    mocker.patch.object(predictions_workflow, 'get_fixture_odds', side_effect=lambda fid: [{'id': fid}])
+    mocker.patch.object(
+        predictions_workflow, 'process_fixture_odds',
+        side_effect=lambda fid, odds: {} if fid == 3 else {'Bet_X': 1.0 + fid / 10}
+    )
+    mocker.patch.object(
+        predictions_workflow, 'calculate_similarity_batch',
+        side_effect=lambda targets: {
+            label: {
+                bet: {'target_odd': odd, 'similarity_percentage': 75.0, 'similar_matches_count': 12,
+                      'similarity_reference_count': 16}
+                for bet, odd in row.dropna().items()
+            }
+            for label, row in targets.iterrows()
+        }
+    )
+
+    outputs = []
+    for workers in (1, 4):
+        predictions_workflow.predictions_dir = str(tmp_path / f"workers_{workers}")
+        os.makedirs(predictions_workflow.predictions_dir)
+        predictions_workflow.odds_fetch_workers = workers
+        daily_file, _ = predictions_workflow.create_daily_predictions_csv(fixtures_data)
+        outputs.append(pd.read_csv(daily_file).drop(columns=['analysis_timestamp']))
+
+    assert outputs[0]['fixture_id'].tolist() == [1, 2, 4, 5, 6, 7, 8]
+    pd.testing.assert_frame_equal(outputs[0], outputs[1])
+
+
+def test_day_fixtures_single_call_filtered_and_shared(predictions_workflow, mocker, tmp_path):
+    """Vérifie qu'un seul appel `fixtures?date=` alimente les deux workflows, filtré par ligue."""
+    day_response = {
+        "paging": {"current": 1, "total": 1},
+        "response": [
+            {"fixture": {"id": 1}, "league": {"id": 39}},
+            {"fixture": {"id": 2}, "league": {"id": 9999}},
+            {"fixture": {"id": 3}, "league": {"id": 140}},
+        ]
+    }
+    mock_request = mocker.patch.object(predictions_workflow, 'make_api_request', return_value=day_response)
+
+    fixtures = load_or_fetch_day_fixtures(predictions_workflow.make_api_request, predictions_workflow.today,
+                                          snapshot_dir=str(tmp_path))
+    assert [f['fixture']['id'] for f in fixtures] == [1, 3]
+    assert fixtures[0]['league_code'] == 'ENG1'
+    assert fixtures[0]['league_name'] == 'Premier League'
+    mock_request.assert_called_once_with('fixtures', {'date': predictions_workflow.today.strftime('%Y-%m-%d')})
+
+    # Deuxième étape de la même pipeline : l'instantané est réutilisé sans nouvel appel
+    again = load_or_fetch_day_fixtures(predictions_workflow.make_api_request, predictions_workflow.today,
+                                       snapshot_dir=str(tmp_path))
+    assert again == fixtures
+    assert mock_request.call_count == 1
+
+
+def test_day_fixtures_follows_paging(mocker):
+    """Vérifie que les pages suivantes sont demandées quand l'API pagine la réponse."""
+    pages = [
+        {"paging": {"current": 1, "total": 2}, "response": [{"fixture": {"id": 1}, "league": {"id": 39}}]},
+        {"paging": {"current": 2, "total": 2}, "response": [{"fixture": {"id": 2}, "league": {"id": 61}}]},
+    ]
+    request = mocker.Mock(side_effect=pages)
+    fixtures = fetch_day_fixtures(request, pd.Timestamp('2025-08-30').date())
+    assert [f['fixture']['id'] for f in fixtures] == [1, 2]
+    assert request.call_args_list[1].args == ('fixtures', {'date': '2025-08-30', 'page': 2})
@@ -0,0 +1,23 @@
+from datetime import date
+
+import pandas as pd
+
+from src.data_processing.retention import drop_expired_months, retention_cutoff
+
+
+def test_retention_cutoff_uses_configured_window():
+    assert retention_cutoff(3 * 365, today=date(2025, 8, 21)) == date(2022, 8, 22)
+
+
+def test_drop_expired_months_filters_only_the_boundary_month(mocker):
+    df = pd.DataFrame({
+        'fixture_id': [1, 2, 3, 4, 5, 6],
+        'match_date': ['2024-06-30', '2024-07-14', '2024-07-15', '2024-07-31 20:00:00', None, '2025-01-02'],
+    })
+    to_datetime = mocker.spy(pd, 'to_datetime')
+
+    kept = drop_expired_months(df, 'match_date', date(2024, 7, 15))
+
+    assert kept['fixture_id'].tolist() == [3, 4, 6]
+    assert kept['match_date'].tolist()[:2] == ['2024-07-15', '2024-07-31 20:00:00']
+    assert len(to_datetime.call_args.args[0]) == 3
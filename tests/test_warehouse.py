@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from src.data_processing import warehouse as warehouse_module
+from src.data_processing.warehouse import Warehouse, load_dataset, load_matches
+
+
+def _matches(fixture_ids, home_goals):
+    return pd.DataFrame({
+        'fixture_id': fixture_ids,
+        'date': [f"2025-08-{10 + i:02d}" for i in range(len(fixture_ids))],
+        'home_team_id': [33] * len(fixture_ids),
+        'away_team_id': [40] * len(fixture_ids),
+        'home_goals': home_goals,
+        'away_goals': [1] * len(fixture_ids),
+    })
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    warehouse = Warehouse(str(tmp_path / "warehouse.sqlite"))
+    yield warehouse
+    warehouse.close()
+
+
+def test_replace_league_keeps_other_leagues_and_creates_indexes(warehouse):
+    warehouse.replace_league('matches', 'ENG1', _matches([1, 2], [2, 0]))
+    warehouse.replace_league('matches', 'FRA1', _matches([3], [1]))
+    warehouse.replace_league('matches', 'ENG1', _matches([2, 4], [3, None]))
+
+    df = warehouse.query("SELECT fixture_id, league_code, home_goals FROM matches ORDER BY fixture_id")
+    assert df['fixture_id'].tolist() == [2, 3, 4]
+    assert df['league_code'].tolist() == ['ENG1', 'FRA1', 'ENG1']
+    assert df['home_goals'].iloc[0] == 3
+    assert pd.isna(df['home_goals'].iloc[2])
+
+    indexes = set(warehouse.query("SELECT name FROM sqlite_master WHERE type = 'index'")['name'])
+    assert {'idx_matches_league_code_date', 'idx_matches_date',
+            'idx_matches_home_team_id', 'idx_matches_away_team_id'} <= indexes
+
+
+def test_upsert_replaces_by_key_and_adds_new_columns(warehouse):
+    predictions = pd.DataFrame({'fixture_id': [1, 1], 'bet_type': ['Match Winner'] * 2,
+                                'bet_value': ['Home', 'Away'], 'similarity_pct': [60.0, 30.0]})
+    warehouse.upsert('predictions', predictions)
+    update = predictions.iloc[[0]].assign(similarity_pct=75.0, similar_matches_count=12)
+    warehouse.upsert('predictions', update)
+
+    df = warehouse.read('predictions').sort_values('bet_value')
+    assert df['similarity_pct'].tolist() == [30.0, 75.0]
+    assert 'similar_matches_count' in warehouse.columns('predictions')
+
+
+def test_load_matches_reads_warehouse_or_csv(warehouse, tmp_path):
+    matches_dir = tmp_path / "matches"
+    matches_dir.mkdir()
+    _matches([1, 2], [2, 0]).to_csv(matches_dir / "ENG1.csv", index=False)
+
+    empty = Warehouse(str(tmp_path / "empty.sqlite"))
+    from_csv = load_matches(['fixture_id', 'home_goals', 'home_goals_fulltime'],
+                            warehouse=empty, matches_dir=str(matches_dir))
+    assert list(from_csv.columns) == ['fixture_id', 'home_goals']
+    assert from_csv['fixture_id'].tolist() == [1, 2]
+    empty.close()
+
+    warehouse.replace_league('matches', 'ENG1', _matches([7], [4]))
+    from_warehouse = load_matches(warehouse=warehouse, matches_dir=str(matches_dir))
+    assert from_warehouse['fixture_id'].tolist() == [7]
+    assert 'league_code' not in from_warehouse.columns
+
+
+def test_writers_are_no_ops_when_warehouse_disabled(mocker, tmp_path):
+    mocker.patch.object(warehouse_module, 'WAREHOUSE_PATH', None)
+    mocker.patch.object(warehouse_module, '_warehouse', None)
+
+    warehouse_module.sync_rows('elo_predictions', pd.DataFrame({'fixture_id': [1]}))
+
+    assert warehouse_module.get_warehouse() is None
+    assert load_dataset('elo_predictions', str(tmp_path / "missing.csv")).empty